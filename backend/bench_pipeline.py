@@ -0,0 +1,199 @@
+# bench_pipeline.py - Throughput/latency harness for the LLM pipelines
+"""
+Drives the real pipeline code (resume parse, JD matching, template
+extraction and fill) with many concurrent requests and reports throughput
+and latency percentiles. Point it at ollama_stub.py for reproducible numbers
+without a model:
+
+    python bench_pipeline.py --start-stub --requests 50 --concurrency 10
+    python bench_pipeline.py --ollama-url http://gpu-box:11434 --scenario parse
+
+Each request's input is tagged with its index so the response cache and
+in-flight coalescing do not collapse the load into a single generation.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+SAMPLE_RESUME = Path(__file__).parent / "bench" / "sample_resume.md"
+SAMPLE_JD = """
+We are looking for a Senior Backend Engineer proficient in Python and Go.
+Experience with AWS services (Lambda, S3, EC2), PostgreSQL, and FastAPI is required.
+Must have experience with Docker, Kubernetes, and CI/CD pipelines.
+"""
+SCENARIOS = ["parse", "jd", "template"]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def wait_for_server(url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                resp = await client.get(url + "/api/version")
+                if resp.status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Ollama stub did not come up at {url}")
+
+
+def build_scenarios() -> Dict[str, Callable[[int], Awaitable[None]]]:
+    # Imported here so OLLAMA_URLS / LLM_CACHE_ENABLED set by main() are read at import time
+    from parser.resume_parser_llm import parse_resume
+    from scorer.keyword_matcher import (
+        compare_skills, extract_skills_from_jd, extract_skills_from_text, generate_recommendations,
+    )
+    from template_extractor_smart import convert_to_html_with_llm
+    from template_filler_smart import fill_template_preserving_design
+
+    resume_md = SAMPLE_RESUME.read_text(encoding="utf-8")
+
+    async def parse(i: int):
+        data = f"{resume_md}\n\nBenchmark request {i}\n".encode("utf-8")
+        await parse_resume(data, f"resume_{i}.md")
+
+    async def jd(i: int):
+        jd_text = f"{SAMPLE_JD}\nPosting {i}"
+        resume_text = f"{resume_md}\nBenchmark request {i}"
+        jd_skills, candidate_skills = await asyncio.gather(
+            extract_skills_from_jd(jd_text), extract_skills_from_text(resume_text),
+        )
+        comparison = compare_skills(candidate_skills, jd_skills)
+        await generate_recommendations(jd_text, comparison["matched"], comparison["missing"], resume_text)
+
+    async def template(i: int):
+        html = await convert_to_html_with_llm(f"{resume_md}\nBenchmark request {i}", {})
+        profile = {"sections": [{"section_name": "Name", "subsections": [{"title": "Name", "data": [f"Candidate {i}"]}]}]}
+        await fill_template_preserving_design(html, profile)
+
+    return {"parse": parse, "jd": jd, "template": template}
+
+
+async def run_scenario(name: str, fn: Callable[[int], Awaitable[None]], requests: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await fn(i)
+            except Exception as e:
+                errors += 1
+                print(f"❌ {name} request {i} failed: {e}", file=sys.stderr)
+                return
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "scenario": name,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+        "latency_p50": round(percentile(latencies, 50), 3),
+        "latency_p95": round(percentile(latencies, 95), 3),
+        "latency_p99": round(percentile(latencies, 99), 3),
+        "latency_mean": round(statistics.mean(latencies), 3) if latencies else 0.0,
+    }
+
+
+async def run(args) -> List[dict]:
+    from parser.llm_client import close_ollama_client, inflight
+
+    results = []
+    scenarios = build_scenarios()
+    for name in args.scenario:
+        # The pipelines log every step; keep the report readable
+        sink = io.StringIO() if not args.verbose else None
+        with contextlib.redirect_stdout(sink) if sink else contextlib.nullcontext():
+            result = await run_scenario(name, scenarios[name], args.requests, args.concurrency)
+        results.append(result)
+        print(json.dumps(result))
+
+    results.append({"singleflight": inflight.snapshot()})
+    print(json.dumps(results[-1]))
+    await close_ollama_client()
+
+    if args.ollama_url:
+        async with httpx.AsyncClient() as client:
+            try:
+                resp = await client.get(args.ollama_url + "/api/stub/stats")
+                if resp.status_code == 200:
+                    results.append({"stub": resp.json()})
+                    print(json.dumps(results[-1]))
+            except httpx.HTTPError:
+                pass
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the LLM pipelines")
+    parser.add_argument("--scenario", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--ollama-url", default=None, help="Ollama (or stub) to benchmark against")
+    parser.add_argument("--start-stub", action="store_true", help="Launch ollama_stub.py for the run")
+    parser.add_argument("--stub-port", type=int, default=11435)
+    parser.add_argument("--stub-args", default="", help="Extra arguments passed to ollama_stub.py")
+    parser.add_argument("--use-cache", action="store_true", help="Leave the LLM response cache on")
+    parser.add_argument("--output", default=None, help="Write the results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Show pipeline logs")
+    args = parser.parse_args()
+
+    stub = None
+    if args.start_stub:
+        args.ollama_url = args.ollama_url or f"http://127.0.0.1:{args.stub_port}"
+        stub = subprocess.Popen(
+            [sys.executable, "ollama_stub.py", "--port", str(args.stub_port), *args.stub_args.split()],
+            cwd=Path(__file__).parent,
+        )
+
+    if args.ollama_url:
+        os.environ["OLLAMA_URLS"] = args.ollama_url
+    if not args.use_cache:
+        os.environ["LLM_CACHE_ENABLED"] = "false"
+
+    try:
+        if stub is not None:
+            asyncio.run(wait_for_server(args.ollama_url))
+        results = asyncio.run(run(args))
+    finally:
+        if stub is not None:
+            stub.terminate()
+            stub.wait()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
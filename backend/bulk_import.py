@@ -0,0 +1,338 @@
+# bulk_import.py - Import a directory or zip archive of resumes into MongoDB
+"""
+Parses many resumes without going through /api/upload-resume one file at a
+time: documents are converted in the loader process pool, parsed with a
+bounded number of concurrent LLM calls, and profiles/templates are written
+with batched bulk writes.
+
+    python bulk_import.py partner_resumes.zip
+    python bulk_import.py ./resumes --llm-concurrency 8 --no-templates
+
+Every written or failed file is appended to a checkpoint file, so running
+the same command again after an interruption continues where it stopped.
+Each profile belongs to the email address found in the resume.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import traceback
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import InsertOne, UpdateMany, UpdateOne
+
+# Load .env before the parser modules read their Ollama settings
+load_dotenv()
+
+from parser.deadline import deadline_scope
+from parser.llm_client import close_ollama_client
+from parser.loader_pool import loader_pool
+from parser.resume_parser_llm import parse_resume_markdown
+from resume_parser import EMAIL_RE
+from resume_upload import clean_empty_sections, extract_template, load_upload
+from template_compiler import compiled_template_fields
+from template_index import TemplateIndex
+from upload_cache import UploadCache, content_hash
+
+MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "careerhub")
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt", ".md")
+
+
+def iter_documents(source: Path) -> Iterator[Tuple[str, bytes]]:
+    """(relative name, bytes) for every supported file in a directory or zip archive"""
+    if source.is_dir():
+        for path in sorted(source.rglob("*")):
+            if path.is_file() and path.suffix.lower() in SUPPORTED_EXTENSIONS:
+                yield str(path.relative_to(source)), path.read_bytes()
+        return
+
+    with zipfile.ZipFile(source) as archive:
+        for info in sorted(archive.infolist(), key=lambda i: i.filename):
+            name = info.filename
+            if info.is_dir() or name.startswith("__MACOSX/") or Path(name).name.startswith("."):
+                continue
+            if Path(name).suffix.lower() in SUPPORTED_EXTENSIONS:
+                yield name, archive.read(info)
+
+
+def count_documents(source: Path) -> int:
+    if source.is_dir():
+        return sum(1 for p in source.rglob("*") if p.is_file() and p.suffix.lower() in SUPPORTED_EXTENSIONS)
+    with zipfile.ZipFile(source) as archive:
+        return sum(
+            1 for i in archive.infolist()
+            if not i.is_dir() and Path(i.filename).suffix.lower() in SUPPORTED_EXTENSIONS
+            and not i.filename.startswith("__MACOSX/") and not Path(i.filename).name.startswith(".")
+        )
+
+
+def find_email(extracted_data: dict) -> Optional[str]:
+    """The resume owner's email, preferring the contact section"""
+    sections = extracted_data.get("sections", [])
+    contact = [s for s in sections if "contact" in s.get("section_name", "").lower()]
+    for section in contact + sections:
+        for subsection in section.get("subsections", []):
+            for item in subsection.get("data", []):
+                match = EMAIL_RE.search(item or "")
+                if match:
+                    return match.group(0).lower()
+    return None
+
+
+class Checkpoint:
+    """
+    Append-only JSON lines record of finished files.
+
+    A line is written only after the file's profile is in Mongo (or it
+    failed), so a crash between the two repeats the file rather than
+    losing it; the profile upsert makes the repeat harmless.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.done: Dict[str, str] = {}
+        if path.exists():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        entry = json.loads(line)
+                        self.done[entry["file"]] = entry["status"]
+        self._file = open(path, "a", encoding="utf-8")
+
+    def should_skip(self, name: str, retry_failed: bool) -> bool:
+        status = self.done.get(name)
+        return status == "imported" or (status == "failed" and not retry_failed)
+
+    def record(self, entries: List[dict]):
+        for entry in entries:
+            self._file.write(json.dumps(entry, default=str) + "\n")
+            self.done[entry["file"]] = entry["status"]
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+class BulkImporter:
+    def __init__(self, db, checkpoint: Checkpoint, args):
+        self.profiles = db.profiles
+        self.templates = db.resume_templates
+        self.users = db.users
+        self.upload_cache = UploadCache(db.upload_cache)
+        self.template_index = TemplateIndex(db.template_index)
+        self.checkpoint = checkpoint
+        self.args = args
+        self.llm_slots = asyncio.Semaphore(args.llm_concurrency)
+        self.pending: List[dict] = []
+        self.flush_lock = asyncio.Lock()
+        self.stats = {"imported": 0, "failed": 0, "skipped": 0, "cached": 0, "templates": 0}
+        self.started = time.perf_counter()
+
+    async def process(self, name: str, content: bytes) -> dict:
+        """Load and parse one file; returns the record to write"""
+        filename = Path(name).name
+        upload_hash = content_hash(content)
+        cached = await self.upload_cache.get(upload_hash)
+        if cached:
+            self.stats["cached"] += 1
+            return {"file": name, "filename": filename, "extractedData": cached["extractedData"],
+                    "html_template": None if self.args.no_templates else cached["html_template"]}
+
+        # Templates are extracted from the PDF/DOCX layout; plain text has none
+        if self.args.no_templates or Path(filename).suffix.lower() not in (".pdf", ".docx"):
+            markdown = await loader_pool.convert(content, filename)
+            loaded = None
+        else:
+            loaded = await loader_pool.run(load_upload, content, filename, label=name)
+            markdown = loaded.markdown
+
+        async with self.llm_slots:
+            with deadline_scope(self.args.doc_timeout):
+                if loaded is None:
+                    parsed, html_template, extracted = await parse_resume_markdown(markdown), None, False
+                else:
+                    parsed, template = await asyncio.gather(
+                        parse_resume_markdown(markdown), extract_template(loaded, template_index=self.template_index)
+                    )
+                    html_template, extracted = template
+
+        extracted_data = parsed.model_dump()
+        extracted_data["sections"] = clean_empty_sections(extracted_data["sections"])
+        # A fallback layout from a failed extraction is not reused for re-imports
+        if extracted:
+            await self.upload_cache.put(upload_hash, filename, extracted_data, html_template)
+        return {"file": name, "filename": filename, "extractedData": extracted_data, "html_template": html_template}
+
+    async def worker(self, queue: asyncio.Queue):
+        while True:
+            item = await queue.get()
+            if item is None:
+                queue.task_done()
+                return
+            name, content = item
+            try:
+                record = await self.process(name, content)
+                record["email"] = find_email(record["extractedData"])
+                if record["email"] is None:
+                    raise ValueError("No email address found in the resume")
+            except Exception as e:
+                print(f"❌ {name}: {e}")
+                if self.args.verbose:
+                    traceback.print_exc()
+                record = {"file": name, "error": str(e) or type(e).__name__}
+            self.pending.append(record)
+            if len(self.pending) >= self.args.batch_size:
+                await self.flush()
+            queue.task_done()
+
+    async def flush(self):
+        async with self.flush_lock:
+            batch, self.pending = self.pending, []
+            if not batch:
+                return
+            ok = [r for r in batch if "error" not in r]
+            now = datetime.utcnow()
+
+            profile_ops, template_ops, user_ops = [], [], []
+            for record in ok:
+                email = record["email"]
+                profile_ops.append(UpdateOne(
+                    {"email": email},
+                    {
+                        "$set": {
+                            "email": email,
+                            "resumeData": record["extractedData"],
+                            "updatedAt": now,
+                            "importedFrom": record["file"],
+                        },
+                        "$setOnInsert": {"selectedRoles": [], "createdAt": now},
+                    },
+                    upsert=True,
+                ))
+                user_ops.append(UpdateOne({"email": email}, {"$set": {"profile_completed": True}}))
+                if record["html_template"]:
+                    # Same shape as save_default_template: the new template becomes the default
+                    template_ops.append(UpdateMany({"user_email": email}, {"$set": {"is_default": False}}))
+                    template_ops.append(InsertOne({
+                        "user_email": email,
+                        "filename": record["filename"],
+                        "html_template": record["html_template"],
+                        **await asyncio.to_thread(compiled_template_fields, record["html_template"]),
+                        "created_at": now,
+                        "is_default": True,
+                    }))
+
+            if profile_ops:
+                await self.profiles.bulk_write(profile_ops, ordered=False)
+                await self.users.bulk_write(user_ops, ordered=False)
+            if template_ops:
+                # Ordered, so each user's reset runs before their insert
+                await self.templates.bulk_write(template_ops, ordered=True)
+
+            self.checkpoint.record(
+                [{"file": r["file"], "status": "imported", "email": r["email"], "at": now} for r in ok]
+                + [{"file": r["file"], "status": "failed", "error": r["error"], "at": now} for r in batch if "error" in r]
+            )
+            self.stats["imported"] += len(ok)
+            self.stats["failed"] += len(batch) - len(ok)
+            self.stats["templates"] += sum(1 for r in ok if r["html_template"])
+            self.report()
+
+    def report(self, total: Optional[int] = None):
+        elapsed = time.perf_counter() - self.started
+        done = self.stats["imported"] + self.stats["failed"]
+        rate = done / elapsed if elapsed else 0.0
+        of = f"/{total}" if total else ""
+        print(f"📊 {done}{of} processed ({self.stats['imported']} imported, {self.stats['failed']} failed, "
+              f"{self.stats['cached']} from cache) in {elapsed:.1f}s: {rate:.2f} docs/sec")
+
+    async def run(self, source: Path) -> dict:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.args.concurrency * 2)
+        workers = [asyncio.create_task(self.worker(queue)) for _ in range(self.args.concurrency)]
+
+        # Reading the archive is cheap next to parsing; the bounded queue
+        # keeps only a few documents in memory at a time
+        for name, content in iter_documents(source):
+            if self.checkpoint.should_skip(name, self.args.retry_failed):
+                self.stats["skipped"] += 1
+                continue
+            await queue.put((name, content))
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+        await self.flush()
+
+        elapsed = time.perf_counter() - self.started
+        processed = self.stats["imported"] + self.stats["failed"]
+        return {
+            **self.stats,
+            "seconds": round(elapsed, 2),
+            "docs_per_second": round(processed / elapsed, 3) if elapsed else 0.0,
+            "loader": loader_pool.snapshot(),
+            "template_index": self.template_index.snapshot(),
+        }
+
+
+async def run_import(args) -> dict:
+    source = Path(args.source)
+    if not source.exists():
+        raise SystemExit(f"❌ {source} does not exist")
+    if not source.is_dir() and not zipfile.is_zipfile(source):
+        raise SystemExit(f"❌ {source} is neither a directory nor a zip archive")
+    checkpoint_path = Path(args.checkpoint or f"{source.name}.import-checkpoint.jsonl")
+
+    client = AsyncIOMotorClient(MONGODB_URL)
+    db = client[args.database or DATABASE_NAME]
+    checkpoint = Checkpoint(checkpoint_path)
+    total = count_documents(source)
+    print(f"📦 Importing {total} resume(s) from {source} "
+          f"({len(checkpoint.done)} already in checkpoint {checkpoint_path})")
+
+    await loader_pool.start()
+    importer = BulkImporter(db, checkpoint, args)
+    try:
+        summary = await importer.run(source)
+    finally:
+        checkpoint.close()
+        await loader_pool.stop()
+        await close_ollama_client()
+        client.close()
+
+    importer.report(total)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import resumes from a directory or zip archive")
+    parser.add_argument("source", help="Directory or .zip archive of PDF/DOCX/TXT/MD resumes")
+    parser.add_argument("--concurrency", type=int, default=8, help="Documents in progress at once")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="Documents in their LLM stages at once")
+    parser.add_argument("--batch-size", type=int, default=50, help="Profiles per Mongo bulk write")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: <source>.import-checkpoint.jsonl)")
+    parser.add_argument("--retry-failed", action="store_true", help="Retry files the checkpoint records as failed")
+    parser.add_argument("--no-templates", action="store_true", help="Only parse profiles, skip HTML template extraction")
+    parser.add_argument("--doc-timeout", type=float, default=None, help="Seconds allowed for one document's LLM stages")
+    parser.add_argument("--database", default=None, help="Database name (default: DATABASE_NAME)")
+    parser.add_argument("--output", default=None, help="Write the summary as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Print tracebacks for failed files")
+    args = parser.parse_args()
+
+    summary = asyncio.run(run_import(args))
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -67,12 +67,9 @@ async def fix_resumes():
             
             # Import template filler
             try:
-                from template_filler_smart import fill_template_preserving_design
+                from template_filler_smart import fill_template
                 
-                filled_html = fill_template_preserving_design(
-                    template['html_template'],
-                    profile['resumeData']
-                )
+                filled_html = await fill_template(template, profile['resumeData'])
                 
                 if not filled_html or len(filled_html) < 100:
                     raise Exception("Generated HTML is too short")
@@ -1,7 +1,7 @@
 # main.py - UPDATED VERSION with empty array filtering
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, status, Form
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, status, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, HTMLResponse, Response
+from fastapi.responses import JSONResponse, HTMLResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel, EmailStr, validator
 from typing import Optional, List, Dict, Any
@@ -9,6 +9,7 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+import asyncio
 import os
 import traceback
 import json
@@ -19,12 +20,26 @@ import PyPDF2
 import hashlib
 import re
 import io
-# Import resume parser with explicit output path
-from parser.resume_parser_llm import main as parse_resume_llm
-from scorer.keyword_matcher import extract_skills_from_jd, extract_skills_from_text, compare_skills, generate_recommendations
 
+# Load .env before the parser modules read their Ollama settings
 load_dotenv()
 
+# Import resume parser with explicit output path
+from resume_upload import clean_empty_sections, extract_and_parse, extract_template, load_upload_async, report_stage
+from upload_cache import UploadCache, content_hash
+from upload_jobs import UploadJobQueue, UploadQueueFull, job_to_public, TERMINAL_STATUSES
+from parser.llm_client import close_ollama_client, get_ollama_client, inflight as llm_inflight
+from parser.llm_router import router as llm_router
+from parser.llm_residency import model_residency
+from parser.deadline import DeadlineExceeded, deadline_scope, with_deadline
+from parser.llm_metrics import render_metrics, render_samples
+from parser.loader_pool import loader_pool
+from template_cache import template_cache
+from template_index import TemplateIndex
+from template_compiler import COMPILED_TEMPLATE_VERSION, compiled_template_fields
+from parser.llm_cache import llm_cache
+from scorer.keyword_matcher import extract_skills_from_jd, extract_skills_from_text, compare_skills, generate_recommendations
+
 app = FastAPI(title="CareerHub API")
 
 # CORS Configuration
@@ -50,6 +65,9 @@ users_collection = db.users
 profiles_collection = db.profiles
 templates_collection = db.resume_templates
 resumes_collection = db.generated_resumes
+upload_jobs_collection = db.upload_jobs
+upload_cache_collection = db.upload_cache
+template_index_collection = db.template_index
 
 # Security
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
@@ -67,6 +85,12 @@ OUTPUT_DIR = "output"
 for directory in [UPLOAD_DIR, TEMP_DIR, OUTPUT_DIR]:
     os.makedirs(directory, exist_ok=True)
 
+# Time budgets (seconds) for LLM-backed requests; outstanding generations are
+# cancelled when they run out
+UPLOAD_DEADLINE_SECONDS = float(os.getenv("UPLOAD_DEADLINE_SECONDS", "600"))
+RESUME_FILL_DEADLINE_SECONDS = float(os.getenv("RESUME_FILL_DEADLINE_SECONDS", "600"))
+JD_MATCH_DEADLINE_SECONDS = float(os.getenv("JD_MATCH_DEADLINE_SECONDS", "300"))
+
 # Pydantic Models
 class UserRegister(BaseModel):
     username: str
@@ -170,29 +194,6 @@ def make_links_clickable(text: str) -> str:
     
     return re.sub(url_pattern, replace_url, text)
 
-def clean_empty_sections(sections: list) -> list:
-    """Remove sections and subsections with empty data arrays"""
-    cleaned_sections = []
-    
-    for section in sections:
-        subsections = section.get('subsections', [])
-        
-        # Filter out subsections with empty data
-        cleaned_subsections = []
-        for subsection in subsections:
-            data = subsection.get('data', [])
-            # Only keep subsections with non-empty data
-            if data and len(data) > 0 and any(item.strip() for item in data if item):
-                cleaned_subsections.append(subsection)
-        
-        # Only add section if it has valid subsections
-        if cleaned_subsections:
-            section_copy = section.copy()
-            section_copy['subsections'] = cleaned_subsections
-            cleaned_sections.append(section_copy)
-    
-    return cleaned_sections
-
 def extract_text_from_pdf(file_content: bytes) -> str:
     """Extract text from PDF file"""
     try:
@@ -283,6 +284,8 @@ async def startup_db_client():
         except Exception as e:
             print(f"⚠️ Resume ID index warning: {e}")
         
+        await upload_cache.ensure_indexes()
+        
         print("✅ Database indexes created")
         
         await migrate_existing_resumes()
@@ -290,10 +293,26 @@ async def startup_db_client():
     except Exception as e:
         print(f"❌ MongoDB connection failed: {e}")
         traceback.print_exc()
+    
+    llm_router.start_health_checks(get_ollama_client)
+    print(f"✅ LLM router started with {len(llm_router.backends)} Ollama backend(s)")
+    
+    # Load the model and prime the static prompt prefixes before the first upload
+    model_residency.start()
+    
+    # Spawn the document conversion workers now rather than on the first upload
+    await loader_pool.start()
+    
+    await upload_jobs.start()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await upload_jobs.stop()
+    await loader_pool.stop()
     client.close()
+    await model_residency.stop()
+    await llm_router.stop_health_checks()
+    await close_ollama_client()
 
 @app.get("/")
 async def root():
@@ -307,6 +326,72 @@ async def health_check():
     except Exception as e:
         return {"status": "unhealthy", "database": "disconnected", "error": str(e)}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus-style metrics: LLM latency/tokens per call site, cache and backend state"""
+    cache_stats = llm_cache.snapshot()
+    inflight_stats = llm_inflight.snapshot()
+    backends = llm_router.snapshot()
+    
+    extra = []
+    extra += render_samples("llm_cache_lookups_total", "LLM response cache lookups by result", "counter", [
+        ({"result": "memory_hit"}, cache_stats["memory_hits"]),
+        ({"result": "disk_hit"}, cache_stats["disk_hits"]),
+        ({"result": "miss"}, cache_stats["misses"]),
+    ])
+    extra += render_samples("llm_singleflight_calls_total", "LLM calls that started a generation vs joined a running one", "counter", [
+        ({"role": "leader"}, inflight_stats["leaders"]),
+        ({"role": "coalesced"}, inflight_stats["coalesced"]),
+    ])
+    extra += render_samples("llm_backend_in_flight", "Generations currently running per Ollama backend", "gauge", [
+        ({"backend": b["url"]}, b["in_flight"]) for b in backends
+    ])
+    extra += render_samples("llm_backend_available", "1 if the Ollama backend is in rotation", "gauge", [
+        ({"backend": b["url"]}, int(b["available"])) for b in backends
+    ])
+    upload_cache_stats = upload_cache.snapshot()
+    extra += render_samples("upload_cache_lookups_total", "Uploads answered from a stored parse of the same file", "counter", [
+        ({"result": "hit"}, upload_cache_stats["hits"]),
+        ({"result": "miss"}, upload_cache_stats["misses"]),
+    ])
+    job_stats = upload_jobs.snapshot()
+    extra += render_samples("upload_jobs_queued", "Resume upload jobs waiting for a worker", "gauge", [
+        ({}, job_stats["queued"]),
+    ])
+    extra += render_samples("upload_jobs_total", "Resume upload jobs by outcome", "counter", [
+        ({"outcome": outcome}, job_stats[outcome]) for outcome in ("created", "succeeded", "failed", "rejected")
+    ])
+    loader_stats = loader_pool.snapshot()
+    extra += render_samples("document_conversions_total", "Resume documents converted by the loader pool, by outcome", "counter", [
+        ({"outcome": "converted"}, loader_stats["converted"]),
+        ({"outcome": "failed"}, loader_stats["failed"]),
+        ({"outcome": "timeout"}, loader_stats["timeouts"]),
+    ])
+    extra += render_samples("document_conversion_seconds_total", "Time spent converting resume documents", "counter", [
+        ({}, loader_stats["seconds"]),
+    ])
+    template_index_stats = template_index.snapshot()
+    extra += render_samples("template_index_lookups_total", "Uploads whose layout matched an indexed template, skipping LLM extraction", "counter", [
+        ({"result": "hit"}, template_index_stats["hits"]),
+        ({"result": "miss"}, template_index_stats["misses"]),
+    ])
+    template_cache_stats = template_cache.snapshot()
+    extra += render_samples("template_cache_lookups_total", "Template renders that reused a cached parsed template", "counter", [
+        ({"result": "hit"}, template_cache_stats["hits"]),
+        ({"result": "miss"}, template_cache_stats["misses"]),
+    ])
+    extra += render_samples("template_cache_evictions_total", "Cached templates evicted to stay under TEMPLATE_CACHE_MAX_BYTES", "counter", [
+        ({}, template_cache_stats["evictions"]),
+    ])
+    extra += render_samples("template_cache_bytes", "Approximate memory held by cached templates", "gauge", [
+        ({}, template_cache_stats["bytes"]),
+    ])
+    
+    return PlainTextResponse(
+        render_metrics(extra),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
 # Auth Endpoints (keeping existing code)
 @app.post("/api/auth/register", response_model=Token)
 async def register(user_data: UserRegister):
@@ -445,15 +530,120 @@ async def auth0_login(auth_data: Auth0LoginRequest):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+async def run_until_disconnected(request: Request, work, poll_interval: float = 1.0):
+    """
+    Await `work` while watching the client connection. If the client goes
+    away first, the work is cancelled (which also cancels its outstanding
+    Ollama generations) and a 499 is raised.
+    """
+    import asyncio
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                print("🔌 Client disconnected, cancelling outstanding work")
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        if not task.done():
+            task.cancel()
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def save_default_template(user_email: str, filename: str, html_template: str) -> str:
+    """Store an extracted HTML template as the user's default and return its ID"""
+    # Compiling parses the whole document; keep it off the event loop
+    compiled = await asyncio.to_thread(compiled_template_fields, html_template)
+    template_doc = {
+        "user_email": user_email,
+        "filename": filename,
+        "html_template": html_template,
+        **compiled,
+        "created_at": datetime.utcnow(),
+        "is_default": True
+    }
+    
+    await templates_collection.update_many(
+        {"user_email": user_email},
+        {"$set": {"is_default": False}}
+    )
+    
+    template_result = await templates_collection.insert_one(template_doc)
+    template_id = str(template_result.inserted_id)
+    print(f"✅ Template saved to database with ID: {template_id}")
+    return template_id
+
+upload_cache = UploadCache(upload_cache_collection)
+template_index = TemplateIndex(template_index_collection)
+
+async def process_resume_upload(content: bytes, filename: str, user_email: str, on_stage=None) -> dict:
+    """
+    The whole upload pipeline: extract, parse and template (concurrently),
+    then save. Shared by /api/upload-resume and the background upload jobs.
+    
+    A byte-identical file uploaded before is answered from upload_cache
+    without calling the LLM.
+    """
+    upload_hash = content_hash(content)
+    cached = await upload_cache.get(upload_hash)
+    
+    if cached:
+        print(f"♻️ Reusing parse of identical upload {upload_hash[:12]}")
+        for stage in ("extract", "parse", "template"):
+            await report_stage(on_stage, stage, "done")
+        extracted_data = cached["extractedData"]
+        original_html_template = cached["html_template"]
+        template_extracted = False  # already stored
+    else:
+        parsed_resume, template = await extract_and_parse(content, filename, on_stage, template_index)
+        original_html_template = template.html
+        template_extracted = template.extracted
+        extracted_data = parsed_resume.model_dump()
+        
+        # Clean empty sections before saving
+        extracted_data['sections'] = clean_empty_sections(extracted_data['sections'])
+    
+    await report_stage(on_stage, "save", "running")
+    
+    # Only complete results are reused, so a failed template extraction
+    # (answered with the basic fallback layout) is retried next time
+    if template_extracted:
+        await upload_cache.put(upload_hash, filename, extracted_data, original_html_template)
+    
+    template_id = None
+    if original_html_template:
+        template_id = await save_default_template(user_email, filename, original_html_template)
+    await report_stage(on_stage, "save", "done")
+    
+    print(f"✅ Resume parsed successfully with {len(extracted_data['sections'])} sections")
+    
+    return {
+        "message": "Resume parsed successfully",
+        "extractedData": extracted_data,
+        "templateId": template_id
+    }
+
+async def process_upload_job(job: dict, on_stage) -> dict:
+    return await process_resume_upload(bytes(job["content"]), job["filename"], job["user_email"], on_stage)
+
+upload_jobs = UploadJobQueue(
+    upload_jobs_collection,
+    process_upload_job,
+    deadline_seconds=UPLOAD_DEADLINE_SECONDS,
+)
+
 # Resume Upload
 @app.post("/api/upload-resume")
 async def upload_resume(
+    request: Request,
     file: UploadFile = File(...),
     userId: str = Form(...)
 ):
-    temp_path = None
-    parsed_json_path = None
-    
     try:
         print(f"📤 Resume upload started for user: {userId}")
         print(f"📄 File: {file.filename}, Content-Type: {file.content_type}")
@@ -464,116 +654,207 @@ async def upload_resume(
         if not file.filename.lower().endswith(('.pdf', '.docx', '.doc')):
             raise HTTPException(status_code=400, detail="Only PDF and DOCX files are allowed")
         
-        safe_email = userId.replace('@', '_at_').replace('.', '_')
-        safe_filename = file.filename.replace(' ', '_')
-        temp_path = os.path.join(TEMP_DIR, f"{safe_email}_{safe_filename}")
-        parsed_json_path = os.path.join(TEMP_DIR, f"{safe_email}_parsed.json")
-        
-        print(f"💾 Saving to: {temp_path}")
-        print(f"📝 Output will be saved to: {parsed_json_path}")
-        
-        os.makedirs(TEMP_DIR, exist_ok=True)
-        
-        with open(temp_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        file_size = os.path.getsize(temp_path)
-        print(f"📊 File size: {file_size / 1024:.2f} KB")
-        print(f"✅ File saved successfully at: {temp_path}")
-        
-        print(f"🎨 Extracting HTML template from uploaded resume...")
-        original_html_template = None
+        # The upload stays in memory; both stages read the same bytes
+        content = await file.read()
+        print(f"📊 File size: {len(content) / 1024:.2f} KB")
         
+        # Template extraction and parsing share one read of the upload and
+        # run concurrently
         try:
-            from template_extractor_smart import extract_html_from_resume
             import time
             start_time = time.time()
-            original_html_template = extract_html_from_resume(temp_path)
-            end_time = time.time()
-            print(f"⏱️ HTML Extraction completed in {end_time - start_time:.2f} seconds")
-            print(f"✅ Original HTML template extracted ({len(original_html_template)} chars)")
-        except Exception as template_error:
-            print(f"⚠️ Template extraction failed: {template_error}")
-            traceback.print_exc()
-        
-        print(f"🤖 Starting LLM parsing with output path: {parsed_json_path}")
-        
-        try:
-            import time
-            start_time = time.time()
-            output_file = parse_resume_llm(temp_path, parsed_json_path)
-            end_time = time.time()
-            print(f"⏱️ LLM parsing completed in {end_time - start_time:.2f} seconds")
-            print(f"✅ LLM parsing completed, output: {output_file}")
+            with deadline_scope(UPLOAD_DEADLINE_SECONDS):
+                response = await run_until_disconnected(
+                    request, process_resume_upload(content, file.filename, userId)
+                )
+            print(f"⏱️ Upload processing completed in {time.time() - start_time:.2f} seconds")
+            return response
+        except HTTPException:
+            raise
+        except DeadlineExceeded as deadline_error:
+            print(f"⏰ Resume upload ran out of time: {deadline_error}")
+            raise HTTPException(status_code=504, detail="Resume parsing timed out, please try again")
         except Exception as parse_error:
             print(f"❌ LLM parsing failed: {parse_error}")
             traceback.print_exc()
             raise HTTPException(status_code=500, detail=f"Resume parsing failed: {str(parse_error)}")
         
-        if not os.path.exists(parsed_json_path):
-            print(f"❌ Output file not found at: {parsed_json_path}")
-            print(f"📂 Temp directory contents: {os.listdir(TEMP_DIR)}")
-            raise HTTPException(status_code=500, detail=f"Parsing output file not found: {parsed_json_path}")
-        
-        print(f"✅ Found output file: {parsed_json_path}")
-        
-        with open(parsed_json_path, 'r', encoding='utf-8') as f:
-            extracted_data = json.load(f)
-        
-        if 'sections' not in extracted_data or not isinstance(extracted_data['sections'], list):
-            raise HTTPException(status_code=500, detail="Invalid parsing result structure")
-        
-        # Clean empty sections before saving
-        extracted_data['sections'] = clean_empty_sections(extracted_data['sections'])
-        
-        template_id = None
-        if original_html_template:
-            template_doc = {
-                "user_email": userId,
-                "filename": file.filename,
-                "html_template": original_html_template,
-                "created_at": datetime.utcnow(),
-                "is_default": True
-            }
-            
-            await templates_collection.update_many(
-                {"user_email": userId},
-                {"$set": {"is_default": False}}
-            )
-            
-            template_result = await templates_collection.insert_one(template_doc)
-            template_id = str(template_result.inserted_id)
-            print(f"✅ Template saved to database with ID: {template_id}")
-        
-        print(f"✅ Resume parsed successfully with {len(extracted_data['sections'])} sections")
-        
-        return {
-            "message": "Resume parsed successfully",
-            "extractedData": extracted_data,
-            "templateId": template_id
-        }
-        
     except HTTPException:
         raise
     except Exception as e:
         print(f"❌ Resume upload error: {e}")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
-    finally:
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.remove(temp_path)
-                print(f"🗑️ Cleaned up temp file: {temp_path}")
-            except Exception as e:
-                print(f"⚠️ Failed to clean up temp file: {e}")
-        
-        if parsed_json_path and os.path.exists(parsed_json_path):
-            try:
-                os.remove(parsed_json_path)
-                print(f"🗑️ Cleaned up parsed JSON: {parsed_json_path}")
-            except Exception as e:
-                print(f"⚠️ Failed to clean up JSON file: {e}")
+
+@app.post("/api/upload-resume/stream")
+async def upload_resume_stream(
+    file: UploadFile = File(...),
+    userId: str = Form(...)
+):
+    """
+    Streaming variant of /api/upload-resume.
+    
+    Responds with Server-Sent Events: one `section` event per parsed resume
+    section as soon as the LLM finishes it, then a `done` event carrying the
+    same payload /api/upload-resume returns, or an `error` event.
+    """
+    if not userId or '@' not in userId:
+        raise HTTPException(status_code=400, detail="Valid user email is required")
+    
+    if not file.filename.lower().endswith(('.pdf', '.docx', '.doc')):
+        raise HTTPException(status_code=400, detail="Only PDF and DOCX files are allowed")
+    
+    content = await file.read()
+    
+    print(f"📤 Streaming resume upload started for user: {userId} ({file.filename})")
+    
+    async def event_stream():
+        import asyncio
+        from parser.resume_parser_llm import stream_sections_markdown
+        
+        # Template extraction does not feed the streamed sections, so run it
+        # alongside the parse and only wait for it at the end. If the client
+        # disconnects, Starlette cancels this generator and the finally block
+        # below cancels the extraction too.
+        template_task = None
+        try:
+            upload_hash = content_hash(content)
+            cached = await upload_cache.get(upload_hash)
+            if cached:
+                print(f"♻️ Reusing parse of identical upload {upload_hash[:12]}")
+                for section_data in cached["extractedData"]["sections"]:
+                    yield sse_event("section", section_data)
+                template_id = await save_default_template(userId, file.filename, cached["html_template"])
+                yield sse_event("done", {
+                    "message": "Resume parsed successfully",
+                    "extractedData": cached["extractedData"],
+                    "templateId": template_id
+                })
+                return
+            
+            sections = []
+            with deadline_scope(UPLOAD_DEADLINE_SECONDS):
+                loaded = await load_upload_async(content, file.filename)
+                template_task = asyncio.create_task(extract_template(loaded, template_index=template_index))
+                async for section in stream_sections_markdown(loaded.markdown):
+                    section_data = section.model_dump()
+                    sections.append(section_data)
+                    yield sse_event("section", section_data)
+            
+            extracted_data = {"sections": clean_empty_sections(sections)}
+            
+            template_id = None
+            template = await template_task
+            # A fallback layout from a failed extraction is not reused for re-uploads
+            if template.extracted:
+                await upload_cache.put(upload_hash, file.filename, extracted_data, template.html)
+            if template.html:
+                template_id = await save_default_template(userId, file.filename, template.html)
+            
+            print(f"✅ Resume streamed successfully with {len(extracted_data['sections'])} sections")
+            yield sse_event("done", {
+                "message": "Resume parsed successfully",
+                "extractedData": extracted_data,
+                "templateId": template_id
+            })
+        
+        except Exception as e:
+            print(f"❌ Streaming resume upload error: {e}")
+            traceback.print_exc()
+            yield sse_event("error", {"detail": f"Resume parsing failed: {str(e)}"})
+        
+        finally:
+            if template_task is not None and not template_task.done():
+                template_task.cancel()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Background Upload Jobs
+@app.post("/api/upload-jobs", status_code=202)
+async def create_upload_job(
+    file: UploadFile = File(...),
+    userId: str = Form(...)
+):
+    """
+    Queue a resume upload and return immediately.
+    
+    Follow the job with GET /api/upload-jobs/{job_id} or the SSE stream at
+    /api/upload-jobs/{job_id}/events; the finished job's `result` is the
+    payload /api/upload-resume returns.
+    """
+    if not userId or '@' not in userId:
+        raise HTTPException(status_code=400, detail="Valid user email is required")
+    
+    if not file.filename.lower().endswith(('.pdf', '.docx', '.doc')):
+        raise HTTPException(status_code=400, detail="Only PDF and DOCX files are allowed")
+    
+    content = await file.read()
+    try:
+        job = await upload_jobs.submit(userId, file.filename, content)
+    except UploadQueueFull as e:
+        print(f"⚠️ Upload queue full: {e}")
+        raise HTTPException(status_code=503, detail="Too many uploads in progress, please try again shortly")
+    
+    return {
+        "jobId": job["_id"],
+        "status": job["status"],
+        "statusUrl": f"/api/upload-jobs/{job['_id']}",
+        "eventsUrl": f"/api/upload-jobs/{job['_id']}/events"
+    }
+
+@app.get("/api/upload-jobs/{job_id}")
+async def get_upload_job(job_id: str):
+    job = await upload_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Upload job not found")
+    return job_to_public(job)
+
+@app.get("/api/upload-jobs/{job_id}/events")
+async def upload_job_events(job_id: str, request: Request):
+    """
+    Server-Sent Events for one upload job: a `status` event whenever the job
+    changes, then `done` (with the result) or `error` once it finishes.
+    """
+    job = await upload_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Upload job not found")
+    
+    async def event_stream():
+        last_seen = None
+        current = job
+        while True:
+            if current is None:
+                yield sse_event("error", {"detail": "Upload job not found"})
+                return
+            
+            public = job_to_public(current)
+            if current.get("updated_at") != last_seen:
+                last_seen = current.get("updated_at")
+                yield sse_event("status", {k: v for k, v in public.items() if k != "result"})
+            
+            if current.get("status") in TERMINAL_STATUSES:
+                if current["status"] == "succeeded":
+                    yield sse_event("done", public["result"])
+                else:
+                    yield sse_event("error", {"detail": public["error"]})
+                return
+            
+            if await request.is_disconnected():
+                return
+            # Woken immediately by updates from this process; the timeout
+            # covers jobs run by another worker process
+            await upload_jobs.wait_for_update(job_id, timeout=1.0)
+            current = await upload_jobs.get(job_id)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.post("/api/debug/regenerate-resume/{email}")
 async def debug_regenerate_resume(email: str):
@@ -648,6 +929,46 @@ async def debug_check_resume(email: str):
         print(f"❌ DEBUG: Check failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/debug/llm-cache")
+async def debug_llm_cache():
+    """Debug endpoint to inspect LLM response cache hit/miss counters"""
+    return llm_cache.snapshot()
+
+@app.delete("/api/debug/llm-cache")
+async def debug_clear_llm_cache():
+    """Debug endpoint to drop all cached LLM responses"""
+    import asyncio
+    await asyncio.to_thread(llm_cache.clear)
+    print("🗑️ LLM response cache cleared")
+    return {"status": "cleared"}
+
+@app.get("/api/debug/upload-cache")
+async def debug_upload_cache():
+    """Debug endpoint to inspect reuse of parses for identical uploads"""
+    return upload_cache.snapshot()
+
+@app.delete("/api/debug/upload-cache")
+async def debug_clear_upload_cache():
+    """Debug endpoint to drop all stored upload parses"""
+    deleted = await upload_cache.clear()
+    print(f"🗑️ Upload cache cleared ({deleted} entries)")
+    return {"status": "cleared", "deleted": deleted}
+
+@app.get("/api/debug/llm-inflight")
+async def debug_llm_inflight():
+    """Debug endpoint to inspect how many identical LLM calls were coalesced"""
+    return llm_inflight.snapshot()
+
+@app.get("/api/debug/llm-backends")
+async def debug_llm_backends():
+    """Debug endpoint to inspect Ollama backend health and load"""
+    return {"backends": llm_router.snapshot()}
+
+@app.get("/api/debug/upload-jobs")
+async def debug_upload_jobs():
+    """Debug endpoint to inspect the upload job queue"""
+    return upload_jobs.snapshot()
+
 # Profile Management
 @app.post("/api/save-user-profile")
 async def save_user_profile(request: SaveProfileRequest):
@@ -723,12 +1044,16 @@ async def generate_user_resume(email: str):
             print(f"⚠️ No template found for: {email}")
             return None
         
-        from template_filler_smart import fill_template_preserving_design
+        from template_filler_smart import fill_template
         
-        filled_html = fill_template_preserving_design(
-            template['html_template'],
-            profile_data
-        )
+        # Templates saved before compilation existed are compiled once here
+        if template.get('compiled_version') != COMPILED_TEMPLATE_VERSION and template.get('html_template'):
+            compiled = await asyncio.to_thread(compiled_template_fields, template['html_template'])
+            await templates_collection.update_one({"_id": template['_id']}, {"$set": compiled})
+            template.update(compiled)
+        
+        with deadline_scope(RESUME_FILL_DEADLINE_SECONDS):
+            filled_html = await fill_template(template, profile_data)
         
         if not filled_html or len(filled_html) < 100:
             print(f"⚠️ Generated HTML is too short or empty")
@@ -1506,6 +1831,7 @@ async def regenerate_resume(email: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/process-jd")
+@with_deadline(JD_MATCH_DEADLINE_SECONDS)
 async def process_jd(
     email: str = Form(...),
     jd_text: Optional[str] = Form(None),
@@ -1555,7 +1881,7 @@ async def process_jd(
         
         # Extract skills from JD using LLM
         print("🤖 Extracting skills from JD using LLM...")
-        jd_skills = extract_skills_from_jd(final_jd_text)
+        jd_skills = await extract_skills_from_jd(final_jd_text)
         
         if not jd_skills:
             raise HTTPException(
@@ -1571,7 +1897,7 @@ async def process_jd(
         resume_full_text = " ".join(resume_text_parts)
         
         print("🤖 Extracting skills from resume using LLM...")
-        candidate_skills = extract_skills_from_text(resume_full_text)
+        candidate_skills = await extract_skills_from_text(resume_full_text)
         
         if not candidate_skills:
             # Fallback: use simple extraction if LLM fails
@@ -1586,7 +1912,7 @@ async def process_jd(
         
         # Generate recommendations using LLM
         print("💡 Generating recommendations...")
-        recommendations = generate_recommendations(
+        recommendations = await generate_recommendations(
             jd_text=final_jd_text,
             matched_skills=comparison_result['matched'],
             missing_skills=comparison_result['missing'],
@@ -1619,6 +1945,7 @@ async def process_jd(
         )
 
 @app.post("/api/match-jd-text")
+@with_deadline(JD_MATCH_DEADLINE_SECONDS)
 async def match_jd_text(request: JDMatchRequest):
     """Match JD text with user's resume"""
     try:
@@ -1633,20 +1960,20 @@ async def match_jd_text(request: JDMatchRequest):
             )
         
         # Extract skills from JD
-        jd_skills = extract_skills_from_jd(request.jd_text)
+        jd_skills = await extract_skills_from_jd(request.jd_text)
         
         # Extract skills from resume
         resume_data = profile.get('resumeData', {})
         resume_text_parts = extract_skills_from_resume_data(resume_data)
         resume_full_text = " ".join(resume_text_parts)
         
-        candidate_skills = extract_skills_from_text(resume_full_text)
+        candidate_skills = await extract_skills_from_text(resume_full_text)
         
         # Compare
         comparison_result = compare_skills(candidate_skills, jd_skills)
         
         # Generate recommendations
-        recommendations = generate_recommendations(
+        recommendations = await generate_recommendations(
             jd_text=request.jd_text,
             matched_skills=comparison_result['matched'],
             missing_skills=comparison_result['missing'],
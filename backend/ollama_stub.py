@@ -0,0 +1,355 @@
+# ollama_stub.py - Deterministic stand-in for Ollama, for benchmarks and CI
+"""
+Speaks enough of the Ollama HTTP API (/api/generate, /api/tags, /api/version)
+for the backend to run without a model.
+
+Every prompt is matched to the call site that built it (resume_parse,
+jd_skills, resume_skills, recommendations, template_extraction,
+template_fill, template_fill_patch). The response is the recorded fixture for that exact prompt
+if one exists, otherwise a canned response that passes the caller's
+validation. Timing follows a simple model: a fixed latency plus prompt and
+completion tokens at configurable rates, with at most --parallel
+generations running at once like OLLAMA_NUM_PARALLEL, so queueing under
+load behaves like a real server.
+
+Run:
+    python ollama_stub.py --port 11435
+    OLLAMA_URLS=http://localhost:11435 python bench_pipeline.py
+
+Record real responses once (then replay them with no Ollama around):
+    python ollama_stub.py --record-from http://localhost:11434
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# The prompt builders register their static prefixes with model_residency;
+# importing them gives the stub the exact text to recognise each call site by
+from parser.llm_residency import model_residency
+import parser.resume_parser_llm  # noqa: F401  registers resume_parse
+import scorer.keyword_matcher  # noqa: F401  registers jd_skills, resume_skills, recommendations
+import template_filler_smart  # noqa: F401  registers template_fill_patch
+
+# The template prompts interpolate content early, so match on their opening sentence
+PROMPT_MARKERS = {
+    "template_extraction": "You are an expert at converting resume content to HTML",
+    "template_fill": "You are an expert at filling HTML resume templates",
+}
+
+DEFAULT_FIXTURES_DIR = os.getenv("OLLAMA_STUB_FIXTURES", "bench/fixtures")
+NS_PER_SECOND = 1_000_000_000
+CHARS_PER_TOKEN = 4
+
+CANNED_RESPONSES: Dict[str, Any] = {
+    "resume_parse": {
+        "sections": [
+            {"section_name": "Name", "subsections": [{"title": "Name", "data": ["Jordan Lee"]}]},
+            {"section_name": "Contact Information", "subsections": [
+                {"title": "Contact Information", "data": ["jordan.lee@example.com", "+1 555 0100", "Austin, TX"]},
+            ]},
+            {"section_name": "Links", "subsections": [
+                {"title": "Links", "data": ["https://github.com/jordanlee", "https://linkedin.com/in/jordanlee"]},
+            ]},
+            {"section_name": "Experience", "subsections": [
+                {"title": "Senior Backend Engineer - Acme Corp (Jan 2021 - Present)", "data": [
+                    "Built FastAPI services handling 2M requests per day",
+                    "Cut p95 latency by 40% by moving hot paths to async IO",
+                ]},
+                {"title": "Software Engineer - Globex (Jun 2018 - Dec 2020)", "data": [
+                    "Maintained PostgreSQL and MongoDB data pipelines",
+                ]},
+            ]},
+            {"section_name": "Education", "subsections": [
+                {"title": "BSc Computer Science - State University (2014 - 2018)", "data": []},
+            ]},
+            {"section_name": "Skills", "subsections": [
+                {"title": "Skills", "data": ["Python", "FastAPI", "PostgreSQL", "MongoDB", "Docker", "AWS"]},
+            ]},
+        ]
+    },
+    "jd_skills": {"skills": ["Python", "Go", "AWS", "PostgreSQL", "FastAPI", "Docker", "Kubernetes", "CI/CD"]},
+    "resume_skills": {"skills": ["Python", "FastAPI", "PostgreSQL", "MongoDB", "Docker", "AWS", "Git"]},
+    "recommendations": {
+        "missing_keywords": ["Go", "Kubernetes", "CI/CD"],
+        "matching_strengths": ["Python and FastAPI experience matches the backend stack"],
+        "suggested_actions": ["Add a Kubernetes project", "Quantify API throughput work"],
+    },
+    "template_extraction": """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><style>
+body { font-family: Georgia, serif; margin: 0.75in; color: #222; }
+.resume-header h1 { font-size: 24pt; margin: 0; }
+.resume-section h2 { font-size: 13pt; border-bottom: 1px solid #444; margin-top: 14pt; }
+</style></head>
+<body><div class="resume-container">
+<div class="resume-header"><h1>{{NAME}}</h1><p>{{EMAIL}} | {{PHONE}}</p></div>
+<div class="resume-section"><h2>Experience</h2><p>Senior Backend Engineer</p></div>
+<div class="resume-section"><h2>Skills</h2><p>Python, FastAPI</p></div>
+</div></body></html>""",
+}
+
+HTML_DOC_RE = re.compile(r"(<!DOCTYPE html>.*?</html>)", re.IGNORECASE | re.DOTALL)
+# One listed element of a template_fill_patch prompt: "t3 <li>: Built the API"
+FILL_ELEMENT_RE = re.compile(r"^(t\d+) <(\w+)>: ?(.*)$", re.MULTILINE)
+
+
+def prompt_key(prompt: str, fmt: Any) -> str:
+    raw = json.dumps({"prompt": prompt, "format": fmt}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def detect_call_site(prompt: str) -> str:
+    for name, prefix in model_residency.prefixes.items():
+        if prefix and prompt.startswith(prefix):
+            return name
+    for name, marker in PROMPT_MARKERS.items():
+        if marker in prompt[:500]:
+            return name
+    return "unknown"
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def synthesize_from_schema(schema: dict, root: Optional[dict] = None) -> Any:
+    """Smallest value that satisfies a Pydantic JSON schema (for unknown call sites)"""
+    root = root or schema
+    if "$ref" in schema:
+        name = schema["$ref"].split("/")[-1]
+        return synthesize_from_schema(root.get("$defs", {}).get(name, {}), root)
+    schema_type = schema.get("type")
+    if schema_type == "object":
+        return {key: synthesize_from_schema(value, root) for key, value in schema.get("properties", {}).items()}
+    if schema_type == "array":
+        return [synthesize_from_schema(schema.get("items", {}), root)]
+    if schema_type in ("integer", "number"):
+        return 0
+    if schema_type == "boolean":
+        return False
+    return "stub"
+
+
+class StubOllama:
+    def __init__(
+        self,
+        fixtures_dir: str = DEFAULT_FIXTURES_DIR,
+        latency_ms: float = 50,
+        prompt_tokens_per_sec: float = 2000,
+        tokens_per_sec: float = 60,
+        parallel: int = 4,
+        record_from: Optional[str] = None,
+        model: str = "llama3.2",
+    ):
+        self.fixtures_dir = Path(fixtures_dir)
+        self.latency = latency_ms / 1000
+        self.prompt_tokens_per_sec = prompt_tokens_per_sec
+        self.tokens_per_sec = tokens_per_sec
+        self.parallel = parallel
+        self.record_from = record_from.rstrip("/") if record_from else None
+        self.model = model
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.stats = {"requests": 0, "fixture_hits": 0, "canned": 0, "recorded": 0, "queue_wait_seconds": 0.0}
+        self.by_call_site: Dict[str, int] = {}
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.parallel)
+        return self._slots
+
+    def _fixture_path(self, key: str) -> Path:
+        return self.fixtures_dir / f"{key}.json"
+
+    def _load_fixture(self, key: str) -> Optional[dict]:
+        path = self._fixture_path(key)
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    async def _record(self, key: str, call_site: str, payload: dict) -> dict:
+        body = dict(payload, stream=False)
+        async with httpx.AsyncClient(timeout=600) as client:
+            resp = await client.post(self.record_from + "/api/generate", json=body)
+        resp.raise_for_status()
+        data = resp.json()
+        fixture = {
+            "call_site": call_site,
+            "response": data.get("response", ""),
+            "prompt_eval_count": data.get("prompt_eval_count"),
+            "eval_count": data.get("eval_count"),
+        }
+        self.fixtures_dir.mkdir(parents=True, exist_ok=True)
+        with open(self._fixture_path(key), "w", encoding="utf-8") as f:
+            json.dump(fixture, f, indent=2, ensure_ascii=False)
+        self.stats["recorded"] += 1
+        return fixture
+
+    def _canned(self, call_site: str, payload: dict) -> str:
+        prompt = payload.get("prompt", "")
+        if call_site == "template_fill":
+            # Hand the template back unchanged, which is a valid (if unfilled) answer
+            match = HTML_DOC_RE.search(prompt)
+            return match.group(1) if match else CANNED_RESPONSES["template_extraction"]
+        if call_site == "template_fill_patch":
+            # Every listed element keeps its text, list items as one-line lists
+            listing = prompt.split("NEW PROFILE DATA:", 1)[0]
+            return json.dumps({
+                fill_id: [text] if tag == "li" else text
+                for fill_id, tag, text in FILL_ELEMENT_RE.findall(listing)
+            })
+        canned = CANNED_RESPONSES.get(call_site)
+        if canned is None and isinstance(payload.get("format"), dict):
+            canned = synthesize_from_schema(payload["format"])
+        if canned is None:
+            canned = "stub response"
+        return canned if isinstance(canned, str) else json.dumps(canned)
+
+    async def resolve(self, payload: dict) -> Tuple[str, dict]:
+        prompt = payload.get("prompt", "")
+        call_site = detect_call_site(prompt)
+        key = prompt_key(prompt, payload.get("format"))
+
+        fixture = self._load_fixture(key)
+        if fixture is not None:
+            self.stats["fixture_hits"] += 1
+        elif self.record_from:
+            fixture = await self._record(key, call_site, payload)
+        else:
+            self.stats["canned"] += 1
+            fixture = {"call_site": call_site, "response": self._canned(call_site, payload)}
+
+        num_predict = payload.get("options", {}).get("num_predict")
+        response = fixture["response"]
+        if num_predict is not None and num_predict >= 0:
+            # Warmup calls ask for 0 or 1 tokens
+            response = response[: num_predict * CHARS_PER_TOKEN]
+        if not prompt:
+            response = ""
+        return call_site, {
+            "response": response,
+            "prompt_eval_count": fixture.get("prompt_eval_count") or (estimate_tokens(prompt) if prompt else 0),
+            "eval_count": estimate_tokens(response) if response else 0,
+        }
+
+    def timings(self, counts: dict) -> Tuple[float, float]:
+        prompt_seconds = self.latency + counts["prompt_eval_count"] / self.prompt_tokens_per_sec
+        eval_seconds = counts["eval_count"] / self.tokens_per_sec
+        return prompt_seconds, eval_seconds
+
+    def final_chunk(self, counts: dict, queued: float, prompt_seconds: float, eval_seconds: float) -> dict:
+        return {
+            "model": self.model,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int((queued + prompt_seconds + eval_seconds) * NS_PER_SECOND),
+            "load_duration": 0,
+            "prompt_eval_count": counts["prompt_eval_count"],
+            "prompt_eval_duration": int(prompt_seconds * NS_PER_SECOND),
+            "eval_count": counts["eval_count"],
+            "eval_duration": int(eval_seconds * NS_PER_SECOND),
+        }
+
+    def snapshot(self) -> dict:
+        stats = dict(self.stats)
+        stats["queue_wait_seconds"] = round(stats["queue_wait_seconds"], 3)
+        stats["by_call_site"] = dict(self.by_call_site)
+        return stats
+
+
+def create_app(stub: StubOllama) -> FastAPI:
+    app = FastAPI(title="Ollama stub")
+
+    @app.get("/api/version")
+    async def version():
+        return {"version": "0.0.0-stub"}
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": f"{stub.model}:latest", "model": f"{stub.model}:latest", "size": 0}]}
+
+    @app.get("/api/stub/stats")
+    async def stats():
+        return stub.snapshot()
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        payload = await request.json()
+        stub.stats["requests"] += 1
+        call_site, counts = await stub.resolve(payload)
+        stub.by_call_site[call_site] = stub.by_call_site.get(call_site, 0) + 1
+        prompt_seconds, eval_seconds = stub.timings(counts)
+
+        if not payload.get("stream", True):
+            queued_at = time.perf_counter()
+            async with stub.slots:
+                queued = time.perf_counter() - queued_at
+                stub.stats["queue_wait_seconds"] += queued
+                await asyncio.sleep(prompt_seconds + eval_seconds)
+            body = stub.final_chunk(counts, queued, prompt_seconds, eval_seconds)
+            body["response"] = counts["response"]
+            return JSONResponse(body)
+
+        async def chunks():
+            queued_at = time.perf_counter()
+            async with stub.slots:
+                queued = time.perf_counter() - queued_at
+                stub.stats["queue_wait_seconds"] += queued
+                await asyncio.sleep(prompt_seconds)
+                text = counts["response"]
+                # Emit a few tokens per chunk to keep timer overhead low
+                step = CHARS_PER_TOKEN * 4
+                pieces = [text[i:i + step] for i in range(0, len(text), step)]
+                per_piece = eval_seconds / len(pieces) if pieces else 0
+                for piece in pieces:
+                    await asyncio.sleep(per_piece)
+                    yield json.dumps({"model": stub.model, "response": piece, "done": False}) + "\n"
+            final = stub.final_chunk(counts, queued, prompt_seconds, eval_seconds)
+            final["response"] = ""
+            yield json.dumps(final) + "\n"
+
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic Ollama stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR, help="Directory of recorded responses")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Fixed cost per generation")
+    parser.add_argument("--prompt-tokens-per-sec", type=float, default=2000)
+    parser.add_argument("--tokens-per-sec", type=float, default=60, help="Completion token rate")
+    parser.add_argument("--parallel", type=int, default=4, help="Generations served at once (OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--record-from", default=None, help="Real Ollama URL to record unseen prompts from")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    stub = StubOllama(
+        fixtures_dir=args.fixtures,
+        latency_ms=args.latency_ms,
+        prompt_tokens_per_sec=args.prompt_tokens_per_sec,
+        tokens_per_sec=args.tokens_per_sec,
+        parallel=args.parallel,
+        record_from=args.record_from,
+    )
+    print(f"🧪 Ollama stub on http://{args.host}:{args.port} (fixtures: {args.fixtures})")
+    uvicorn.run(create_app(stub), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import os
+import re
+from typing import List
+
+from parser.schemas import ResumeJSON, Section, SubSection
+
+# Resumes longer than this (after compaction) are parsed section by section
+PARSE_CHUNK_THRESHOLD_CHARS = int(os.getenv("PARSE_CHUNK_THRESHOLD_CHARS", "6000"))
+# Chunks smaller than this are merged into their neighbour; a prompt per
+# two-line section costs more than it saves
+PARSE_CHUNK_MIN_CHARS = int(os.getenv("PARSE_CHUNK_MIN_CHARS", "600"))
+PARSE_MAX_CHUNKS = int(os.getenv("PARSE_MAX_CHUNKS", "8"))
+
+HEADING_RE = re.compile(r"^\s{0,3}(?:#{1,6}\s+\S|\*\*[^*\n]{2,60}\*\*\s*:?\s*$)")
+
+
+def _is_section_heading(line: str) -> bool:
+    if not HEADING_RE.match(line):
+        return False
+    # A bold line only counts as a heading when it reads like one ("EXPERIENCE",
+    # "Work History"), not like an emphasised job title with dates
+    if line.lstrip().startswith("**"):
+        text = line.strip().strip("*:").strip()
+        return not re.search(r"\d", text) and len(text.split()) <= 4
+    return True
+
+
+def split_markdown_sections(md_text: str) -> List[str]:
+    """Split resume Markdown at section headings; the text before the first heading is its own chunk"""
+    chunks, current = [], []
+    for line in md_text.split("\n"):
+        if _is_section_heading(line) and any(l.strip() for l in current):
+            chunks.append("\n".join(current).strip())
+            current = []
+        current.append(line)
+    if any(l.strip() for l in current):
+        chunks.append("\n".join(current).strip())
+    return chunks
+
+
+def group_chunks(chunks: List[str], min_chars: int = PARSE_CHUNK_MIN_CHARS, max_chunks: int = PARSE_MAX_CHUNKS) -> List[str]:
+    """Merge adjacent small chunks, then the smallest neighbours until at most max_chunks remain"""
+    grouped: List[str] = []
+    for chunk in chunks:
+        if grouped and (len(grouped[-1]) < min_chars or len(chunk) < min_chars):
+            grouped[-1] = f"{grouped[-1]}\n\n{chunk}"
+        else:
+            grouped.append(chunk)
+
+    while len(grouped) > max(1, max_chunks):
+        sizes = [len(grouped[i]) + len(grouped[i + 1]) for i in range(len(grouped) - 1)]
+        i = sizes.index(min(sizes))
+        grouped[i:i + 2] = [f"{grouped[i]}\n\n{grouped[i + 1]}"]
+    return grouped
+
+
+def chunk_resume_markdown(md_text: str) -> List[str]:
+    return group_chunks(split_markdown_sections(md_text))
+
+
+def merge_resume_parts(parts: List[ResumeJSON]) -> ResumeJSON:
+    """
+    Combine per-chunk parses into one ResumeJSON in document order.
+
+    Only a section split across a chunk boundary (the last section of one
+    part and the first of the next, with the same name, e.g. "Experience"
+    continuing on the next page) is joined. Everything else is kept as
+    parsed: sections that merely share a name elsewhere, subsections with
+    the same title (two roles both titled "Software Engineer") and repeated
+    items.
+    """
+    merged: List[Section] = []
+    for part in parts:
+        for i, section in enumerate(part.sections):
+            section_copy = Section(
+                section_name=section.section_name,
+                subsections=[SubSection(title=s.title, data=list(s.data)) for s in section.subsections],
+            )
+            previous = merged[-1] if merged else None
+            if (
+                i == 0
+                and previous is not None
+                and previous.section_name.strip().lower() == section.section_name.strip().lower()
+            ):
+                previous.subsections.extend(section_copy.subsections)
+            else:
+                merged.append(section_copy)
+
+    return ResumeJSON(sections=merged)
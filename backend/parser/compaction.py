@@ -0,0 +1,183 @@
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+
+PROMPT_COMPACTION_ENABLED = os.getenv("PROMPT_COMPACTION_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# pymupdf4llm separates pages with a horizontal rule
+PAGE_BREAK_RE = re.compile(r"^\s*-{3,}\s*$")
+PAGE_NUMBER_RE = re.compile(
+    r"^\s*(?:page\s*\d+(?:\s*(?:of|/)\s*\d+)?|\d+\s*(?:of|/)\s*\d+|-\s*\d{1,3}\s*-|\d{1,3})\s*$",
+    re.IGNORECASE,
+)
+LINK_RE = re.compile(r"\[([^\]\n]*)\]\(([^)\s]+)\)")
+# An empty bold run: exactly **** or ____, so longer underscore fill-in
+# lines stay
+EMPTY_EMPHASIS_RE = re.compile(r"(?<![*_\w])(\*\*|__)\1(?![*_\w])")
+INLINE_SPACES_RE = re.compile(r"(?<=\S)[ \t]{2,}")
+# Non-breaking, zero-width and other odd spaces PDF extraction leaves behind
+ODD_SPACES = {"\u00a0": " ", "\u2009": " ", "\u202f": " ", "\u200b": "", "\u200c": "", "\u200d": "", "\ufeff": ""}
+
+# Lines repeated at the top or bottom of this share of pages are running headers/footers
+REPEATED_LINE_PAGE_SHARE = 0.5
+EDGE_LINES = 2
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English prose)"""
+    return math.ceil(len(text) / 4)
+
+
+def _normalize_whitespace(text: str) -> str:
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    for odd, replacement in ODD_SPACES.items():
+        text = text.replace(odd, replacement)
+    # Keep leading indentation (it nests bullets) but collapse runs inside a line
+    lines = [INLINE_SPACES_RE.sub(" ", line.rstrip()) for line in text.split("\n")]
+    return "\n".join(lines)
+
+
+def _split_pages(text: str) -> List[List[str]]:
+    pages, current = [], []
+    for line in text.split("\n"):
+        if PAGE_BREAK_RE.match(line):
+            pages.append(current)
+            current = []
+        else:
+            current.append(line)
+    pages.append(current)
+    return [page for page in pages if any(line.strip() for line in page)]
+
+
+def _edge_indexes(page: List[str]) -> Set[int]:
+    """Positions of the first and last EDGE_LINES non-blank lines of a page"""
+    content = [i for i, line in enumerate(page) if line.strip()]
+    return set(content[:EDGE_LINES] + content[-EDGE_LINES:])
+
+
+def _edge_lines(page: List[str]) -> List[str]:
+    return [page[i].strip() for i in sorted(_edge_indexes(page))]
+
+
+def _drop_repeated_edges(pages: List[List[str]]) -> Tuple[List[List[str]], int]:
+    """Keep the first occurrence of a running header/footer, drop the copies on later pages"""
+    if len(pages) < 2:
+        return pages, 0
+
+    seen_on = Counter()
+    for page in pages:
+        seen_on.update(set(_edge_lines(page)))
+    threshold = max(2, math.ceil(len(pages) * REPEATED_LINE_PAGE_SHARE))
+    repeated = {line for line, count in seen_on.items() if count >= threshold}
+    if not repeated:
+        return pages, 0
+
+    kept_once = set()
+    dropped = 0
+    result = []
+    for page in pages:
+        edges = _edge_indexes(page)
+        new_page = []
+        for i, line in enumerate(page):
+            key = line.strip()
+            if key in repeated and i in edges:
+                if key in kept_once:
+                    dropped += 1
+                    continue
+                kept_once.add(key)
+            new_page.append(line)
+        result.append(new_page)
+    return result, dropped
+
+
+def _same_target(label: str, target: str) -> bool:
+    def bare(value: str) -> str:
+        value = re.sub(r"^(?:https?://|mailto:|tel:)", "", value.strip(), flags=re.IGNORECASE)
+        return re.sub(r"^www\.", "", value, flags=re.IGNORECASE).rstrip("/").lower()
+
+    return bare(label) == bare(target)
+
+
+def _compact_links(text: str) -> Tuple[str, int]:
+    """[url](url) and [me@x.com](mailto:me@x.com) carry the same value twice; keep one"""
+    count = 0
+
+    def replace(match: re.Match) -> str:
+        nonlocal count
+        label, target = match.group(1).strip(), match.group(2)
+        if not label:
+            count += 1
+            return target
+        if _same_target(label, target):
+            count += 1
+            # The label keeps mailto:/tel: out, the target keeps the scheme of a web link
+            return target if re.match(r"https?://", target, re.IGNORECASE) else label
+        return match.group(0)
+
+    return LINK_RE.sub(replace, text), count
+
+
+def compact_markdown(md_text: str) -> Tuple[str, Dict[str, int]]:
+    """
+    Shrink extracted resume Markdown before it goes into a prompt.
+
+    Only layout noise is removed (odd whitespace, page breaks and numbers,
+    running headers/footers, duplicated link text, empty emphasis); every
+    word of resume content is kept. Returns the compacted text and a report
+    of what was removed and the estimated token savings.
+    """
+    original = md_text
+    text = _normalize_whitespace(md_text)
+
+    pages, repeated_lines = _drop_repeated_edges(_split_pages(text))
+    page_numbers = 0
+    lines = []
+    for page in pages:
+        # Only at the top or bottom of a page; a bare number elsewhere is content
+        edges = _edge_indexes(page)
+        for i, line in enumerate(page):
+            if i in edges and PAGE_NUMBER_RE.match(line):
+                page_numbers += 1
+                continue
+            lines.append(line)
+    text = "\n".join(lines)
+
+    text, links = _compact_links(text)
+    text, empty_emphasis = EMPTY_EMPHASIS_RE.subn("", text)
+    text = "\n".join(line.rstrip() for line in text.split("\n"))
+
+    # One blank line is enough to separate blocks
+    text = re.sub(r"\n[ \t]*\n(?:[ \t]*\n)+", "\n\n", text).strip()
+
+    tokens_before = estimate_tokens(original)
+    tokens_after = estimate_tokens(text)
+    report = {
+        "chars_before": len(original),
+        "chars_after": len(text),
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after,
+        "pages": len(pages),
+        "page_numbers_removed": page_numbers,
+        "repeated_lines_removed": repeated_lines,
+        "links_compacted": links,
+        "empty_emphasis_removed": empty_emphasis,
+    }
+    return text, report
+
+
+def prepare_resume_markdown(md_text: str) -> Tuple[str, Dict[str, int]]:
+    """Compact resume Markdown unless PROMPT_COMPACTION_ENABLED is off"""
+    if not PROMPT_COMPACTION_ENABLED:
+        tokens = estimate_tokens(md_text)
+        return md_text, {"chars_before": len(md_text), "chars_after": len(md_text),
+                         "tokens_before": tokens, "tokens_after": tokens, "tokens_saved": 0}
+
+    text, report = compact_markdown(md_text)
+    saved_pct = 100 * report["tokens_saved"] / report["tokens_before"] if report["tokens_before"] else 0
+    print(f"🗜️ Compacted resume Markdown: ~{report['tokens_before']} → ~{report['tokens_after']} tokens "
+          f"({saved_pct:.1f}% saved, {report['repeated_lines_removed']} repeated lines, "
+          f"{report['page_numbers_removed']} page numbers, {report['links_compacted']} links)")
+    return text, report
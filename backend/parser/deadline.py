@@ -0,0 +1,63 @@
+import contextvars
+import functools
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's time budget runs out before its work finished"""
+
+
+_deadline: contextvars.ContextVar = contextvars.ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]):
+    """
+    Give everything under this block at most `seconds` to finish.
+
+    The deadline lives in a context variable, so it follows the work into
+    awaited coroutines, tasks and asyncio.to_thread calls without being passed
+    around. Nested scopes can only tighten the budget, never extend it.
+    """
+    if seconds is None or seconds <= 0:
+        yield
+        return
+
+    expires_at = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        expires_at = min(expires_at, current)
+
+    token = _deadline.set(expires_at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def with_deadline(seconds: Optional[float]):
+    """Decorator form of deadline_scope for async functions (e.g. route handlers)"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with deadline_scope(seconds):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left in the current deadline, or None if there is none"""
+    expires_at = _deadline.get()
+    if expires_at is None:
+        return None
+    return expires_at - time.monotonic()
+
+
+def check_deadline(stage: str):
+    """Fail fast between pipeline stages instead of starting work that cannot finish"""
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded before {stage}")
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "cache/llm")
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256"))
+LLM_CACHE_DISK_MAX_BYTES = int(os.getenv("LLM_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+
+def make_cache_key(model: str, prompt: str, schema: Optional[Dict[str, Any]], options: Dict[str, Any]) -> str:
+    """Content-address a generation request: same inputs -> same key"""
+    material = json.dumps(
+        {"model": model, "prompt": prompt, "format": schema, "options": options},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Two-tier cache for deterministic (temperature 0) LLM responses.
+
+    The memory tier is a small LRU; the disk tier stores one JSON file per key
+    and is pruned by TTL and total size. Disk reads and writes are blocking,
+    so async callers should run get/set in a worker thread.
+    """
+
+    def __init__(
+        self,
+        directory: str = LLM_CACHE_DIR,
+        memory_entries: int = LLM_CACHE_MEMORY_ENTRIES,
+        disk_max_bytes: int = LLM_CACHE_DISK_MAX_BYTES,
+        ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+    ):
+        self.directory = Path(directory)
+        self.memory_entries = memory_entries
+        self.disk_max_bytes = disk_max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes: Optional[int] = None
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+        }
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, value: str, created_at: float):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[1]):
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return entry[0]
+                del self._memory[key]
+
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+
+        if self._expired(record.get("created_at", 0)):
+            self._remove_file(path)
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+
+        with self._lock:
+            self._remember(key, record["response"], record["created_at"])
+            self.stats["disk_hits"] += 1
+        return record["response"]
+
+    def set(self, key: str, value: str):
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, value, created_at)
+            self.stats["writes"] += 1
+
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"created_at": created_at, "response": value}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ LLM cache write failed: {e}")
+            return
+
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += path.stat().st_size
+            over_budget = self._disk_bytes is None or self._disk_bytes > self.disk_max_bytes
+        if over_budget:
+            self.prune()
+
+    def _remove_file(self, path: Path) -> int:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+            return size
+        except OSError:
+            return 0
+
+    def prune(self):
+        """Drop expired disk entries, then the oldest ones until under the size budget"""
+        if not self.directory.exists():
+            with self._lock:
+                self._disk_bytes = 0
+            return
+
+        entries = []
+        total = 0
+        evicted = 0
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if self._expired(stat.st_mtime):
+                self._remove_file(path)
+                evicted += 1
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.disk_max_bytes:
+                break
+            total -= self._remove_file(path)
+            evicted += 1
+
+        with self._lock:
+            self._disk_bytes = total
+            self.stats["evictions"] += evicted
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.directory.exists():
+            for path in self.directory.glob("*/*.json"):
+                self._remove_file(path)
+        with self._lock:
+            self._disk_bytes = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_bytes"] = self._disk_bytes
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        return stats
+
+
+llm_cache = LLMCache()
@@ -1,15 +1,74 @@
-import requests
-from typing import Type, Optional
+import asyncio
+import functools
+import json
+import os
+import time
+import httpx
+from typing import AsyncIterator, Type, Optional
 from pydantic import BaseModel
+from parser.llm_cache import LLM_CACHE_ENABLED, llm_cache, make_cache_key
+from parser.singleflight import SingleFlight
+from parser.llm_router import router
+from parser.llm_metrics import record_call, record_generation
+from parser.deadline import DeadlineExceeded, remaining_time
 
-def call_ollama(prompt: str, format_model: Optional[Type[BaseModel]] = None) -> str:
-    model = "llama3.2"
-    url = "http://localhost:11434/api/generate" #TODO: Change according to EC2 setup
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2")
+# Upper bound for a single generation; request deadlines can only shorten it
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "600"))
+# Per backend; the router spreads load over every URL in OLLAMA_URLS
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))
+OLLAMA_MAX_KEEPALIVE = int(os.getenv("OLLAMA_MAX_KEEPALIVE", "8"))
+# How long Ollama keeps the model loaded after each request (Ollama duration string)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
 
+# Shared across the process so every call reuses pooled keep-alive connections
+_client: Optional[httpx.AsyncClient] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+# Identical generations already in flight are shared instead of duplicated
+inflight = SingleFlight()
+
+
+def get_ollama_client() -> httpx.AsyncClient:
+    """Return the shared async HTTP client, creating it on first use"""
+    global _client
+
+    if _client is None or _client.is_closed:
+        backend_count = len(router.backends)
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(OLLAMA_TIMEOUT, connect=10.0),
+            limits=httpx.Limits(
+                # Leave room for health checks next to the generations
+                max_connections=(OLLAMA_MAX_CONCURRENCY + 1) * backend_count,
+                max_keepalive_connections=OLLAMA_MAX_KEEPALIVE * backend_count,
+            ),
+        )
+    return _client
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(OLLAMA_MAX_CONCURRENCY * len(router.backends))
+    return _semaphore
+
+
+async def close_ollama_client():
+    """Close the shared client (call on application shutdown)"""
+    global _client
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def build_payload(prompt: str, format_model: Optional[Type[BaseModel]] = None, stream: bool = False) -> dict:
     payload = {
-        "model": model,
+        "model": OLLAMA_MODEL,
         "prompt": prompt,
-        "stream": False,
+        "stream": stream,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
         "options": {
             "temperature": 0
         },
@@ -17,7 +76,154 @@ def call_ollama(prompt: str, format_model: Optional[Type[BaseModel]] = None) ->
 
     if format_model:
         payload["format"] = format_model.model_json_schema()
+    return payload
+
+
+def _call_timeout(call_site: str) -> float:
+    remaining = remaining_time()
+    if remaining is None:
+        return OLLAMA_TIMEOUT
+    if remaining <= 0:
+        raise DeadlineExceeded(f"No time left for LLM call '{call_site}'")
+    return min(remaining, OLLAMA_TIMEOUT)
 
-    resp = requests.post(url, json=payload, timeout=50000)
+
+async def call_ollama(
+    prompt: str,
+    format_model: Optional[Type[BaseModel]] = None,
+    use_cache: bool = True,
+    call_site: str = "unknown",
+) -> str:
+    """
+    Run one non-streaming generation and return the response text.
+
+    call_site names the pipeline stage making the call (e.g. "resume_parse")
+    and labels the latency/token metrics served on /metrics.
+    """
+    started = time.perf_counter()
+    payload = build_payload(prompt, format_model)
+    request_key = make_cache_key(OLLAMA_MODEL, prompt, payload.get("format"), payload["options"])
+    # A caller opting out of the cache wants its own generation, so it is
+    # not handed another caller's in-flight result either
+    coalesce = use_cache
+    use_cache = use_cache and LLM_CACHE_ENABLED
+
+    # Generations are deterministic (temperature 0), so identical requests
+    # can be answered from the cache without touching the model
+    if use_cache:
+        cached = await asyncio.to_thread(llm_cache.get, request_key)
+        if cached is not None:
+            record_call(call_site, "cache", "ok", time.perf_counter() - started)
+            return cached
+
+    generate = functools.partial(_generate, payload, request_key if use_cache else None, call_site)
+    source = "coalesced" if coalesce and inflight.is_inflight(request_key) else "model"
+    try:
+        # Waiting stops at the caller's deadline; if no other caller still
+        # wants the result, the cancellation closes the connection and Ollama
+        # abandons the generation
+        response = await asyncio.wait_for(
+            inflight.do(request_key, generate) if coalesce else generate(),
+            timeout=_call_timeout(call_site),
+        )
+    except asyncio.TimeoutError:
+        record_call(call_site, source, "deadline", time.perf_counter() - started)
+        raise DeadlineExceeded(f"LLM call '{call_site}' exceeded its deadline")
+    except asyncio.CancelledError:
+        record_call(call_site, source, "cancelled", time.perf_counter() - started)
+        raise
+    except Exception:
+        record_call(call_site, source, "error", time.perf_counter() - started)
+        raise
+
+    record_call(call_site, source, "ok", time.perf_counter() - started)
+    return response
+
+
+async def _generate(payload: dict, cache_key: Optional[str], call_site: str) -> str:
+    # Bound the number of generations in flight; extra callers wait here
+    # instead of piling more work onto the Ollama server
+    async with _get_semaphore():
+        resp = await router.post(get_ollama_client(), "/api/generate", json=payload)
     resp.raise_for_status()
-    return resp.json()["response"]
\ No newline at end of file
+    body = resp.json()
+    record_generation(call_site, body)
+    response = body["response"]
+
+    if cache_key is not None:
+        await asyncio.to_thread(llm_cache.set, cache_key, response)
+    return response
+
+
+async def stream_ollama(
+    prompt: str,
+    format_model: Optional[Type[BaseModel]] = None,
+    use_cache: bool = True,
+    call_site: str = "unknown",
+) -> AsyncIterator[str]:
+    """
+    Streaming variant of call_ollama: yields response text chunks as Ollama
+    produces them. A cache hit is yielded as a single chunk, and a completed
+    stream is written back to the same cache call_ollama uses.
+    """
+    started = time.perf_counter()
+    payload = build_payload(prompt, format_model, stream=True)
+
+    cache_key = None
+    if use_cache and LLM_CACHE_ENABLED:
+        cache_key = make_cache_key(OLLAMA_MODEL, prompt, payload.get("format"), payload["options"])
+        cached = await asyncio.to_thread(llm_cache.get, cache_key)
+        if cached is not None:
+            record_call(call_site, "cache", "ok", time.perf_counter() - started)
+            yield cached
+            return
+
+    parts = []
+    done = False
+    expires_at = time.monotonic() + _call_timeout(call_site)
+    try:
+        async with _get_semaphore():
+            async with router.stream(get_ollama_client(), "/api/generate", json=payload) as resp:
+                resp.raise_for_status()
+                lines = resp.aiter_lines()
+                while True:
+                    # Bound each read, not just the gaps between lines, so a
+                    # backend that stalls mid-generation is dropped at the
+                    # deadline; leaving the block closes the connection,
+                    # which stops the generation
+                    try:
+                        async with asyncio.timeout(max(expires_at - time.monotonic(), 0)):
+                            line = await anext(lines)
+                    except StopAsyncIteration:
+                        break
+                    except TimeoutError:
+                        raise DeadlineExceeded(f"LLM stream '{call_site}' exceeded its deadline")
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise RuntimeError(f"Ollama stream error: {chunk['error']}")
+                    text = chunk.get("response", "")
+                    if text:
+                        parts.append(text)
+                        yield text
+                    if chunk.get("done"):
+                        # The final chunk carries the same counters as a non-streaming reply
+                        record_generation(call_site, chunk)
+                        done = True
+                        break
+    except DeadlineExceeded:
+        record_call(call_site, "stream", "deadline", time.perf_counter() - started)
+        raise
+    except asyncio.CancelledError:
+        record_call(call_site, "stream", "cancelled", time.perf_counter() - started)
+        raise
+    except Exception:
+        record_call(call_site, "stream", "error", time.perf_counter() - started)
+        raise
+
+    record_call(call_site, "stream", "ok" if done else "incomplete", time.perf_counter() - started)
+
+    # Only complete generations are cached; an interrupted stream is not
+    if done and cache_key is not None:
+        await asyncio.to_thread(llm_cache.set, cache_key, "".join(parts))
@@ -0,0 +1,181 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Generations take seconds to minutes; token counts run into the thousands
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600]
+TOKEN_BUCKETS = [16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384]
+
+NS_PER_SECOND = 1_000_000_000
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus text format"""
+
+    def __init__(self, name: str, help_text: str, buckets: List[float]):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = sorted(buckets)
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # one count per bucket, then +Inf count and sum
+                series = [0] * (len(self.buckets) + 1) + [0.0]
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, ('le', repr(float(bound))))} {count}")
+                count = series[len(self.buckets)]
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series[-1]}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+def render_samples(name: str, help_text: str, metric_type: str, samples: List[Tuple[Dict[str, str], float]]) -> List[str]:
+    """Render values tracked elsewhere (cache, router) as a Prometheus metric family"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(tuple(sorted(labels.items())))} {value}")
+    return lines
+
+
+llm_requests = Counter(
+    "llm_requests_total",
+    "LLM calls by call site, where the answer came from (model, cache, coalesced) and outcome",
+)
+llm_latency = Histogram(
+    "llm_request_duration_seconds",
+    "Wall-clock time of an LLM call as seen by the caller",
+    LATENCY_BUCKETS,
+)
+llm_prompt_eval = Histogram(
+    "llm_prompt_eval_duration_seconds",
+    "Ollama prompt_eval_duration per generation",
+    LATENCY_BUCKETS,
+)
+llm_eval = Histogram(
+    "llm_eval_duration_seconds",
+    "Ollama eval_duration (output generation) per generation",
+    LATENCY_BUCKETS,
+)
+llm_total = Histogram(
+    "llm_total_duration_seconds",
+    "Ollama total_duration per generation, including model load",
+    LATENCY_BUCKETS,
+)
+llm_prompt_tokens = Histogram(
+    "llm_prompt_tokens",
+    "Ollama prompt_eval_count per generation",
+    TOKEN_BUCKETS,
+)
+llm_completion_tokens = Histogram(
+    "llm_completion_tokens",
+    "Ollama eval_count per generation",
+    TOKEN_BUCKETS,
+)
+llm_compaction_saved_tokens = Histogram(
+    "llm_compaction_saved_tokens",
+    "Estimated prompt tokens removed by input compaction before a call",
+    TOKEN_BUCKETS,
+)
+resume_sections_parsed = Counter(
+    "resume_sections_parsed_total",
+    "Resume sections by how they were parsed (rules fast path or llm fallback)",
+)
+resume_reask_fragments = Counter(
+    "resume_reask_fragments_total",
+    "Invalid resume sections/subsections re-asked from the LLM, by outcome",
+)
+
+HISTOGRAMS = [
+    llm_latency, llm_prompt_eval, llm_eval, llm_total,
+    llm_prompt_tokens, llm_completion_tokens, llm_compaction_saved_tokens,
+]
+
+
+def record_generation(call_site: str, body: dict):
+    """Record the timing and token fields Ollama returns with a finished generation"""
+    if "prompt_eval_count" in body:
+        llm_prompt_tokens.observe(body["prompt_eval_count"], call_site=call_site)
+    if "eval_count" in body:
+        llm_completion_tokens.observe(body["eval_count"], call_site=call_site)
+    if "prompt_eval_duration" in body:
+        llm_prompt_eval.observe(body["prompt_eval_duration"] / NS_PER_SECOND, call_site=call_site)
+    if "eval_duration" in body:
+        llm_eval.observe(body["eval_duration"] / NS_PER_SECOND, call_site=call_site)
+    if "total_duration" in body:
+        llm_total.observe(body["total_duration"] / NS_PER_SECOND, call_site=call_site)
+
+
+def record_call(call_site: str, source: str, outcome: str, seconds: float):
+    llm_requests.inc(call_site=call_site, source=source, outcome=outcome)
+    llm_latency.observe(seconds, call_site=call_site, source=source)
+
+
+def record_compaction(call_site: str, report: dict):
+    llm_compaction_saved_tokens.observe(report.get("tokens_saved", 0), call_site=call_site)
+
+
+def record_resume_sections(path: str, count: int):
+    if count:
+        resume_sections_parsed.inc(count, path=path)
+
+
+def record_reask(outcome: str):
+    resume_reask_fragments.inc(outcome=outcome)
+
+
+def render_metrics(extra_lines: Optional[List[str]] = None) -> str:
+    lines = llm_requests.render()
+    lines.extend(resume_sections_parsed.render())
+    lines.extend(resume_reask_fragments.render())
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    if extra_lines:
+        lines.extend(extra_lines)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,109 @@
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional
+import httpx
+from parser.llm_client import OLLAMA_KEEP_ALIVE, OLLAMA_MODEL, _get_semaphore, get_ollama_client
+from parser.llm_router import OllamaBackend, router
+
+# Re-load the model on this interval so it survives idle periods; 0 disables
+OLLAMA_KEEP_WARM_INTERVAL = float(os.getenv("OLLAMA_KEEP_WARM_INTERVAL", "600"))
+OLLAMA_WARMUP_PREFIXES = os.getenv("OLLAMA_WARMUP_PREFIXES", "true").lower() in ("1", "true", "yes")
+# Match the server's OLLAMA_NUM_PARALLEL: each slot keeps the KV cache of
+# only the last prompt it evaluated, so this many prefixes can stay primed
+OLLAMA_NUM_PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", "1"))
+
+
+class ModelResidencyManager:
+    """
+    Keep the model loaded on every Ollama backend and its prompt cache primed.
+
+    Ollama reuses the KV cache for the longest prompt prefix it has already
+    evaluated, so prompt builders put their static instructions first and
+    register them here. At startup each backend loads the model and evaluates
+    the highest-priority prefixes, one per parallel slot (a slot only keeps
+    the cache of the last prompt it saw, so priming more would evict the
+    earlier ones); afterwards a keep-warm loop re-sends an empty
+    request (which only refreshes keep_alive) so the first request after an
+    idle period does not pay the model load time.
+    """
+
+    def __init__(self):
+        self.prefixes: Dict[str, str] = {}
+        self.priorities: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.last_warmup: Dict[str, float] = {}
+
+    def register_prefix(self, name: str, text: str, priority: int = 0):
+        """Register a static prompt prefix; higher priority is primed first"""
+        self.prefixes[name] = text
+        self.priorities[name] = priority
+
+    def primed_prefixes(self) -> List[str]:
+        """The prefixes worth priming: the top OLLAMA_NUM_PARALLEL by priority"""
+        ranked = sorted(self.prefixes, key=lambda name: -self.priorities[name])
+        return ranked[:max(OLLAMA_NUM_PARALLEL, 1)]
+
+    async def _generate(self, backend: OllamaBackend, prompt: str, predict: int) -> bool:
+        payload = {
+            "model": OLLAMA_MODEL,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
+            "options": {"temperature": 0, "num_predict": predict},
+        }
+        try:
+            # Warmups share the generation limit with real requests
+            async with _get_semaphore():
+                resp = await get_ollama_client().post(backend.url + "/api/generate", json=payload)
+            resp.raise_for_status()
+            return True
+        except httpx.HTTPError as e:
+            print(f"⚠️ Warmup request to {backend.url} failed: {e}")
+            return False
+
+    async def warm_backend(self, backend: OllamaBackend, prime_prefixes: bool = True):
+        started = time.perf_counter()
+
+        # An empty prompt only loads the model and resets its keep_alive timer
+        if not await self._generate(backend, "", 0):
+            return
+
+        if prime_prefixes and OLLAMA_WARMUP_PREFIXES:
+            # Sent together so each lands in its own slot
+            await asyncio.gather(*(
+                self._generate(backend, self.prefixes[name], 1) for name in self.primed_prefixes()
+            ))
+
+        self.last_warmup[backend.url] = time.time()
+        print(f"🔥 Warmed {OLLAMA_MODEL} on {backend.url} in {time.perf_counter() - started:.2f}s")
+
+    async def warmup(self):
+        await asyncio.gather(*(self.warm_backend(b) for b in router.backends))
+
+    async def _run(self):
+        await self.warmup()
+        if OLLAMA_KEEP_WARM_INTERVAL <= 0:
+            return
+        while True:
+            await asyncio.sleep(OLLAMA_KEEP_WARM_INTERVAL)
+            await asyncio.gather(*(
+                self.warm_backend(b, prime_prefixes=False) for b in router.backends if b.available
+            ))
+
+    def start(self):
+        """Warm up in the background so the API starts serving immediately"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+model_residency = ModelResidencyManager()
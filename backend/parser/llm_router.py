@@ -0,0 +1,207 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+import httpx
+
+OLLAMA_URLS = [
+    url.strip().rstrip("/")
+    for url in os.getenv("OLLAMA_URLS", os.getenv("OLLAMA_URL", "http://localhost:11434")).split(",")
+    if url.strip()
+]
+OLLAMA_HEALTH_INTERVAL = float(os.getenv("OLLAMA_HEALTH_INTERVAL", "15"))
+OLLAMA_EJECT_AFTER_FAILURES = int(os.getenv("OLLAMA_EJECT_AFTER_FAILURES", "3"))
+OLLAMA_EJECT_SECONDS = float(os.getenv("OLLAMA_EJECT_SECONDS", "30"))
+
+
+class NoBackendAvailable(Exception):
+    """Raised when every Ollama backend failed for a request"""
+
+
+class OllamaBackend:
+    """One Ollama server and the load/health state the router keeps for it"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.in_flight = 0
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.latency_ewma = 0.0
+        self.requests = 0
+        self.failures = 0
+
+    @property
+    def available(self) -> bool:
+        return self.healthy and time.monotonic() >= self.ejected_until
+
+    def record_success(self, latency: float):
+        self.consecutive_failures = 0
+        self.healthy = True
+        self.latency_ewma = latency if not self.latency_ewma else 0.8 * self.latency_ewma + 0.2 * latency
+
+    def record_failure(self):
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= OLLAMA_EJECT_AFTER_FAILURES:
+            self.eject()
+
+    def eject(self):
+        self.ejected_until = time.monotonic() + OLLAMA_EJECT_SECONDS
+        print(f"⚠️ Ejecting Ollama backend {self.url} for {OLLAMA_EJECT_SECONDS:.0f}s")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "available": self.available,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "latency_ewma": round(self.latency_ewma, 3),
+        }
+
+
+class OllamaRouter:
+    """
+    Spread generations over several Ollama servers.
+
+    Each request goes to the available backend with the fewest requests in
+    flight (ties broken by recent latency). Connection errors and 5xx
+    responses count as failures and the request is retried on another
+    backend; repeated failures eject a backend for a cooldown period, and a
+    background health check takes it out of or puts it back into rotation.
+    """
+
+    def __init__(self, urls: List[str]):
+        if not urls:
+            raise ValueError("At least one Ollama URL is required")
+        self.backends = [OllamaBackend(url) for url in urls]
+        self._health_task: Optional[asyncio.Task] = None
+
+    def pick(self, exclude: Optional[set] = None) -> Optional[OllamaBackend]:
+        exclude = exclude or set()
+        candidates = [b for b in self.backends if b.url not in exclude and b.available]
+        if not candidates:
+            # Everything is ejected or unhealthy: trying a node beats failing outright
+            candidates = [b for b in self.backends if b.url not in exclude]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda b: (b.in_flight, b.latency_ewma))
+
+    def _next_backend(self, tried: set) -> Optional[OllamaBackend]:
+        backend = self.pick(tried)
+        if backend is not None:
+            tried.add(backend.url)
+            backend.in_flight += 1
+            backend.requests += 1
+        return backend
+
+    async def post(self, client: httpx.AsyncClient, path: str, **kwargs) -> httpx.Response:
+        tried = set()
+        last_error: Optional[Exception] = None
+
+        while (backend := self._next_backend(tried)) is not None:
+            started = time.monotonic()
+            try:
+                resp = await client.post(backend.url + path, **kwargs)
+                if resp.status_code >= 500:
+                    raise httpx.HTTPStatusError(
+                        f"Ollama backend returned {resp.status_code}", request=resp.request, response=resp
+                    )
+                backend.record_success(time.monotonic() - started)
+                return resp
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                print(f"⚠️ Ollama backend {backend.url} failed: {e}")
+                backend.record_failure()
+                last_error = e
+            finally:
+                backend.in_flight -= 1
+
+        raise NoBackendAvailable(f"All Ollama backends failed: {last_error}")
+
+    @asynccontextmanager
+    async def stream(self, client: httpx.AsyncClient, path: str, **kwargs):
+        """
+        Open a streaming request on the best backend. Failover only happens
+        before the response starts; once bytes are flowing the stream belongs
+        to that backend and errors propagate to the caller.
+        """
+        tried = set()
+        last_error: Optional[Exception] = None
+
+        while (backend := self._next_backend(tried)) is not None:
+            started = time.monotonic()
+            streaming = False
+            try:
+                async with client.stream("POST", backend.url + path, **kwargs) as resp:
+                    if resp.status_code >= 500:
+                        await resp.aread()
+                        raise httpx.HTTPStatusError(
+                            f"Ollama backend returned {resp.status_code}", request=resp.request, response=resp
+                        )
+                    streaming = True
+                    yield resp
+                backend.record_success(time.monotonic() - started)
+                return
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                if isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500:
+                    # The caller's raise_for_status on a 4xx: the request was
+                    # bad (unknown model, bad format schema), the backend is
+                    # fine, so this counts the same as it does in post()
+                    backend.record_success(time.monotonic() - started)
+                    raise
+                print(f"⚠️ Ollama backend {backend.url} failed: {e}")
+                backend.record_failure()
+                if streaming:
+                    raise
+                last_error = e
+            finally:
+                backend.in_flight -= 1
+
+        raise NoBackendAvailable(f"All Ollama backends failed: {last_error}")
+
+    async def check_health(self, client: httpx.AsyncClient):
+        async def probe(backend: OllamaBackend):
+            try:
+                resp = await client.get(backend.url + "/api/tags", timeout=5.0)
+                ok = resp.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+
+            if ok and not backend.healthy:
+                print(f"✅ Ollama backend {backend.url} is healthy again")
+            elif not ok and backend.healthy:
+                print(f"⚠️ Ollama backend {backend.url} failed health check")
+            backend.healthy = ok
+
+        await asyncio.gather(*(probe(b) for b in self.backends))
+
+    async def _health_loop(self, client_factory, interval: float):
+        while True:
+            try:
+                await self.check_health(client_factory())
+            except Exception as e:
+                print(f"⚠️ Ollama health check error: {e}")
+            await asyncio.sleep(interval)
+
+    def start_health_checks(self, client_factory, interval: float = OLLAMA_HEALTH_INTERVAL):
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._health_loop(client_factory, interval))
+
+    async def stop_health_checks(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [b.snapshot() for b in self.backends]
+
+
+router = OllamaRouter(OLLAMA_URLS)
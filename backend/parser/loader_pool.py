@@ -0,0 +1,263 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from parser.loaders import load_resume
+
+# Worker processes for document conversion; 0 converts in a thread of the
+# API process instead (the old behaviour)
+LOADER_POOL_WORKERS = int(os.getenv("LOADER_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+# PDFs longer than this are cut to their first pages; no resume needs more
+LOADER_MAX_PAGES = int(os.getenv("LOADER_MAX_PAGES", "10"))
+LOADER_TIMEOUT_SECONDS = float(os.getenv("LOADER_TIMEOUT_SECONDS", "30"))
+
+
+class LoaderTimeout(Exception):
+    """Raised when a document takes longer than LOADER_TIMEOUT_SECONDS to convert"""
+
+
+class LoadResult:
+    """Outcome of converting one document in a batch"""
+
+    def __init__(self, filename: str, markdown: Optional[str] = None, seconds: float = 0.0, error: Optional[str] = None):
+        self.filename = filename
+        self.markdown = markdown
+        self.seconds = seconds
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _init_worker():
+    # Pay the import cost once per worker rather than on its first document
+    import mammoth  # noqa: F401
+    import pymupdf4llm  # noqa: F401
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _timed(fn: Callable, args: tuple) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def convert_document(content: bytes, filename: str, max_pages: Optional[int] = LOADER_MAX_PAGES) -> str:
+    """Resume bytes to Markdown; runs inside a pool worker"""
+    return load_resume(content, filename, max_pages=max_pages)
+
+
+class LoaderPool:
+    """
+    Warm process pool for pymupdf4llm / mammoth conversions.
+
+    Converting a PDF is pure CPU work that holds the GIL, so running it in
+    a thread of the API process stalls every other request. Conversions run
+    in LOADER_POOL_WORKERS spawned processes instead (started and warmed at
+    startup). Each worker is its own single-process executor and takes one
+    conversion at a time, so a conversion only starts once a worker is
+    free and its LOADER_TIMEOUT_SECONDS count from there, not from when it
+    was queued. A conversion that overruns cannot be interrupted in place,
+    so that worker alone is killed and replaced; the others keep running.
+    """
+
+    def __init__(self, workers: int = LOADER_POOL_WORKERS, timeout: float = LOADER_TIMEOUT_SECONDS):
+        self.workers = workers
+        self.timeout = timeout
+        # Idle workers; None is a slot whose process is not started yet
+        self._idle: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._executors: Set[ProcessPoolExecutor] = set()
+        self.stats = {"converted": 0, "failed": 0, "timeouts": 0, "restarts": 0, "seconds": 0.0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def _slots(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._idle is None or self._loop is not loop:
+            # First use, or a new event loop (bulk_import and tests run their own)
+            self._shutdown_all()
+            self._loop = loop
+            self._idle = asyncio.Queue()
+            for _ in range(self.workers):
+                self._idle.put_nowait(None)
+        return self._idle
+
+    async def _spawn(self) -> ProcessPoolExecutor:
+        # spawn, not fork: forking a process that runs an event loop and
+        # Mongo/HTTP client threads can deadlock the child
+        executor = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        self._executors.add(executor)
+        try:
+            # Start the process now, so its startup is not charged to a conversion
+            await asyncio.wrap_future(executor.submit(_ping))
+        except BaseException:
+            self._kill(executor)
+            raise
+        return executor
+
+    async def _checkout(self) -> ProcessPoolExecutor:
+        slots = self._slots()
+        executor = await slots.get()
+        if executor is None:
+            try:
+                executor = await self._spawn()
+            except BaseException:
+                slots.put_nowait(None)
+                raise
+        return executor
+
+    def _release(self, executor: ProcessPoolExecutor):
+        if self._idle is not None and executor in self._executors:
+            self._idle.put_nowait(executor)
+
+    def _kill(self, executor: ProcessPoolExecutor):
+        self._executors.discard(executor)
+        # A stuck conversion never returns, so its process has to be killed
+        for process in list(getattr(executor, "_processes", {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _replace(self, executor: ProcessPoolExecutor):
+        """Kill one worker; its slot starts a fresh process on next use"""
+        self._kill(executor)
+        self.stats["restarts"] += 1
+        if self._idle is not None:
+            self._idle.put_nowait(None)
+
+    def _shutdown_all(self):
+        for executor in list(self._executors):
+            self._kill(executor)
+        self._idle = None
+        self._loop = None
+
+    async def start(self):
+        if not self.enabled:
+            return
+        started = time.perf_counter()
+        slots = self._slots()
+        executors = [await slots.get() for _ in range(self.workers)]
+        spawned = await asyncio.gather(
+            *(self._spawn() for executor in executors if executor is None), return_exceptions=True
+        )
+        warm = [executor for executor in executors if executor is not None]
+        warm += [executor for executor in spawned if isinstance(executor, ProcessPoolExecutor)]
+        for executor in warm:
+            slots.put_nowait(executor)
+        for _ in range(self.workers - len(warm)):
+            slots.put_nowait(None)
+        failed = [e for e in spawned if isinstance(e, BaseException)]
+        if failed:
+            print(f"⚠️ Loader pool warmup failed for {len(failed)} worker(s), they start on first use: {failed[0]}")
+        print(f"✅ Loader pool warmed: {len(warm)} worker(s) in {time.perf_counter() - started:.2f} seconds")
+
+    async def stop(self):
+        self._shutdown_all()
+
+    async def run(self, fn: Callable, *args, label: str = "document") -> Any:
+        """
+        Run fn(*args) in a worker process and return its result.
+
+        fn must be a module-level function and its arguments and result
+        picklable. Waits for a free worker, then raises LoaderTimeout if
+        the conversion takes longer than `timeout` seconds.
+        """
+        result, _ = await self.run_timed(fn, *args, label=label)
+        return result
+
+    async def run_timed(self, fn: Callable, *args, label: str = "document") -> Tuple[Any, float]:
+        """run, also returning the seconds spent converting (excluding queueing)"""
+        if not self.enabled:
+            try:
+                result, seconds = await asyncio.wait_for(asyncio.to_thread(_timed, fn, args), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                raise LoaderTimeout(f"Converting {label} took longer than {self.timeout:.0f} seconds")
+            self._record(label, seconds)
+            return result, seconds
+
+        loop = asyncio.get_running_loop()
+        executor = await self._checkout()
+        future = executor.submit(_timed, fn, args)
+        try:
+            result, seconds = await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            self._replace(executor)
+            raise LoaderTimeout(f"Converting {label} took longer than {self.timeout:.0f} seconds")
+        except BrokenProcessPool:
+            # The worker died (a crash or out of memory in the converter)
+            self._replace(executor)
+            raise
+        except asyncio.CancelledError:
+            # The conversion keeps running; the worker is free once it finishes
+            def release(_):
+                if not loop.is_closed():
+                    loop.call_soon_threadsafe(self._release, executor)
+
+            future.add_done_callback(release)
+            raise
+        except BaseException:
+            self._release(executor)
+            raise
+        self._release(executor)
+        self._record(label, seconds)
+        return result, seconds
+
+    def _record(self, label: str, seconds: float):
+        self.stats["converted"] += 1
+        self.stats["seconds"] += seconds
+        print(f"⏱️ Converted {label} in {seconds:.2f} seconds")
+
+    async def convert(self, content: bytes, filename: str, max_pages: Optional[int] = LOADER_MAX_PAGES) -> str:
+        """Markdown for one resume upload"""
+        try:
+            return await self.run(convert_document, content, filename, max_pages, label=filename)
+        except Exception:
+            self.stats["failed"] += 1
+            raise
+
+    async def convert_batch(
+        self,
+        documents: Iterable[Tuple[bytes, str]],
+        max_pages: Optional[int] = LOADER_MAX_PAGES,
+    ) -> List[LoadResult]:
+        """
+        Convert many (content, filename) documents concurrently, in order.
+
+        One failing document does not fail the batch; its LoadResult
+        carries the error instead of the Markdown.
+        """
+        async def one(content: bytes, filename: str) -> LoadResult:
+            try:
+                markdown, seconds = await self.run_timed(convert_document, content, filename, max_pages, label=filename)
+            except Exception as e:
+                self.stats["failed"] += 1
+                return LoadResult(filename, error=str(e) or type(e).__name__)
+            return LoadResult(filename, markdown, seconds=seconds)
+
+        return await asyncio.gather(*(one(content, filename) for content, filename in documents))
+
+    def snapshot(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["seconds"] = round(stats["seconds"], 3)
+        stats["workers"] = self.workers
+        stats["timeout_seconds"] = self.timeout
+        return stats
+
+
+loader_pool = LoaderPool()
@@ -1,38 +1,75 @@
+import io
+import pymupdf
 import pymupdf4llm
 import mammoth
 from pathlib import Path
+from typing import BinaryIO, Optional, Union
 
-def parse_pdf_to_md(pdf_path: str):
+# A path on disk, the raw file bytes, or an open binary stream
+ResumeSource = Union[str, bytes, BinaryIO]
+
+def read_source_bytes(source: ResumeSource) -> bytes:
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if isinstance(source, str):
+        return Path(source).read_bytes()
+    return source.read()
+
+def parse_pdf_to_md(source: Union[ResumeSource, pymupdf.Document], max_pages: Optional[int] = None):
     """
     Converts PDF to Markdown-like text.
+
+    Only the first `max_pages` pages are converted when given.
     """
-    md_text = pymupdf4llm.to_markdown(pdf_path)
+    if isinstance(source, pymupdf.Document):
+        return pymupdf4llm.to_markdown(source, pages=_page_range(source, max_pages))
+
+    # Open uploads straight from memory instead of via a temp file
+    if isinstance(source, str):
+        doc = pymupdf.open(source)
+    else:
+        doc = pymupdf.open(stream=read_source_bytes(source), filetype="pdf")
+    with doc:
+        md_text = pymupdf4llm.to_markdown(doc, pages=_page_range(doc, max_pages))
     return md_text
 
-def parse_docx_to_md(docx_path: str) -> str:
+def _page_range(doc: pymupdf.Document, max_pages: Optional[int]):
+    if max_pages is None or doc.page_count <= max_pages:
+        return None
+    return list(range(max_pages))
+
+def parse_docx_to_md(source: ResumeSource) -> str:
     """
     Converts DOCX to Markdown-like text.
     """
-    with open(docx_path, "rb") as docx_file:
-        result = mammoth.convert_to_markdown(docx_file)
-        md = result.value
-    return md
+    if isinstance(source, str):
+        with open(source, "rb") as docx_file:
+            return mammoth.convert_to_markdown(docx_file).value
 
-def load_resume(file_path: str) -> str:
+    result = mammoth.convert_to_markdown(io.BytesIO(read_source_bytes(source)))
+    return result.value
+
+def load_resume(source: ResumeSource, filename: Optional[str] = None, max_pages: Optional[int] = None) -> str:
     """
     Loads resume from common formats and returns text (Markdown-ish).
+
+    `source` is a file path, or the file's bytes / a binary stream together
+    with its original `filename` (used only to pick the format). PDFs
+    longer than `max_pages` are cut to their first pages.
     """
-    path = Path(file_path)
-    ext = path.suffix.lower()
+    name = filename or (source if isinstance(source, str) else None)
+    if name is None:
+        raise ValueError("A filename is required to load a resume from memory")
+    ext = Path(name).suffix.lower()
 
     if ext == ".pdf":
-        return parse_pdf_to_md(file_path)
+        return parse_pdf_to_md(source, max_pages)
 
     elif ext == ".docx":
-        return parse_docx_to_md(file_path)
+        return parse_docx_to_md(source)
 
     elif ext in [".txt", ".md"]:
-        return path.read_text(encoding="utf-8", errors="ignore")
+        return read_source_bytes(source).decode("utf-8", errors="ignore")
 
     else:
-        raise ValueError(f"Unsupported file extension: {ext}")
\ No newline at end of file
+        raise ValueError(f"Unsupported file extension: {ext}")
@@ -1,11 +1,20 @@
+import asyncio
 import json
-from parser.llm_client import call_ollama
+from parser.llm_client import call_ollama, stream_ollama
 from pydantic import ValidationError
-from parser.schemas import ResumeJSON
-from parser.loaders import load_resume
-from parser.utils import extract_json
+from parser.schemas import ResumeJSON, Section
+from parser.loaders import ResumeSource, read_source_bytes
+from parser.loader_pool import loader_pool
+from parser.utils import extract_json, IncrementalSectionParser
+from parser.llm_residency import model_residency
+from parser.llm_metrics import record_compaction, record_resume_sections
+from parser.compaction import prepare_resume_markdown
+from parser.section_repair import repair_resume
+from parser.chunking import PARSE_CHUNK_THRESHOLD_CHARS, chunk_resume_markdown, merge_resume_parts
+from resume_parser import fast_parse_resume
 import time
 import os
+from typing import Optional
 
 # def build_prompt(md_text: str) -> str:
 #     return f"""
@@ -44,8 +53,9 @@ import os
 # >>>
 # """.strip()
 
-def build_prompt(md_text: str) -> str:
-    return f"""You are a resume parsing assistant.
+# Static instructions come first and are identical on every call, so Ollama
+# can reuse the evaluated prefix instead of re-reading it for each resume
+RESUME_PARSE_INSTRUCTIONS = """You are a resume parsing assistant.
 
 Your task is to extract structured information from a resume written in Markdown format and convert it into a clean JSON object.
 
@@ -65,28 +75,28 @@ Instructions:
 
 Output JSON schema:
 
-{{
-  "name": {{
+{
+  "name": {
     "Name": string
-  }},
+  },
 
-  "contact_information": {{
+  "contact_information": {
     "Email": string | null,
     "Phone Number": string | null,
     "Location": string | null
-  }},
+  },
 
-  "links": {{
+  "links": {
     "LinkedIn": string | null,
     "GitHub": string | null,
     "Portfolio": string | null,
     "Personal Website": string | null
-  }},
+  },
 
   "Summary": string | null,
 
   "Work Experience": [
-    {{
+    {
       "Job Title": string,
       "Company Name": string,
       "Company URL": string | null,
@@ -95,11 +105,11 @@ Output JSON schema:
       "End Date": string | null,
       "Skills": [string],
       "Responsibilities": [string]
-    }}
+    }
   ],
 
   "Education": [
-    {{
+    {
       "Degree": string,
       "Field of Study": string | null,
       "Institution Name": string,
@@ -107,28 +117,28 @@ Output JSON schema:
       "Start Date": string | null,
       "End Date": string | null,
       "Grade": string | null
-    }}
+    }
   ],
 
   "Projects": [
-    {{
+    {
       "Name": string,
       "Description": string,
       "Skills": [string],
       "URL": string | null
-    }}
+    }
   ],
 
   "Certifications": [
-    {{
+    {
       "Name": string,
       "Issuer": string | null,
       "Date": string | null
-    }}
+    }
   ],
 
   "Skills": [string]
-}}
+}
 
 Extraction Rules:
 - Clean company names by removing emojis or special characters.
@@ -143,34 +153,58 @@ Extraction Rules:
 
 Input Markdown Resume:
 -----------------------
-{md_text}
+"""
+
+# Every upload starts with this prompt, so it is the one kept primed
+model_residency.register_prefix("resume_parse", RESUME_PARSE_INSTRUCTIONS, priority=1)
+
+# single: one prompt per resume; chunked: one prompt per section group;
+# auto: chunked once the resume exceeds PARSE_CHUNK_THRESHOLD_CHARS
+RESUME_PARSE_MODE = os.getenv("RESUME_PARSE_MODE", "auto").lower()
+
+# Parse sections with the rule-based segmenter first and only send the ones
+# it is unsure about to the LLM
+RESUME_FAST_PATH = os.getenv("RESUME_FAST_PATH", "true").lower() in ("1", "true", "yes")
+FAST_PARSE_MIN_CONFIDENCE = float(os.getenv("FAST_PARSE_MIN_CONFIDENCE", "0.75"))
+
+
+def build_prompt(md_text: str) -> str:
+    return f"""{RESUME_PARSE_INSTRUCTIONS}{md_text}
 -----------------------
 
 Return ONLY the JSON.
 """.strip()
 
 
-def main(file_path: str, output_path: str = "resume_parsed.json"):
-    """
-    Parse resume and save to specified output path
-    
-    Args:
-        file_path: Path to resume file
-        output_path: Path where to save parsed JSON (default: resume_parsed.json)
-    
-    Returns:
-        Path to the saved JSON file
-    """
-    print(f"📄 Loading resume from: {file_path}")
-    md_text = load_resume(file_path)
+async def load_resume_markdown(source: ResumeSource, filename: Optional[str] = None) -> str:
+    """Load a resume from a path, bytes or stream as Markdown, converting it in the loader pool"""
+    label = source if isinstance(source, str) else f"{filename} (in memory)"
+    print(f"📄 Loading resume from: {label}")
+    name = filename or (source if isinstance(source, str) else None)
+    if name is None:
+        raise ValueError("A filename is required to load a resume from memory")
+    content = await asyncio.to_thread(read_source_bytes, source)
+    return await loader_pool.convert(content, name)
+
+
+def build_resume_prompt(md_text: str) -> str:
+    """Compact the extracted Markdown and wrap it in the parse instructions"""
+    md_text, compaction = prepare_resume_markdown(md_text)
+    record_compaction("resume_parse", compaction)
+    return build_prompt(md_text)
 
-    print("📝 Extracted Resume Text (first 500 chars):")
-    print(md_text[:500] + "...")
 
-    prompt = build_prompt(md_text)
+def _use_chunks(md_text: str) -> bool:
+    if RESUME_PARSE_MODE == "chunked":
+        return True
+    if RESUME_PARSE_MODE == "single":
+        return False
+    return len(md_text) > PARSE_CHUNK_THRESHOLD_CHARS
 
+
+async def _parse_prompt(prompt: str) -> ResumeJSON:
     print("📨 Calling Ollama LLM...")
-    response = call_ollama(prompt=prompt, format_model=ResumeJSON)
+    response = await call_ollama(prompt=prompt, format_model=ResumeJSON, call_site="resume_parse")
 
     print("🧾 Raw LLM output (first 500 chars):")
     print(response[:500] + "...")
@@ -184,8 +218,121 @@ def main(file_path: str, output_path: str = "resume_parsed.json"):
     except ValidationError as e:
         print("\n❌ Output JSON did not match schema.")
         print(e)
+        validated = await repair_resume(parsed, e)
+
+    return validated
+
+
+async def _parse_with_llm(md_text: str) -> ResumeJSON:
+    """Parse Markdown with the LLM, split into concurrent section chunks when it is long"""
+    chunks = chunk_resume_markdown(md_text) if _use_chunks(md_text) else [md_text]
+    if len(chunks) == 1:
+        return await _parse_prompt(build_prompt(md_text))
+
+    print(f"✂️ Parsing {len(chunks)} resume sections concurrently "
+          f"(largest {max(len(c) for c in chunks)} of {len(md_text)} chars)")
+    return merge_resume_parts(await _gather_parses(chunks))
+
+
+async def _gather_parses(texts) -> list:
+    tasks = [asyncio.create_task(_parse_prompt(build_prompt(text))) for text in texts]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
         raise
 
+
+async def _parse_with_fast_path(md_text: str) -> ResumeJSON:
+    """
+    Rule-based parse with LLM fallback for the sections it is unsure about.
+
+    Adjacent low-confidence sections are sent together as one prompt, and
+    all fallback prompts run concurrently; the results are merged back in
+    document order. A resume the rules handle completely makes no LLM call.
+    """
+    segments = fast_parse_resume(md_text)
+    # Runs of consecutive sections: either all confident or all for the LLM
+    groups = []
+    for segment in segments:
+        confident = segment.confidence >= FAST_PARSE_MIN_CONFIDENCE and bool(segment.sections)
+        if groups and groups[-1][0] == confident:
+            groups[-1][1].append(segment)
+        else:
+            groups.append((confident, [segment]))
+
+    fallback = [group for confident, group in groups if not confident]
+    rule_sections = sum(len(group) for confident, group in groups if confident)
+    record_resume_sections("rules", rule_sections)
+    record_resume_sections("llm", len(segments) - rule_sections)
+    print(f"⚡ Fast path parsed {rule_sections}/{len(segments)} sections; "
+          f"{len(fallback)} group(s) go to the LLM")
+
+    if rule_sections == 0:
+        return await _parse_with_llm(md_text)
+
+    texts = ["\n\n".join(segment.text for segment in group) for group in fallback]
+    llm_parts = iter(await _gather_parses(texts)) if texts else iter(())
+
+    parts = []
+    for confident, group in groups:
+        if confident:
+            parts.append(ResumeJSON(sections=[s for segment in group for s in segment.sections]))
+        else:
+            parts.append(next(llm_parts))
+    return merge_resume_parts(parts)
+
+
+async def parse_resume_markdown(md_text: str) -> ResumeJSON:
+    """
+    Parse already-extracted resume Markdown and return the validated ResumeJSON.
+
+    With RESUME_FAST_PATH on, well-structured sections are parsed by rules
+    and only the rest go to the LLM. Long resumes are split at their section
+    headings and the chunks parsed concurrently with the same instructions,
+    so latency follows the largest section instead of the whole document;
+    the parts are merged in order.
+    """
+    print("📝 Extracted Resume Text (first 500 chars):")
+    print(md_text[:500] + "...")
+
+    md_text, compaction = prepare_resume_markdown(md_text)
+    record_compaction("resume_parse", compaction)
+
+    if RESUME_FAST_PATH:
+        return await _parse_with_fast_path(md_text)
+    return await _parse_with_llm(md_text)
+
+
+async def parse_resume(source: ResumeSource, filename: Optional[str] = None) -> ResumeJSON:
+    """
+    Parse a resume and return the validated ResumeJSON.
+
+    Args:
+        source: Path to the resume file, or its bytes / a binary stream
+        filename: Original file name; required when source is not a path
+
+    Returns:
+        Validated ResumeJSON
+    """
+    md_text = await load_resume_markdown(source, filename)
+    return await parse_resume_markdown(md_text)
+
+
+async def main(file_path: str, output_path: str = "resume_parsed.json"):
+    """
+    Parse resume and save to specified output path
+    
+    Args:
+        file_path: Path to resume file
+        output_path: Path where to save parsed JSON (default: resume_parsed.json)
+    
+    Returns:
+        Path to the saved JSON file
+    """
+    validated = await parse_resume(file_path)
+
     # Save to specified output path
     print(f"💾 Saving parsed resume to: {output_path}")
     with open(output_path, "w", encoding="utf-8") as f:
@@ -200,8 +347,75 @@ def main(file_path: str, output_path: str = "resume_parsed.json"):
     return output_path
 
 
+async def stream_sections(source: ResumeSource, filename: Optional[str] = None):
+    """
+    Parse resume with a streaming LLM call, yielding each validated Section
+    as soon as the model closes it instead of waiting for the whole ResumeJSON.
+    """
+    md_text = await load_resume_markdown(source, filename)
+    async for section in stream_sections_markdown(md_text):
+        yield section
+
+
+async def stream_sections_markdown(md_text: str):
+    """stream_sections for already-extracted resume Markdown"""
+    prompt = build_resume_prompt(md_text)
+
+    print("📨 Streaming from Ollama LLM...")
+    section_parser = IncrementalSectionParser()
+    # Sections are tracked by their position in the output, so the final
+    # pass below knows exactly which ones the client has not had yet
+    seen = 0
+    skipped = []
+    emitted = 0
+
+    async for chunk in stream_ollama(prompt=prompt, format_model=ResumeJSON, call_site="resume_parse"):
+        for raw_section in section_parser.feed(chunk):
+            seen += 1
+            try:
+                section = Section.model_validate(raw_section)
+            except ValidationError as e:
+                print(f"⚠️ Streamed section {seen - 1} did not match schema, repairing it at the end: {e}")
+                skipped.append(raw_section)
+                continue
+            emitted += 1
+            yield section
+
+    # Parse the complete output too, and pick up anything the incremental
+    # parser could not see (e.g. a truncated tail) along with the sections
+    # that failed validation, repairing them like parse_resume_markdown does
+    print("✅ Validating streamed JSON with Pydantic schema...")
+    try:
+        parsed = extract_json(section_parser.buffer)
+    except ValueError:
+        if not emitted:
+            raise
+        parsed = {}
+    sections = parsed.get("sections") if isinstance(parsed, dict) else None
+    remaining = skipped + (sections[seen:] if isinstance(sections, list) else [])
+
+    if remaining:
+        raw = {"sections": remaining}
+        try:
+            try:
+                validated = ResumeJSON.model_validate(raw)
+            except ValidationError as e:
+                validated = await repair_resume(raw, e)
+        except ValidationError as e:
+            # Part of the resume is already with the client; drop the rest
+            # rather than failing a stream that has started
+            if not emitted:
+                raise
+            print(f"⚠️ Dropping {len(remaining)} streamed section(s) that could not be repaired: {e}")
+        else:
+            for section in validated.sections:
+                emitted += 1
+                yield section
+
+    print(f"🎉 Streamed {emitted} sections")
+
 if __name__ == "__main__":
     start_time = time.time()
-    main("/Users/behera5/Desktop/project-thunder/backend/parser/resume.pdf")
+    asyncio.run(main("/Users/behera5/Desktop/project-thunder/backend/parser/resume.pdf"))
     end_time = time.time()
     print(f"\n⏱️ Total time taken: {end_time - start_time:.2f} seconds")
\ No newline at end of file
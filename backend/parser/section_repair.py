@@ -0,0 +1,173 @@
+import asyncio
+import json
+import os
+from typing import Any, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+from parser.deadline import DeadlineExceeded
+from parser.llm_client import call_ollama
+from parser.llm_metrics import record_reask
+from parser.llm_residency import model_residency
+from parser.schemas import ResumeJSON, Section, SubSection
+from parser.utils import extract_json
+
+# Re-ask the LLM for just the sections/subsections that failed validation
+# instead of failing the whole parse
+RESUME_PARTIAL_REASK = os.getenv("RESUME_PARTIAL_REASK", "true").lower() in ("1", "true", "yes")
+# With more broken fragments than this a full re-parse is the better retry
+RESUME_REASK_MAX_FRAGMENTS = int(os.getenv("RESUME_REASK_MAX_FRAGMENTS", "6"))
+
+REPAIR_INSTRUCTIONS = """You are fixing one fragment of a parsed resume that does not match its JSON schema.
+
+Rules:
+1. Keep every piece of information in the fragment. Do NOT add, infer or summarise anything.
+2. Use exactly the fields of the schema below and no others.
+3. "title", "section_name" and every item of "data" are plain strings; "data" is a list of strings.
+4. Return ONLY the corrected JSON object. No explanation, no extra text.
+
+Schemas:
+SubSection: {"title": string, "data": [string]}
+Section: {"section_name": string, "subsections": [SubSection]}
+
+"""
+
+model_residency.register_prefix("resume_repair", REPAIR_INSTRUCTIONS)
+
+
+class BrokenFragment:
+    """One Section (or one SubSection of an otherwise valid Section) that failed validation"""
+
+    def __init__(self, model: Type[BaseModel], raw: Any, error: str, section_index: int,
+                 subsection_index: Optional[int] = None, section_name: Optional[str] = None):
+        self.model = model
+        self.raw = raw
+        self.error = error
+        self.section_index = section_index
+        self.subsection_index = subsection_index
+        self.section_name = section_name
+
+    @property
+    def label(self) -> str:
+        if self.subsection_index is None:
+            return f"section {self.section_index}"
+        return f"section {self.section_index} ({self.section_name}) subsection {self.subsection_index}"
+
+
+def _errors(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in err['loc']) or 'value'}: {err['msg']}" for err in e.errors())
+
+
+def find_broken_fragments(raw: Any) -> Tuple[List[Optional[Section]], List[BrokenFragment]]:
+    """
+    Validate a raw ResumeJSON dict piece by piece.
+
+    Returns the sections in order (None where a whole section is broken;
+    a section with broken subsections keeps its valid ones) and the
+    fragments that need fixing. Raises ValueError when the top level itself
+    is unusable, since there is nothing to keep.
+    """
+    if not isinstance(raw, dict) or not isinstance(raw.get("sections"), list):
+        raise ValueError("Output has no sections list")
+
+    sections: List[Optional[Section]] = []
+    broken: List[BrokenFragment] = []
+    for i, raw_section in enumerate(raw["sections"]):
+        try:
+            sections.append(Section.model_validate(raw_section))
+            continue
+        except ValidationError as e:
+            section_error = _errors(e)
+
+        name = raw_section.get("section_name") if isinstance(raw_section, dict) else None
+        subsections = raw_section.get("subsections") if isinstance(raw_section, dict) else None
+        # Only the subsections are wrong: keep the section and fix those
+        if isinstance(name, str) and isinstance(subsections, list) and set(raw_section) <= {"section_name", "subsections"}:
+            section = Section(section_name=name, subsections=[])
+            for j, raw_sub in enumerate(subsections):
+                try:
+                    section.subsections.append(SubSection.model_validate(raw_sub))
+                except ValidationError as e:
+                    section.subsections.append(None)
+                    broken.append(BrokenFragment(SubSection, raw_sub, _errors(e), i, j, name))
+            sections.append(section)
+        else:
+            sections.append(None)
+            broken.append(BrokenFragment(Section, raw_section, section_error, i))
+    return sections, broken
+
+
+def build_repair_prompt(fragment: BrokenFragment) -> str:
+    context = f' of the "{fragment.section_name}" section' if fragment.section_name else ""
+    return f"""{REPAIR_INSTRUCTIONS}Fix this {fragment.model.__name__}{context}.
+
+Validation errors: {fragment.error}
+
+Fragment:
+{json.dumps(fragment.raw, ensure_ascii=False, default=str)}
+
+Return ONLY the corrected {fragment.model.__name__} JSON.
+""".strip()
+
+
+async def _repair(fragment: BrokenFragment) -> Optional[BaseModel]:
+    try:
+        response = await call_ollama(
+            prompt=build_repair_prompt(fragment), format_model=fragment.model, call_site="resume_repair"
+        )
+        fixed = fragment.model.model_validate(extract_json(response))
+    except DeadlineExceeded:
+        raise  # the whole request is out of time, not just this fragment
+    except (ValidationError, ValueError) as e:
+        print(f"⚠️ Could not repair {fragment.label}, dropping it: {e}")
+        record_reask("dropped")
+        return None
+    except Exception as e:
+        # A failed re-ask (HTTP error, no backend left) only costs this fragment
+        print(f"⚠️ Re-ask for {fragment.label} failed, dropping it: {type(e).__name__}: {e}")
+        record_reask("dropped")
+        return None
+    record_reask("fixed")
+    return fixed
+
+
+async def repair_resume(raw: Any, error: ValidationError) -> ResumeJSON:
+    """
+    Turn LLM output that failed ResumeJSON validation into a valid ResumeJSON.
+
+    Valid sections and subsections are kept as they are; each broken one is
+    sent back to the LLM on its own (concurrently) with its validation
+    errors, so the retry costs a few small generations rather than a full
+    re-parse. Fragments still invalid after their re-ask, or whose re-ask
+    failed, are dropped.
+    Raises the original error when re-asking is off, the output has no
+    usable structure, or too much of it is broken.
+    """
+    if not RESUME_PARTIAL_REASK:
+        raise error
+    try:
+        sections, broken = find_broken_fragments(raw)
+    except ValueError:
+        raise error
+    if len(broken) > RESUME_REASK_MAX_FRAGMENTS:
+        print(f"❌ {len(broken)} invalid fragments, more than RESUME_REASK_MAX_FRAGMENTS")
+        raise error
+
+    print(f"🔁 Re-asking for {len(broken)} invalid fragment(s): {', '.join(f.label for f in broken)}")
+    fixed = await asyncio.gather(*(_repair(fragment) for fragment in broken))
+
+    for fragment, result in zip(broken, fixed):
+        if fragment.subsection_index is None:
+            sections[fragment.section_index] = result
+        else:
+            sections[fragment.section_index].subsections[fragment.subsection_index] = result
+
+    kept = []
+    for section in sections:
+        if section is None:
+            continue
+        section.subsections = [s for s in section.subsections if s is not None]
+        kept.append(section)
+    if not kept:
+        raise error
+    return ResumeJSON(sections=kept)
@@ -0,0 +1,65 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Call:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical requests.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it is still running await the same task instead of starting their
+    own. The key is forgotten as soon as the task finishes, so later calls
+    run again (or hit the response cache).
+
+    A caller that is cancelled only stops waiting; the shared task is
+    cancelled once every caller waiting on it has gone away.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, _Call] = {}
+        self.stats = {"leaders": 0, "coalesced": 0, "abandoned": 0}
+
+    def is_inflight(self, key: str) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._inflight.get(key)
+        if call is not None:
+            self.stats["coalesced"] += 1
+        else:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._inflight[key] = call
+            self.stats["leaders"] += 1
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+
+        call.waiters += 1
+        try:
+            # Shield so one caller going away does not cancel the shared work
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                # Nobody is left to receive the result; stop the work and let
+                # the next caller start fresh
+                self._forget(key, call)
+                call.task.cancel()
+                self.stats["abandoned"] += 1
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _forget(self, key: str, call: _Call):
+        if self._inflight.get(key) is call:
+            del self._inflight[key]
+
+    def snapshot(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["in_flight"] = len(self._inflight)
+        total = stats["leaders"] + stats["coalesced"]
+        stats["coalesce_rate"] = round(stats["coalesced"] / total, 4) if total else 0.0
+        return stats
@@ -1,24 +1,230 @@
-import json 
+import json
+import os
+import re
+from typing import Any, List, Tuple
+
+# Repair near-miss LLM output (chatter, truncation, trailing commas) instead
+# of failing the parse; set to false to make extract_json strict again
+LLM_JSON_RECOVERY = os.getenv("LLM_JSON_RECOVERY", "true").lower() in ("1", "true", "yes")
+
+FENCE_RE = re.compile(r"```(?:\w+)?\s*([\s\S]*?)(?:```|$)")
+CLOSERS = {"{": "}", "[": "]"}
+
 
 def extract_json(text: str) -> dict:
     """
-    This is intentionally strict:
-    expects the LLM to output pure JSON.
+    Parse the LLM's JSON output.
+
+    Well-formed output (optionally inside a ``` block) is parsed strictly.
+    Anything else goes through recover_json, which repairs what it safely
+    can and logs each repair, so a near miss does not cost a regeneration.
     """
     print("Extracting JSON...")
 
-    import re
+    strict_text = text
     match = re.search(r"```(?:\w+)?\s*([\s\S]*?)```", text)
     if match:
-        text = match.group(1).strip()
+        strict_text = match.group(1).strip()
     else:
         print("No ``` block found")
-    
+
     try:
-        parsed = json.loads(text)
+        parsed = json.loads(strict_text)
     except json.JSONDecodeError as e:
         print("JSONDecodeError:", e)
-        print("Near:", repr(text[e.pos-40:e.pos+40]))
-        raise
+        print("Near:", repr(strict_text[e.pos-40:e.pos+40]))
+        if not LLM_JSON_RECOVERY:
+            raise
+        try:
+            parsed, repairs = recover_json(text)
+        except ValueError:
+            raise e
+        print(f"🩹 Recovered JSON: {'; '.join(repairs)}")
+
+    return parsed
+
+
+def _remove_trailing_commas(text: str) -> Tuple[str, int]:
+    """Drop commas directly before a closing bracket, outside strings"""
+    out, removed = [], 0
+    in_string = escape = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == ",":
+            rest = text[i + 1:].lstrip()
+            if rest[:1] in ("}", "]"):
+                removed += 1
+                continue
+        out.append(ch)
+    return "".join(out), removed
+
+
+def _cut_points(text: str) -> List[Tuple[int, str]]:
+    """
+    Places a truncated document can be cut and closed without inventing data.
+
+    Each entry is (end, closers): text[:end] plus closers is complete JSON
+    whenever everything before `end` was valid. Cuts fall just after an
+    opening bracket, just before a comma (the element before it is
+    complete) and just after a nested container closes.
+    """
+    points = []
+    stack: List[str] = []
+    in_string = escape = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in CLOSERS:
+            # A container just opened inside an array would become an
+            # invented empty element; cut before it instead
+            in_array = bool(stack) and stack[-1] == "]"
+            stack.append(CLOSERS[ch])
+            if not in_array:
+                points.append((i + 1, "".join(reversed(stack))))
+        elif ch in "}]":
+            if not stack:
+                break
+            stack.pop()
+            if not stack:
+                break
+            points.append((i + 1, "".join(reversed(stack))))
+        elif ch == "," and stack:
+            points.append((i, "".join(reversed(stack))))
+    return points
+
+
+def recover_json(text: str) -> Tuple[Any, List[str]]:
+    """
+    Best-effort parse of malformed LLM JSON output.
+
+    Returns (value, repairs), where repairs describes every change made:
+    code fences and prose around the value are dropped, trailing commas
+    removed, and a truncated document is cut back to its last complete
+    element and its open arrays/objects closed. A half-written string or
+    key is dropped rather than completed. Raises ValueError when no JSON
+    value can be recovered.
+    """
+    repairs: List[str] = []
+
+    fence = FENCE_RE.search(text)
+    if fence:
+        repairs.append("stripped code fence" if text.count("```") >= 2 else "stripped unterminated code fence")
+        text = fence.group(1)
+
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("No JSON object or array in the output")
+    start = min(starts)
+    if text[:start].strip():
+        repairs.append(f"dropped {len(text[:start].strip())} characters of leading text")
+    text = text[start:]
+
+    decoder = json.JSONDecoder()
+
+    def decode(candidate: str):
+        value, end = decoder.raw_decode(candidate)
+        trailing = candidate[end:].strip()
+        if trailing:
+            repairs.append(f"dropped {len(trailing)} characters of trailing text")
+        return value
+
+    try:
+        return decode(text), repairs
+    except json.JSONDecodeError:
+        pass
+
+    text, removed = _remove_trailing_commas(text)
+    if removed:
+        repairs.append(f"removed {removed} trailing comma{'s' if removed != 1 else ''}")
+        try:
+            return decode(text), repairs
+        except json.JSONDecodeError:
+            pass
+
+    # Truncated output: cut at the last point that parses once closed
+    for end, closers in reversed(_cut_points(text)):
+        try:
+            value = json.loads(text[:end] + closers)
+        except json.JSONDecodeError:
+            continue
+        dropped = len(text[end:].strip())
+        if dropped:
+            repairs.append(f"dropped {dropped} characters of incomplete trailing value")
+        repairs.append(f"closed {len(closers)} unclosed bracket{'s' if len(closers) != 1 else ''}")
+        return value, repairs
+
+    raise ValueError("Could not recover a JSON value from the output")
+
+
+class IncrementalSectionParser:
+    """
+    Incremental parser for streamed ResumeJSON output.
+
+    Feed it text chunks as they arrive; it returns every element of the
+    top-level array (the "sections" list) whose closing brace has been seen.
+    Strings and escapes are tracked so braces inside values are ignored.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._item_start = None
+        self._array_depth = None
+
+    def feed(self, chunk: str) -> list:
+        self.buffer += chunk
+        completed = []
+
+        text = self.buffer
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                # The first array opened directly inside the root object
+                # holds the sections
+                if ch == "[" and self._depth == 1 and self._array_depth is None:
+                    self._array_depth = self._depth + 1
+                elif ch == "{" and self._array_depth is not None and self._depth == self._array_depth:
+                    self._item_start = i
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if ch == "}" and self._item_start is not None and self._depth == self._array_depth:
+                    completed.append(json.loads(text[self._item_start:i + 1]))
+                    self._item_start = None
+                elif ch == "]" and self._array_depth is not None and self._depth == self._array_depth - 1:
+                    # The sections list is closed; later arrays are not sections
+                    self._array_depth = -1
 
-    return parsed
\ No newline at end of file
+        self._pos = len(text)
+        return completed
@@ -1,6 +1,16 @@
 import PyPDF2
 import re
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+from parser.schemas import Section, SubSection
+
+EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+PHONE_RES = [
+    re.compile(r'\+?\d{1,3}[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'),
+    re.compile(r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'),
+    re.compile(r'\+\d{10,15}'),
+]
+LINKEDIN_RE = re.compile(r'(?:https?://)?(?:www\.)?linkedin\.com/in/[\w-]+', re.IGNORECASE)
+GITHUB_RE = re.compile(r'(?:https?://)?(?:www\.)?github\.com/[\w-]+', re.IGNORECASE)
 
 def extract_text_from_pdf(pdf_path: str) -> str:
     """Extract text from PDF file"""
@@ -16,35 +26,26 @@ def extract_text_from_pdf(pdf_path: str) -> str:
 
 def extract_email(text: str) -> Optional[str]:
     """Extract email address from text"""
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    emails = re.findall(email_pattern, text)
-    return emails[0] if emails else None
+    match = EMAIL_RE.search(text)
+    return match.group(0) if match else None
 
 def extract_phone(text: str) -> Optional[str]:
     """Extract phone number from text"""
-    phone_patterns = [
-        r'\+?\d{1,3}[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}',
-        r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}',
-        r'\+\d{10,15}'
-    ]
-    
-    for pattern in phone_patterns:
-        phones = re.findall(pattern, text)
-        if phones:
-            return phones[0]
+    for pattern in PHONE_RES:
+        match = pattern.search(text)
+        if match:
+            return match.group(0)
     return None
 
 def extract_linkedin(text: str) -> Optional[str]:
     """Extract LinkedIn URL from text"""
-    linkedin_pattern = r'(?:https?://)?(?:www\.)?linkedin\.com/in/[\w-]+'
-    links = re.findall(linkedin_pattern, text, re.IGNORECASE)
-    return links[0] if links else None
+    match = LINKEDIN_RE.search(text)
+    return match.group(0) if match else None
 
 def extract_github(text: str) -> Optional[str]:
     """Extract GitHub URL from text"""
-    github_pattern = r'(?:https?://)?(?:www\.)?github\.com/[\w-]+'
-    links = re.findall(github_pattern, text, re.IGNORECASE)
-    return links[0] if links else None
+    match = GITHUB_RE.search(text)
+    return match.group(0) if match else None
 
 def extract_name(text: str) -> Optional[str]:
     """Extract name from text (assumes name is at the beginning)"""
@@ -167,4 +168,305 @@ def parse_resume(pdf_path: str) -> Dict[str, Optional[str]]:
         return extracted_data
         
     except Exception as e:
-        raise Exception(f"Error parsing resume: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Error parsing resume: {str(e)}")
+
+# ---------------------------------------------------------------------------
+# One-pass section segmenter (fast path for the upload parser)
+# ---------------------------------------------------------------------------
+
+# Canonical section name -> headings that introduce it
+SECTION_ALIASES = {
+    "Summary": ["summary", "professional summary", "profile", "professional profile", "objective",
+                "career objective", "about", "about me"],
+    "Experience": ["experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "career history", "relevant experience"],
+    "Education": ["education", "academic background", "academics", "qualifications",
+                  "educational qualifications", "education and training"],
+    "Skills": ["skills", "technical skills", "core competencies", "competencies", "expertise",
+               "technologies", "tech stack", "key skills", "skills and tools"],
+    "Projects": ["projects", "personal projects", "academic projects", "key projects", "selected projects"],
+    "Certifications": ["certifications", "certificates", "licenses", "licenses and certifications",
+                       "certifications and licenses", "courses"],
+    "Awards": ["awards", "honors", "honours", "achievements", "awards and honors", "honors and awards"],
+    "Publications": ["publications", "papers", "research"],
+    "Languages": ["languages"],
+    "Interests": ["interests", "hobbies", "hobbies and interests"],
+    "Volunteering": ["volunteering", "volunteer experience", "leadership", "extracurricular activities",
+                     "activities"],
+}
+HEADING_TO_SECTION = {alias: name for name, aliases in SECTION_ALIASES.items() for alias in aliases}
+
+# Sections made of entries (a title line followed by bullet points)
+ENTRY_SECTIONS = {"Experience", "Education", "Projects", "Certifications", "Awards", "Publications", "Volunteering"}
+# Entries in these are expected to carry dates
+DATED_SECTIONS = {"Experience", "Education"}
+
+MARKDOWN_HEADING_RE = re.compile(r'^\s{0,3}#{1,6}\s+(.*)$')
+BOLD_LINE_RE = re.compile(r'^\s*\*\*([^*]+)\*\*\s*:?\s*$')
+BULLET_RE = re.compile(r'^\s*(?:[-*+•◦▪●■–]|\d{1,2}[.)])\s+')
+MD_LINK_RE = re.compile(r'\[([^\]]*)\]\(([^)\s]+)\)')
+URL_RE = re.compile(r'(?:https?://|www\.)[^\s|,)]+', re.IGNORECASE)
+MONTH = r'(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?'
+DATE_RANGE_RE = re.compile(
+    rf'(?:{MONTH}\s*)?(?:\d{{1,2}}/)?\d{{4}}\s*(?:-|–|—|to)\s*(?:present|current|now|today|(?:{MONTH}\s*)?(?:\d{{1,2}}/)?\d{{4}})'
+    rf'|\b(?:{MONTH}\s*)?\d{{4}}\b',
+    re.IGNORECASE,
+)
+SKILL_SPLIT_RE = re.compile(r'\s*(?:,|;|•|\||·)\s*')
+LABEL_RE = re.compile(r'^([A-Za-z][\w &/+.-]{1,40}):\s*(.+)$')
+# A bullet ending like this carries on in the next line
+WRAP_ENDINGS = (',', ';', '-', '–', '&', '/', '(')
+WRAP_WORDS = {"a", "an", "and", "as", "at", "by", "for", "from", "in", "into", "of", "on", "or", "the", "to", "with"}
+# Ceiling for an entry section where an undated, unmarked line after
+# bullets started an entry (below the fast path's acceptance threshold)
+GUESSED_ENTRY_CONFIDENCE = 0.6
+
+
+class SegmentedSection:
+    """One resume section from the segmenter: parsed result, confidence and its source text"""
+
+    def __init__(self, name: str, lines: List[str], heading: Optional[str] = None, known: bool = False):
+        self.name = name
+        self.heading = heading
+        # Whether the heading matched one of SECTION_ALIASES
+        self.known = known
+        self.lines = lines
+        self.sections: List[Section] = []
+        self.confidence = 0.0
+
+    @property
+    def text(self) -> str:
+        body = '\n'.join(self.lines)
+        return f"## {self.heading}\n{body}" if self.heading else body
+
+
+def _plain(line: str) -> str:
+    """Strip bullets, emphasis and link syntax, keeping the words and URLs"""
+    line = BULLET_RE.sub('', line)
+
+    def link(match):
+        label, url = match.group(1).strip(), match.group(2)
+        if not label or label.rstrip('/') in url:
+            return url
+        return f"{label} ({url})"
+
+    line = MD_LINK_RE.sub(link, line)
+    line = re.sub(r'(\*\*|__)(.+?)\1', r'\2', line)
+    line = line.replace('**', '')
+    return re.sub(r'\s+', ' ', line).strip(' *_')
+
+
+def _heading_key(text: str) -> str:
+    text = text.replace('&', ' and ')
+    return re.sub(r'\s+', ' ', re.sub(r'[^a-z ]', ' ', text.lower())).strip()
+
+
+def _match_heading(line: str):
+    """(canonical name or None, heading text) if the line is a section heading, else None"""
+    stripped = line.strip()
+    if not stripped:
+        return None
+
+    md = MARKDOWN_HEADING_RE.match(stripped)
+    bold = BOLD_LINE_RE.match(stripped)
+    text = _plain(md.group(1) if md else bold.group(1) if bold else stripped).rstrip(':').strip()
+    key = _heading_key(text)
+    if key in HEADING_TO_SECTION:
+        # Plain-text headings must look like headings, not sentences using the word
+        if md or bold or len(text.split()) <= 4:
+            return HEADING_TO_SECTION[key], text
+    if md:
+        return None, text
+    return None
+
+
+def segment_resume(text: str) -> List[SegmentedSection]:
+    """
+    Split resume text into sections in a single pass over its lines.
+
+    Lines before the first heading form the header (name and contact
+    details). Known headings map to canonical names via SECTION_ALIASES;
+    unknown Markdown headings still start a section, named as written.
+    """
+    header = SegmentedSection("Header", [])
+    sections = [header]
+    current = header
+    for line in text.split('\n'):
+        heading = _match_heading(line)
+        # The first Markdown heading of a resume is usually the person's name
+        if heading and not (current is header and heading[0] is None and not any(l.strip() for l in header.lines)):
+            name, heading_text = heading
+            current = SegmentedSection(name or heading_text, [], heading=heading_text, known=name is not None)
+            sections.append(current)
+            continue
+        if line.strip():
+            current.lines.append(line.rstrip())
+    return [s for s in sections if s.lines]
+
+
+def _build_header(section: SegmentedSection) -> None:
+    name = None
+    email = phone = None
+    links = []
+    extras = []
+    leftover = []
+    for raw in section.lines:
+        line = _plain(MARKDOWN_HEADING_RE.sub(r'\1', raw))
+        found = False
+        if email is None and EMAIL_RE.search(line):
+            email = EMAIL_RE.search(line).group(0)
+            found = True
+        if phone is None:
+            for pattern in PHONE_RES:
+                match = pattern.search(line)
+                if match:
+                    phone = match.group(0).strip()
+                    found = True
+                    break
+        for url in URL_RE.findall(line):
+            if url not in links:
+                links.append(url.rstrip('.'))
+            found = True
+        if (name is None and not found and 1 <= len(line.split()) <= 5
+                and not any(ch.isdigit() for ch in line) and '@' not in line):
+            name = line
+            continue
+        if not found:
+            leftover.append(line)
+            continue
+        # Location and similar fragments sit between the separators of a contact line
+        for part in re.split(r'\s*[|•·]\s*', line):
+            part = part.strip(' ,')
+            if part and part not in (email, phone) and not URL_RE.search(part) and not EMAIL_RE.search(part) \
+                    and not any(p.search(part) for p in PHONE_RES):
+                extras.append(part)
+
+    result = []
+    if name:
+        result.append(Section(section_name="Name", subsections=[SubSection(title="Name", data=[name])]))
+    contact = [value for value in (email, phone) if value] + extras
+    if contact:
+        result.append(Section(section_name="Contact Information",
+                              subsections=[SubSection(title="Contact Information", data=contact)]))
+    if links:
+        result.append(Section(section_name="Links", subsections=[SubSection(title="Links", data=links)]))
+    if leftover:
+        # Location lines and a headline often sit under the name
+        result.append(Section(section_name="Summary", subsections=[SubSection(title="Summary", data=leftover)]))
+
+    section.sections = result
+    section.confidence = (0.5 if name else 0.0) + (0.4 if email else 0.0) + (0.1 if phone or links else 0.0)
+
+
+def _build_skills(section: SegmentedSection) -> None:
+    groups: Dict[str, List[str]] = {}
+    for raw in section.lines:
+        line = _plain(raw)
+        label_match = LABEL_RE.match(line)
+        label, items = (label_match.group(1).strip(), label_match.group(2)) if label_match else ("Skills", line)
+        bucket = groups.setdefault(label, [])
+        for item in SKILL_SPLIT_RE.split(items):
+            item = item.strip(' .')
+            if item and item not in bucket:
+                bucket.append(item)
+
+    subsections = [SubSection(title=label, data=items) for label, items in groups.items() if items]
+    items = [item for sub in subsections for item in sub.data]
+    section.sections = [Section(section_name="Skills", subsections=subsections)]
+    short = sum(1 for item in items if len(item.split()) <= 4)
+    # Real skill lists are many short items; prose means the split went wrong
+    section.confidence = 0.9 if len(items) >= 3 and short / len(items) >= 0.8 else 0.4
+
+
+def _continues(previous: str, raw: str, line: str) -> bool:
+    """Whether a plain line after a bullet is that bullet wrapped onto the next line"""
+    if raw[:1].isspace() or line[:1].islower():
+        return True
+    last_word = previous.rsplit(' ', 1)[-1].lower()
+    return previous.endswith(WRAP_ENDINGS) or last_word in WRAP_WORDS
+
+
+def _build_entries(section: SegmentedSection) -> None:
+    entries: List[SubSection] = []
+    # Entries started by an undated plain line right after bullets: a new
+    # entry or a wrapped bullet the rules could not tell apart
+    guessed: List[SubSection] = []
+    current: Optional[SubSection] = None
+    for raw in section.lines:
+        is_bullet = bool(BULLET_RE.match(raw))
+        line = _plain(raw)
+        if not line:
+            continue
+        marked = bool(MARKDOWN_HEADING_RE.match(raw)) or raw.lstrip().startswith(('**', '__'))
+        if is_bullet or len(line) > 120:
+            if current is None:
+                current = SubSection(title=section.name, data=[])
+                entries.append(current)
+            current.data.append(line)
+        elif current is not None and current.data and not marked and _continues(current.data[-1], raw, line):
+            current.data[-1] = f"{current.data[-1]} {line}"
+        elif current is None or current.data:
+            current = SubSection(title=line, data=[])
+            entries.append(current)
+            if len(entries) > 1 and not marked and not DATE_RANGE_RE.search(line):
+                guessed.append(current)
+        elif current in guessed and marked:
+            # The guessed entry was the last line of the previous bullet after all
+            entries.pop()
+            guessed.remove(current)
+            entries[-1].data[-1] = f"{entries[-1].data[-1]} {current.title}"
+            current = SubSection(title=line, data=[])
+            entries.append(current)
+        else:
+            # Company / location / date lines that follow the role line
+            current.title = f"{current.title} - {line}"
+
+    # A one-line entry ("BSc Computer Science - State University (2014 - 2018)")
+    # keeps its line as data; the upload path drops subsections without data
+    for entry in entries:
+        if not entry.data:
+            entry.data.append(entry.title)
+    section.sections = [Section(section_name=section.name, subsections=entries)]
+    if not entries:
+        section.confidence = 0.0
+        return
+    titled = sum(1 for e in entries if e.title != section.name and len(e.title) <= 160)
+    score = 0.5 + 0.4 * titled / len(entries)
+    if section.name in DATED_SECTIONS:
+        dated = sum(1 for e in entries if DATE_RANGE_RE.search(e.title))
+        score = 0.3 + 0.3 * titled / len(entries) + 0.35 * dated / len(entries)
+    if guessed:
+        # Possibly a wrapped bullet parsed as its own entry; let the LLM decide
+        score = min(score, GUESSED_ENTRY_CONFIDENCE)
+    section.confidence = round(score, 3)
+
+
+def _build_text(section: SegmentedSection) -> None:
+    data = [_plain(line) for line in section.lines if _plain(line)]
+    section.sections = [Section(section_name=section.name, subsections=[SubSection(title=section.name, data=data)])]
+    section.confidence = 0.85 if data else 0.0
+
+
+def fast_parse_resume(text: str) -> List[SegmentedSection]:
+    """
+    Rule-based parse of resume Markdown into ResumeJSON-shaped sections.
+
+    Every section gets a confidence in [0, 1]; callers send the sections
+    below their threshold (and headings the rules do not know) to the LLM.
+    """
+    segments = segment_resume(text)
+    for segment in segments:
+        if segment.name == "Header" and segment.heading is None:
+            _build_header(segment)
+        elif not segment.known:
+            # Unknown heading: shape it as text but leave it to the LLM
+            _build_text(segment)
+            segment.confidence = 0.3
+        elif segment.name == "Skills":
+            _build_skills(segment)
+        elif segment.name in ENTRY_SECTIONS:
+            _build_entries(segment)
+        else:
+            _build_text(segment)
+    return segments
+
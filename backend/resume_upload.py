@@ -0,0 +1,190 @@
+# resume_upload.py - Shared loading and LLM stages for resume uploads
+import asyncio
+import io
+import time
+import traceback
+from typing import Awaitable, Callable, NamedTuple, Optional, Tuple
+
+import pymupdf
+
+from parser.loader_pool import LOADER_MAX_PAGES, loader_pool
+from parser.loaders import load_resume, parse_pdf_to_md
+from parser.resume_parser_llm import parse_resume_markdown
+from parser.schemas import ResumeJSON
+from template_extractor_smart import (
+    convert_to_html_with_llm,
+    create_enhanced_html_fallback,
+    extract_detailed_from_docx,
+    extract_detailed_from_pdf_document,
+)
+from template_extractor_fast import TEMPLATE_EXTRACTOR, GeometricExtractionError, layout_to_html
+from template_index import TemplateIndex, layout_fingerprint
+
+
+# Called with (stage, state): stage is extract/parse/template/save, state is
+# running/done/failed
+StageCallback = Callable[[str, str], Awaitable[None]]
+
+
+async def report_stage(on_stage: Optional[StageCallback], stage: str, state: str):
+    if on_stage is not None:
+        await on_stage(stage, state)
+
+
+def clean_empty_sections(sections: list) -> list:
+    """Remove sections and subsections with empty data arrays"""
+    cleaned_sections = []
+    
+    for section in sections:
+        subsections = section.get('subsections', [])
+        
+        # Filter out subsections with empty data
+        cleaned_subsections = []
+        for subsection in subsections:
+            data = subsection.get('data', [])
+            # Only keep subsections with non-empty data
+            if data and len(data) > 0 and any(item.strip() for item in data if item):
+                cleaned_subsections.append(subsection)
+        
+        # Only add section if it has valid subsections
+        if cleaned_subsections:
+            section_copy = section.copy()
+            section_copy['subsections'] = cleaned_subsections
+            cleaned_sections.append(section_copy)
+    
+    return cleaned_sections
+
+
+class ExtractedTemplate(NamedTuple):
+    """
+    The upload's HTML template. extracted is False for the basic fallback
+    layout built when the LLM extraction failed: it still becomes the
+    user's template, but it is not indexed for other uploads of the layout
+    or stored with the upload for re-uploads.
+    """
+    html: Optional[str]
+    extracted: bool
+
+
+class LoadedResume:
+    """Everything both upload stages need, read from the upload once"""
+
+    def __init__(self, filename: str, markdown: str, text_content: str, layout_info: dict):
+        self.filename = filename
+        self.markdown = markdown
+        self.text_content = text_content
+        self.layout_info = layout_info
+        # Computed here so it runs in the loader worker with the rest of the load
+        self.fingerprint = layout_fingerprint(layout_info)
+
+
+def load_upload(content: bytes, filename: str, max_pages: Optional[int] = LOADER_MAX_PAGES) -> LoadedResume:
+    """
+    Read an uploaded resume for both the parser and the template extractor.
+
+    A PDF is opened once and both the Markdown and the layout are read from
+    that document in this thread (PyMuPDF documents must not be shared
+    across threads). Blocking; use load_upload_async from async code.
+    """
+    started = time.perf_counter()
+
+    if filename.lower().endswith(".pdf"):
+        with pymupdf.open(stream=content, filetype="pdf") as doc:
+            if max_pages is not None and doc.page_count > max_pages:
+                print(f"✂️ {filename} has {doc.page_count} pages, reading the first {max_pages}")
+                doc.select(list(range(max_pages)))
+            markdown = parse_pdf_to_md(doc)
+            text_content, layout_info = extract_detailed_from_pdf_document(doc)
+    else:
+        markdown = load_resume(content, filename)
+        text_content, layout_info = extract_detailed_from_docx(io.BytesIO(content))
+
+    print(f"⏱️ Loaded {filename} in {time.perf_counter() - started:.2f} seconds")
+    return LoadedResume(filename, markdown, text_content, layout_info)
+
+
+async def load_upload_async(content: bytes, filename: str) -> LoadedResume:
+    """load_upload in the loader process pool, off the API process's GIL"""
+    return await loader_pool.run(load_upload, content, filename, label=filename)
+
+
+async def extract_template(
+    loaded: LoadedResume,
+    on_stage: Optional[StageCallback] = None,
+    template_index: Optional[TemplateIndex] = None,
+) -> ExtractedTemplate:
+    """
+    HTML template for the upload; the upload still succeeds if extraction
+    fails, with the basic fallback layout. A layout already in
+    template_index reuses its compiled template without calling the LLM;
+    with TEMPLATE_EXTRACTOR=geometric a PDF's template is built from its
+    text positions.
+    """
+    await report_stage(on_stage, "template", "running")
+    if template_index is not None:
+        indexed = await template_index.lookup(loaded.fingerprint)
+        if indexed:
+            print(f"♻️ Reusing indexed template for layout {loaded.fingerprint[:12]}")
+            await report_stage(on_stage, "template", "done")
+            return ExtractedTemplate(indexed, True)
+    html = None
+    if TEMPLATE_EXTRACTOR == "geometric" and loaded.layout_info.get("pages"):
+        try:
+            html = await asyncio.to_thread(layout_to_html, loaded.layout_info)
+        except GeometricExtractionError as e:
+            print(f"⚠️ Geometric extraction failed, using the LLM: {e}")
+    if html is None:
+        try:
+            started = time.perf_counter()
+            html = await convert_to_html_with_llm(loaded.text_content, loaded.layout_info, fallback=False)
+            print(f"⏱️ HTML Extraction completed in {time.perf_counter() - started:.2f} seconds")
+            print(f"✅ Original HTML template extracted ({len(html)} chars)")
+        except Exception as template_error:
+            print(f"⚠️ Template extraction failed, using the basic layout: {template_error}")
+            traceback.print_exc()
+            await report_stage(on_stage, "template", "failed")
+            return ExtractedTemplate(create_enhanced_html_fallback(loaded.text_content, loaded.layout_info), False)
+    if template_index is not None:
+        await template_index.add(loaded.fingerprint, html)
+    await report_stage(on_stage, "template", "done")
+    return ExtractedTemplate(html, True)
+
+
+async def extract_and_parse(
+    content: bytes,
+    filename: str,
+    on_stage: Optional[StageCallback] = None,
+    template_index: Optional[TemplateIndex] = None,
+) -> Tuple[ResumeJSON, ExtractedTemplate]:
+    """
+    Run template extraction and LLM parsing of one upload concurrently.
+
+    Both stages are dominated by their LLM calls and neither needs the
+    other's output, so the upload takes as long as the slower stage rather
+    than the sum of both. A parse failure cancels the extraction.
+    """
+    await report_stage(on_stage, "extract", "running")
+    try:
+        loaded = await load_upload_async(content, filename)
+    except Exception:
+        await report_stage(on_stage, "extract", "failed")
+        raise
+    await report_stage(on_stage, "extract", "done")
+
+    template_task = asyncio.create_task(extract_template(loaded, on_stage, template_index))
+    try:
+        await report_stage(on_stage, "parse", "running")
+        started = time.perf_counter()
+        parsed = await parse_resume_markdown(loaded.markdown)
+        print(f"⏱️ LLM parsing completed in {time.perf_counter() - started:.2f} seconds")
+    except asyncio.CancelledError:
+        template_task.cancel()
+        raise
+    except Exception:
+        template_task.cancel()
+        await report_stage(on_stage, "parse", "failed")
+        raise
+    await report_stage(on_stage, "parse", "done")
+
+    template = await template_task
+    return parsed, template
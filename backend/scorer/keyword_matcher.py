@@ -2,6 +2,7 @@
 from pydantic import BaseModel
 from typing import List, Dict, Any
 from parser.llm_client import call_ollama
+from parser.llm_residency import model_residency
 import re
 
 class JDSkills(BaseModel):
@@ -15,12 +16,11 @@ class Recommendations(BaseModel):
     matching_strengths: List[str]
     suggested_actions: List[str]
 
-def extract_skills_from_jd(jd_text: str) -> List[str]:
-    """Uses Ollama to extract a clean list of skills from a JD."""
-    
-    prompt = f"""
+# Prompts keep their static instructions first and the per-request text last,
+# so Ollama can reuse the already-evaluated instruction prefix across calls
+JD_SKILLS_INSTRUCTIONS = """
     Extract a comprehensive list of technical skills, tools, technologies, frameworks, programming languages, 
-    certifications, and important keywords from the following Job Description.
+    certifications, and important keywords from the Job Description at the end of this prompt.
     
     Include:
     - Programming languages (Python, Java, JavaScript, etc.)
@@ -34,16 +34,67 @@ def extract_skills_from_jd(jd_text: str) -> List[str]:
     Return ONLY a JSON object with a single key 'skills' containing a list of strings.
     Each skill should be normalized (e.g., "AWS" not "Amazon Web Services", "ML" can be "Machine Learning").
     
+    Example response format:
+    {"skills": ["Python", "AWS", "Docker", "Machine Learning", "REST APIs"]}
+    
     Job Description:
-    {jd_text}
+"""
+
+RESUME_SKILLS_INSTRUCTIONS = """
+    Extract a comprehensive list of technical skills, tools, technologies, frameworks, programming languages,
+    and competencies from the resume text at the end of this prompt.
+    
+    Include:
+    - Programming languages
+    - Frameworks and libraries
+    - Tools and platforms
+    - Databases
+    - Methodologies
+    - Domain expertise
+    - Certifications
+    
+    Return ONLY a JSON object with a single key 'skills' containing a list of strings.
+    Be thorough and extract all mentioned technologies and skills.
     
     Example response format:
-    {{"skills": ["Python", "AWS", "Docker", "Machine Learning", "REST APIs"]}}
-    """
+    {"skills": ["Python", "FastAPI", "PostgreSQL", "Docker", "Machine Learning"]}
+    
+    Resume Text:
+"""
+
+RECOMMENDATIONS_INSTRUCTIONS = """
+    Analyze the job description and resume given at the end of this prompt to provide tailored recommendations.
+    
+    Provide specific, actionable recommendations in three categories:
+    
+    1. missing_keywords: List 3-5 critical missing keywords/skills that should be added to the resume
+    2. matching_strengths: List 2-3 specific strengths where the candidate's experience aligns well with the JD
+    3. suggested_actions: List 3-5 concrete actions the candidate should take to improve their resume for this role
+    
+    Be specific and actionable. Reference actual technologies and experiences from the resume.
+    
+    Return ONLY a JSON object with these three keys as lists of strings.
+    
+    Example format:
+    {
+        "missing_keywords": ["AWS Lambda", "CI/CD pipelines", "Agile methodology"],
+        "matching_strengths": ["Strong Python experience aligns with backend requirements", "Docker and Kubernetes experience matches DevOps needs"],
+        "suggested_actions": ["Quantify achievements in ML projects with metrics", "Add certifications section if you have AWS certifications", "Emphasize leadership in team projects"]
+    }
+"""
+
+model_residency.register_prefix("jd_skills", JD_SKILLS_INSTRUCTIONS)
+model_residency.register_prefix("resume_skills", RESUME_SKILLS_INSTRUCTIONS)
+model_residency.register_prefix("recommendations", RECOMMENDATIONS_INSTRUCTIONS)
+
+async def extract_skills_from_jd(jd_text: str) -> List[str]:
+    """Uses Ollama to extract a clean list of skills from a JD."""
+    
+    prompt = f"{JD_SKILLS_INSTRUCTIONS}{jd_text}\n"
     
     try:
         print("🤖 Calling Ollama to extract JD skills...")
-        response = call_ollama(prompt=prompt, format_model=JDSkills)
+        response = await call_ollama(prompt=prompt, format_model=JDSkills, call_site="jd_skills")
         extracted = JDSkills.model_validate_json(response)
         
         # Normalize skills to lowercase for comparison
@@ -57,35 +108,14 @@ def extract_skills_from_jd(jd_text: str) -> List[str]:
         # Fallback: simple keyword extraction
         return fallback_skill_extraction(jd_text)
 
-def extract_skills_from_text(resume_text: str) -> List[str]:
+async def extract_skills_from_text(resume_text: str) -> List[str]:
     """Uses Ollama to extract skills from resume text."""
     
-    prompt = f"""
-    Extract a comprehensive list of technical skills, tools, technologies, frameworks, programming languages,
-    and competencies from the following resume text.
-    
-    Include:
-    - Programming languages
-    - Frameworks and libraries
-    - Tools and platforms
-    - Databases
-    - Methodologies
-    - Domain expertise
-    - Certifications
-    
-    Return ONLY a JSON object with a single key 'skills' containing a list of strings.
-    Be thorough and extract all mentioned technologies and skills.
-    
-    Resume Text:
-    {resume_text}
-    
-    Example response format:
-    {{"skills": ["Python", "FastAPI", "PostgreSQL", "Docker", "Machine Learning"]}}
-    """
+    prompt = f"{RESUME_SKILLS_INSTRUCTIONS}{resume_text}\n"
     
     try:
         print("🤖 Calling Ollama to extract resume skills...")
-        response = call_ollama(prompt=prompt, format_model=ResumeSkills)
+        response = await call_ollama(prompt=prompt, format_model=ResumeSkills, call_site="resume_skills")
         extracted = ResumeSkills.model_validate_json(response)
         
         # Normalize skills to lowercase
@@ -166,7 +196,7 @@ def compare_skills(candidate_skills: List[str], jd_skills: List[str]) -> Dict[st
     
     return result
 
-def generate_recommendations(
+async def generate_recommendations(
     jd_text: str,
     matched_skills: List[str],
     missing_skills: List[str],
@@ -174,9 +204,7 @@ def generate_recommendations(
 ) -> Dict[str, List[str]]:
     """Generate tailored recommendations using LLM"""
     
-    prompt = f"""
-    Analyze the job description and resume to provide tailored recommendations.
-    
+    prompt = f"""{RECOMMENDATIONS_INSTRUCTIONS}
     Job Description (excerpt):
     {jd_text[:1000]}
     
@@ -185,28 +213,11 @@ def generate_recommendations(
     
     Resume Text (excerpt):
     {resume_text[:1000]}
-    
-    Provide specific, actionable recommendations in three categories:
-    
-    1. missing_keywords: List 3-5 critical missing keywords/skills that should be added to the resume
-    2. matching_strengths: List 2-3 specific strengths where the candidate's experience aligns well with the JD
-    3. suggested_actions: List 3-5 concrete actions the candidate should take to improve their resume for this role
-    
-    Be specific and actionable. Reference actual technologies and experiences from the resume.
-    
-    Return ONLY a JSON object with these three keys as lists of strings.
-    
-    Example format:
-    {{
-        "missing_keywords": ["AWS Lambda", "CI/CD pipelines", "Agile methodology"],
-        "matching_strengths": ["Strong Python experience aligns with backend requirements", "Docker and Kubernetes experience matches DevOps needs"],
-        "suggested_actions": ["Quantify achievements in ML projects with metrics", "Add certifications section if you have AWS certifications", "Emphasize leadership in team projects"]
-    }}
     """
     
     try:
         print("💡 Generating recommendations with LLM...")
-        response = call_ollama(prompt=prompt, format_model=Recommendations)
+        response = await call_ollama(prompt=prompt, format_model=Recommendations, call_site="recommendations")
         recommendations = Recommendations.model_validate_json(response)
         
         result = {
@@ -237,7 +248,7 @@ def generate_recommendations(
         }
 
 # Example usage for testing
-if __name__ == "__main__":
+async def _demo():
     job_description = """
     We are looking for a Senior Backend Engineer proficient in Python and Go. 
     Experience with AWS services (Lambda, S3, EC2), PostgreSQL, and FastAPI is required. 
@@ -258,11 +269,11 @@ if __name__ == "__main__":
     print("=" * 80)
     
     print("\n1. Extracting skills from JD...")
-    jd_skills = extract_skills_from_jd(job_description)
+    jd_skills = await extract_skills_from_jd(job_description)
     print(f"   JD Skills: {jd_skills}")
     
     print("\n2. Extracting skills from Resume...")
-    candidate_skills = extract_skills_from_text(resume_text)
+    candidate_skills = await extract_skills_from_text(resume_text)
     print(f"   Resume Skills: {candidate_skills}")
     
     print("\n3. Comparing skills...")
@@ -272,7 +283,7 @@ if __name__ == "__main__":
     print(f"   📊 Match Score: {results['match_percentage']}%")
     
     print("\n4. Generating recommendations...")
-    recommendations = generate_recommendations(
+    recommendations = await generate_recommendations(
         jd_text=job_description,
         matched_skills=results['matched'],
         missing_skills=results['missing'],
@@ -284,4 +295,8 @@ if __name__ == "__main__":
     print(f"   Matching Strengths: {recommendations['matching_strengths']}")
     print(f"   Suggested Actions: {recommendations['suggested_actions']}")
     
-    print("\n" + "=" * 80)
\ No newline at end of file
+    print("\n" + "=" * 80)
+
+if __name__ == "__main__":
+    import asyncio
+    asyncio.run(_demo())
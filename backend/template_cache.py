@@ -0,0 +1,98 @@
+# template_cache.py - Process-level cache of parsed/analysed templates
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Rough upper bound on the memory held by cached templates; least recently
+# used entries are evicted past it
+TEMPLATE_CACHE_MAX_BYTES = int(os.getenv("TEMPLATE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Analysed templates hold parsed structure next to their HTML strings
+SIZE_OVERHEAD = 4
+
+
+def content_hash(*parts: Optional[str]) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update((part or "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class TemplateCache:
+    """
+    LRU of values derived from a template (its analysed render plan, the
+    prepared page shell, the enhanced CSS), keyed by what was built, the
+    resume_templates _id and a hash of the content it was built from. A
+    template edited in place gets a new hash, so stale entries are never
+    served; they just age out.
+    """
+
+    def __init__(self, max_bytes: int = TEMPLATE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get_or_build(
+        self,
+        kind: str,
+        template_id: Optional[str],
+        content: str,
+        build: Callable[[], Any],
+        size: Optional[int] = None,
+    ) -> Any:
+        """
+        The cached value for (kind, template_id, content), calling build()
+        on a miss. size is the entry's approximate footprint in bytes,
+        defaulting to a multiple of the content length.
+        """
+        if not self.enabled:
+            return build()
+        key = (kind, template_id or "", content_hash(content))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[0]
+            self.stats["misses"] += 1
+
+        # Built outside the lock; two threads missing at once both build,
+        # which is cheaper than serialising every render behind one parse
+        value = build()
+        size = size if size is not None else len(content) * SIZE_OVERHEAD
+        if size > self.max_bytes:
+            return value
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (value, size)
+                self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.stats["evictions"] += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        stats["max_bytes"] = self.max_bytes
+        return stats
+
+
+template_cache = TemplateCache()
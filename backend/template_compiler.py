@@ -0,0 +1,497 @@
+# template_compiler.py - Slot-annotated resume templates and a deterministic renderer
+"""
+A compiled template is the extracted HTML template with `data-slot`
+attributes marking where profile data goes:
+
+    name            element whose text is the person's name
+    contact         container of the contact line; its first child marked
+                    contact-item is cloned once per email/phone/link
+    section         one resume section (cloned per profile section)
+    section-title   the section heading
+    entry           one subsection inside a section (cloned per subsection)
+    entry-title     the subsection heading (removed when a subsection has none)
+    items           container of the subsection's lines
+    item            prototype line, cloned once per data item
+
+The extraction prompt asks the LLM to add these attributes once, when the
+template is created; compile_template fills in whatever it left out from
+the template's structure and strips the uploader's own text, so every
+later fill is a local render instead of a full LLM generation.
+"""
+import html
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, Comment, NavigableString, Tag
+from bs4.element import PreformattedString
+
+from resume_parser import EMAIL_RE, HEADING_TO_SECTION, PHONE_RES
+from template_cache import template_cache
+
+SLOT = "data-slot"
+# Heading text of the section a prototype was compiled from
+SLOT_SECTION = "data-slot-section"
+# Stored with compiled templates; bump when compilation changes
+COMPILED_TEMPLATE_VERSION = 2
+
+HEADINGS = ["h1", "h2", "h3", "h4", "h5", "h6"]
+URL_RE = re.compile(r'(?:https?://|www\.)\S+|\b(?:linkedin|github)\.com/\S+', re.IGNORECASE)
+PLACEHOLDER_RE = re.compile(r'\{\{\s*([A-Za-z_]+)\s*\}\}')
+CONTACT_SEPARATOR_RE = re.compile(r'\s*(\||•|·|◦|—|–)\s*')
+HEADER_SECTIONS = {"name", "contact information", "contact", "links", "personal information"}
+# Elements whose text is styling, not content
+STYLE_ELEMENTS = ("style",)
+# Attributes that can carry the uploader's details (profile links, photo
+# captions, tooltips)
+TEXT_ATTRS = ("href", "title", "alt", "aria-label", "value", "placeholder")
+# Meta tags that describe the page rather than the person
+KEPT_META_NAMES = {"viewport"}
+
+
+class TemplateCompileError(Exception):
+    """Raised when a template has no structure a renderer could fill"""
+
+
+def _slot(soup, name: str) -> List[Tag]:
+    return soup.find_all(attrs={SLOT: name})
+
+
+def _canonical(section_name: str) -> str:
+    key = re.sub(r'\s+', ' ', re.sub(r'[^a-z ]', ' ', section_name.lower().replace('&', ' and '))).strip()
+    return HEADING_TO_SECTION.get(key, key)
+
+
+def _is_contact_text(text: str) -> bool:
+    return bool(EMAIL_RE.search(text) or URL_RE.search(text) or any(p.search(text) for p in PHONE_RES))
+
+
+def _mark_header(soup: BeautifulSoup, first_section: Optional[Tag]):
+    """Name and contact slots, from placeholders or the text above the first section"""
+    if not _slot(soup, "name"):
+        placeholder = soup.find(string=re.compile(r'\{\{\s*NAME\s*\}\}', re.IGNORECASE))
+        target = placeholder.parent if placeholder is not None else soup.find("h1")
+        if target is not None:
+            target[SLOT] = "name"
+
+    if _slot(soup, "contact"):
+        return
+    header = soup.find(class_="resume-header")
+    if header is None:
+        name = _slot(soup, "name")
+        header = name[0].parent if name else None
+    if header is None or (first_section is not None and header in first_section.parents):
+        return
+
+    # The first element under the name holding contact details becomes the contact line
+    for element in header.find_all(True):
+        if element.get(SLOT) or element.find(attrs={SLOT: True}):
+            continue
+        text = element.get_text(" ", strip=True)
+        if text and (_is_contact_text(text) or PLACEHOLDER_RE.search(text)):
+            if any(_is_contact_text(c.get_text(" ", strip=True)) for c in element.find_all(True)):
+                continue  # a more specific descendant will match
+            line = element
+            if line.name in ("a", "span") and line.parent is not header:
+                line = line.parent
+            separator = CONTACT_SEPARATOR_RE.search(line.get_text(" "))
+            line[SLOT] = "contact"
+            line["data-slot-separator"] = separator.group(1) if separator else "|"
+            prototype = soup.new_tag("span")
+            prototype[SLOT] = "contact-item"
+            line.clear()
+            line.append(prototype)
+            break
+
+    _strip_unslotted(header)
+
+
+def _section_elements(soup: BeautifulSoup) -> List[Tag]:
+    marked = _slot(soup, "section")
+    if marked:
+        return marked
+    sections = soup.find_all(class_="resume-section")
+    if sections:
+        return sections
+
+    # No wrappers: group each h2 with its following siblings
+    grouped = []
+    for heading in soup.find_all("h2"):
+        wrapper = soup.new_tag("div")
+        heading.insert_before(wrapper)
+        node = heading
+        while node is not None:
+            following = node.next_sibling
+            wrapper.append(node.extract())
+            node = following
+            if isinstance(node, Tag) and node.name in ("h1", "h2"):
+                break
+        grouped.append(wrapper)
+    return grouped
+
+
+def _mark_section(soup: BeautifulSoup, section: Tag):
+    section[SLOT] = "section"
+    title = section.find(attrs={SLOT: "section-title"}) or section.find(HEADINGS)
+    if title is None:
+        raise TemplateCompileError("Section without a heading")
+    title[SLOT] = "section-title"
+    # An already compiled template has an emptied title but keeps its key
+    section[SLOT_SECTION] = title.get_text(" ", strip=True) or section.get(SLOT_SECTION, "")
+
+    entries = _slot(section, "entry")
+    if not entries:
+        entries = _group_entries(soup, section, title)
+    for entry in entries[1:]:
+        entry.decompose()
+    entry = entries[0]
+    entry[SLOT] = "entry"
+
+    entry_title = entry.find(attrs={SLOT: "entry-title"})
+    if entry_title is None:
+        entry_title = entry.find(["h3", "h4", "h5", "h6"])
+        if entry_title is not None:
+            entry_title[SLOT] = "entry-title"
+
+    items = entry.find(attrs={SLOT: "items"})
+    if items is None:
+        items = entry.find(["ul", "ol"])
+        if items is not None:
+            items[SLOT] = "items"
+    if items is None:
+        # Prose section: the paragraph's parent holds the lines
+        paragraph = entry.find(["p", "li", "span", "div"], string=True) or entry.find("p")
+        if paragraph is None:
+            paragraph = soup.new_tag("p")
+            entry.append(paragraph)
+        paragraph[SLOT] = "item"
+        items = paragraph.parent
+        if items is entry:
+            items = soup.new_tag("div")
+            paragraph.wrap(items)
+        items[SLOT] = "items"
+
+    item = items.find(attrs={SLOT: "item"}) or items.find("li") or items.find(True)
+    if item is None:
+        item = soup.new_tag("li" if items.name in ("ul", "ol") else "p")
+        items.append(item)
+    item[SLOT] = "item"
+    # Keep only the prototype line, emptied
+    for child in list(items.children):
+        if child is not item:
+            child.extract()
+    item.clear()
+    if entry_title is not None:
+        entry_title.clear()
+    title.clear()
+    _strip_unslotted(section)
+
+
+def _strip_unslotted(container: Tag):
+    """
+    Remove the uploader's own text around the slots (company lines, dates,
+    a headline under the name): text-bearing elements that neither are nor
+    hold a slot, and bare text. Empty decoration (rules, dividers, icons)
+    and stylesheets stay. Slot elements have been emptied already.
+    """
+    for element in list(container.find_all(True)):
+        if element.decomposed or element.name in STYLE_ELEMENTS or element.get(SLOT):
+            continue
+        if element.find(attrs={SLOT: True}) is not None or element.find(STYLE_ELEMENTS) is not None:
+            continue
+        if element.get_text(strip=True):
+            element.decompose()
+    for text in list(container.find_all(string=True)):
+        if isinstance(text, PreformattedString) or text.parent.name in STYLE_ELEMENTS:
+            continue
+        if text.strip():
+            text.replace_with("")
+
+
+def _strip_document(soup: BeautifulSoup):
+    """
+    Remove what is left of the source resume outside the header and
+    sections: the <title>, meta descriptions, comments, scripts, a summary
+    or footer outside any section, images and text-bearing attributes.
+    Compiled templates are shared between users with the same layout
+    (template_index), so only markup and styling may remain.
+    """
+    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+        comment.extract()
+    for element in soup.find_all(["script", "noscript", "img", "title"]):
+        element.decompose()
+    for meta in soup.find_all("meta"):
+        if not (meta.get("charset") or meta.get("http-equiv") or meta.get("name", "").lower() in KEPT_META_NAMES):
+            meta.decompose()
+    _strip_unslotted(soup)
+    for element in soup.find_all(True):
+        if element.name == "link":
+            continue  # stylesheets and web fonts
+        for attr in TEXT_ATTRS:
+            if attr in element.attrs:
+                del element[attr]
+
+
+def _group_entries(soup: BeautifulSoup, section: Tag, title: Tag) -> List[Tag]:
+    """Entry elements of a section without data-slot="entry" markup"""
+    content = [c for c in section.children if isinstance(c, Tag) and c is not title and title not in c.descendants]
+    # Wrapped entries: children that each contain a sub-heading
+    wrapped = [c for c in content if c.find(["h3", "h4"]) is not None]
+    if wrapped:
+        return wrapped
+
+    # Flat entries: h3 followed by its lines, or everything under the title
+    starts = [c for c in content if c.name in ("h3", "h4")] or content[:1]
+    if not starts:
+        wrapper = soup.new_tag("div")
+        section.append(wrapper)
+        return [wrapper]
+    entries = []
+    for start in starts:
+        wrapper = soup.new_tag("div")
+        start.insert_before(wrapper)
+        node = start
+        while node is not None:
+            following = node.next_sibling
+            wrapper.append(node.extract())
+            node = following
+            if isinstance(node, Tag) and node in starts:
+                break
+        entries.append(wrapper)
+    return entries
+
+
+def compile_template(html_template: str) -> str:
+    """
+    Slot-annotate an extracted HTML template.
+
+    Slots the LLM already marked are kept; the rest are inferred from the
+    structure the extraction prompt asks for (resume-header / resume-section
+    wrappers, h1 name, h2 sections, h3 entries, lists). Each section is
+    reduced to one empty entry prototype, and no text of the source resume
+    is left outside the stylesheet. Raises TemplateCompileError when there
+    is nothing to render into.
+    """
+    soup = BeautifulSoup(html_template, "html.parser")
+    sections = _section_elements(soup)
+    if not sections:
+        raise TemplateCompileError("Template has no sections")
+
+    _mark_header(soup, sections[0])
+    for section in sections:
+        _mark_section(soup, section)
+
+    # The name slot only holds the name
+    for name in _slot(soup, "name"):
+        name.clear()
+    _strip_document(soup)
+    return str(soup)
+
+
+# Private-use characters mark where rendered content goes in a plan's HTML
+MARK = "\ue000"
+
+
+def _mark(name: str) -> str:
+    return f"{MARK}{name}{MARK}"
+
+
+def _strip_slot_attrs(root):
+    elements = [root] if isinstance(root, Tag) and root.get(SLOT) else []
+    for element in elements + root.find_all(attrs={SLOT: True}):
+        for attr in (SLOT, SLOT_SECTION, "data-slot-separator"):
+            if attr in element.attrs:
+                del element[attr]
+
+
+def _open_close(element: Tag) -> Tuple[str, str]:
+    """The element's start and end tags, to wrap rendered text in"""
+    element.clear()
+    element.append(NavigableString(_mark("body")))
+    opening, closing = str(element).split(_mark("body"))
+    return opening, closing
+
+
+class SectionPlan:
+    """One section prototype, serialized around its title/entry markers"""
+
+    def __init__(self, section: Tag):
+        self.key = _canonical(section.get(SLOT_SECTION, ""))
+        entry = section.find(attrs={SLOT: "entry"})
+        entry_title = entry.find(attrs={SLOT: "entry-title"})
+        self.titled = entry_title is not None
+        self.entry_title = None
+        if entry_title is not None:
+            entry_title.replace_with(NavigableString(_mark("entry-title")))
+            _strip_slot_attrs(entry_title)
+            self.entry_title = _open_close(entry_title)
+
+        items = entry.find(attrs={SLOT: "items"})
+        item = items.find(attrs={SLOT: "item"}).extract()
+        _strip_slot_attrs(item)
+        self.item = _open_close(item)
+        items.clear()
+        items.append(NavigableString(_mark("items")))
+
+        entry.replace_with(NavigableString(_mark("entries")))
+        _strip_slot_attrs(entry)
+        self.entry_html = str(entry)
+
+        for title in _slot(section, "section-title"):
+            title.clear()
+            title.append(NavigableString(_mark("title")))
+        _strip_slot_attrs(section)
+        self.html = PLACEHOLDER_RE.sub("", str(section))
+
+
+class TemplatePlan:
+    """
+    A compiled template analysed once for rendering: the page around the
+    slots and each prototype serialized to strings with markers, so a
+    render is string assembly with no HTML parsing.
+    """
+
+    def __init__(self, compiled_template: str):
+        soup = BeautifulSoup(compiled_template, "html.parser")
+
+        for element in _slot(soup, "name"):
+            element.clear()
+            element.append(NavigableString(_mark("name")))
+
+        self.contact_item = None
+        self.separator = "|"
+        for line in _slot(soup, "contact"):
+            prototype = line.find(attrs={SLOT: "contact-item"})
+            if prototype is None:
+                continue
+            prototype = prototype.extract()
+            _strip_slot_attrs(prototype)
+            self.contact_item = _open_close(prototype)
+            self.separator = line.get("data-slot-separator", "|")
+            line.clear()
+            line.append(NavigableString(_mark("contact")))
+
+        prototypes = _slot(soup, "section")
+        if not prototypes:
+            raise TemplateCompileError("Compiled template has no section slots")
+        prototypes[0].insert_before(NavigableString(_mark("sections")))
+        self.sections = [SectionPlan(prototype.extract()) for prototype in prototypes]
+
+        _strip_slot_attrs(soup)
+        # Leftover contact placeholders from the extraction prompt
+        self.page = PLACEHOLDER_RE.sub("", str(soup))
+
+    @property
+    def size(self) -> int:
+        parts = [self.page] + [s.html + s.entry_html for s in self.sections]
+        return sum(len(part) for part in parts)
+
+    def pick_section(self, section: dict) -> SectionPlan:
+        wanted = _canonical(section.get("section_name", ""))
+        for plan in self.sections:
+            if plan.key == wanted:
+                return plan
+        # Otherwise the first prototype shaped like this section: with entry
+        # headings for titled subsections, without for a plain list
+        titled = any(
+            s.get("title") and s.get("title", "").strip().lower() != section.get("section_name", "").strip().lower()
+            for s in section.get("subsections", [])
+        )
+        for plan in self.sections:
+            if plan.titled == titled:
+                return plan
+        return self.sections[0]
+
+
+def _contact_html(plan: TemplatePlan, value: str) -> str:
+    url = URL_RE.search(value)
+    if url or EMAIL_RE.fullmatch(value.strip()):
+        href = value.strip() if not url else url.group(0)
+        if EMAIL_RE.fullmatch(href):
+            href = f"mailto:{href}"
+        elif not href.startswith("http"):
+            href = f"https://{href}"
+        body = f'<a href="{html.escape(href)}">{html.escape(value, quote=False)}</a>'
+    else:
+        body = html.escape(value, quote=False)
+    opening, closing = plan.contact_item
+    return f"{opening}{body}{closing}"
+
+
+def _split_profile(profile_data: Dict[str, Any]) -> Tuple[str, List[str], List[dict]]:
+    name, contact, body = "", [], []
+    for section in profile_data.get("sections", []):
+        key = section.get("section_name", "").strip().lower()
+        if key in HEADER_SECTIONS:
+            for subsection in section.get("subsections", []):
+                data = [d.strip() for d in subsection.get("data", []) if d and d.strip()]
+                if key == "name":
+                    name = name or (data[0] if data else subsection.get("title", ""))
+                else:
+                    contact.extend(d for d in data if d not in contact)
+        else:
+            body.append(section)
+    return name, contact, body
+
+
+def _render_section(plan: SectionPlan, section: dict) -> str:
+    section_name = section.get("section_name", "")
+    entries = []
+    for subsection in section.get("subsections", []):
+        title = (subsection.get("title") or "").strip()
+        data = [d for d in subsection.get("data", []) if d and d.strip()]
+        if not data and not title:
+            continue
+        title_html = ""
+        if plan.entry_title is not None and title and title.lower() != section_name.strip().lower():
+            opening, closing = plan.entry_title
+            title_html = f"{opening}{html.escape(title, quote=False)}{closing}"
+            # A one-line entry carries its title as its only line
+            data = [d for d in data if d.strip() != title]
+        opening, closing = plan.item
+        items_html = "".join(f"{opening}{html.escape(value, quote=False)}{closing}" for value in data)
+        entries.append(
+            plan.entry_html.replace(_mark("entry-title"), title_html).replace(_mark("items"), items_html)
+        )
+    return plan.html.replace(_mark("title"), html.escape(section_name, quote=False)).replace(
+        _mark("entries"), "".join(entries)
+    )
+
+
+def analyse_template(compiled_template: str) -> TemplatePlan:
+    return TemplatePlan(compiled_template)
+
+
+def render_plan(plan: TemplatePlan, profile_data: Dict[str, Any]) -> str:
+    """Fill an analysed template with profile data"""
+    name, contact, body = _split_profile(profile_data)
+    contact_html = ""
+    if plan.contact_item is not None:
+        contact_html = f" {html.escape(plan.separator, quote=False)} ".join(_contact_html(plan, v) for v in contact)
+    sections_html = "".join(_render_section(plan.pick_section(section), section) for section in body)
+    return (
+        plan.page.replace(_mark("name"), html.escape(name, quote=False))
+        .replace(_mark("contact"), contact_html)
+        .replace(_mark("sections"), sections_html)
+    )
+
+
+def render_template(compiled_template: str, profile_data: Dict[str, Any], template_id: Optional[str] = None) -> str:
+    """
+    Fill a compiled template with profile data; no LLM involved. The
+    analysed plan is cached per template, so repeat renders skip parsing.
+    """
+    plan = template_cache.get_or_build(
+        "plan", template_id, compiled_template, lambda: analyse_template(compiled_template)
+    )
+    return render_plan(plan, profile_data)
+
+
+def compiled_template_fields(html_template: Optional[str]) -> Dict[str, Any]:
+    """resume_templates fields holding the compiled form of an extracted template"""
+    compiled = None
+    if html_template:
+        try:
+            compiled = compile_template(html_template)
+        except Exception as e:
+            print(f"⚠️ Template could not be compiled, fills will use the LLM: {e}")
+    return {"compiled_template": compiled, "compiled_version": COMPILED_TEMPLATE_VERSION}
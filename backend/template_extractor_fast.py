@@ -0,0 +1,505 @@
+# template_extractor_fast.py - Geometric PDF to HTML template extraction, no LLM
+"""
+Rebuilds a resume's layout from the positioned text spans the PDF
+loaders already collect (layout_info from extract_detailed_from_pdf or
+extract_detailed_from_pdf_document):
+
+    spans -> columns    vertical gutters that (almost) no text crosses
+    spans -> lines      spans whose vertical centres line up
+    lines -> blocks     runs of lines separated by extra vertical space
+    lines -> markup     name, contact lines, h2 sections, h3 entries, lists
+
+The geometry runs on numpy arrays one page at a time, so a page costs
+milliseconds however many spans it holds. Each distinct font, size and
+colour becomes one CSS class rather than an inline style per word, and
+the markup has the structure compile_template expects (resume-header,
+resume-section, h1/h2/h3, ul/li).
+"""
+import html
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from resume_parser import BULLET_RE, HEADING_TO_SECTION
+from template_extractor_smart import extract_detailed_from_pdf
+from template_index import FONT_SUBSET_RE
+
+# llm: templates are generated by the LLM; geometric: PDFs are converted
+# here (DOCX uploads and PDFs without section headings still use the LLM)
+TEMPLATE_EXTRACTOR = os.getenv("TEMPLATE_EXTRACTOR", "llm").lower()
+
+# Spans whose vertical centres are closer than this share of their height
+# are on the same line
+LINE_TOLERANCE = 0.5
+# Gaps wider than this many font sizes split a line into segments (a role
+# and its right-aligned dates)
+SEGMENT_GAP = 1.5
+# Gaps wider than this many font sizes get a space between spans
+WORD_GAP = 0.15
+# A vertical strip at least this many points wide that at most this share
+# of spans cross separates columns; each column holds at least
+# COLUMN_MIN_SHARE of the page's spans
+GUTTER_MIN_WIDTH = 14
+GUTTER_CROSSING_SHARE = 0.04
+COLUMN_MIN_SHARE = 0.15
+# Vertical space this many times the usual line gap starts a new block
+BLOCK_GAP_RATIO = 1.6
+# Relative to the body text size
+NAME_SIZE_RATIO = 1.3
+HEADING_SIZE_RATIO = 1.12
+HEADING_MAX_WORDS = 5
+# A line ending within this many font sizes of its region's right edge
+# wrapped onto the next one
+WRAP_MARGIN = 4
+
+BOLD_RE = re.compile(r"bold|black|heavy|semibold|demi|cmbx", re.IGNORECASE)
+ITALIC_RE = re.compile(r"italic|oblique|cmti|-it$", re.IGNORECASE)
+SERIF_RE = re.compile(r"times|serif|roman|georgia|garamond|cambria|palatino|minion|^cm|^lmroman", re.IGNORECASE)
+FAMILY_SUFFIX_RE = re.compile(r"(?:PS)?MT$|PS$")
+LINK_RE = re.compile(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}|(?:https?://|www\.)[^\s<>"]+')
+# Symbol fonts map their bullets into the private use area
+GLUED_BULLETS = "•◦▪▫●○■□·‣⁃►▸➢✓\ue000-\uf8ff"
+BULLET_GLYPHS = GLUED_BULLETS + "–\\-*"
+# A glyph with no Unicode mapping, as pdfplumber reports it; at the start of
+# a line it is a symbol-font bullet ("(cid:127)Built ...")
+CID_GLYPH = r"\(cid:\d+\)"
+# A bullet starting the first span of a line; dashes only count with a
+# space after them ("-based" is a word)
+BULLET_START_RE = re.compile(rf"^\s*(?:(?:[{GLUED_BULLETS}]|{CID_GLYPH})\s*|[{BULLET_GLYPHS}]\s+)")
+
+
+class GeometricExtractionError(Exception):
+    """Raised when a PDF's layout has no structure to build a template from"""
+
+
+def _is_bullet_glyph(text: str) -> bool:
+    return re.fullmatch(f"[{BULLET_GLYPHS}]|{CID_GLYPH}", text) is not None
+
+
+def _linkify(escaped: str) -> str:
+    def link(match):
+        target = match.group(0)
+        href = f"mailto:{target}" if "@" in target and "/" not in target else target
+        if href.startswith("www."):
+            href = f"https://{href}"
+        return f'<a href="{href}">{target}</a>'
+
+    return LINK_RE.sub(link, escaped)
+
+
+def _style_css(style: Tuple[str, float, int]) -> str:
+    font, size, color = style
+    family = FAMILY_SUFFIX_RE.sub("", re.split(r"[-,]", font)[0]) or "Arial"
+    generic = "serif" if SERIF_RE.search(font) else "sans-serif"
+    weight = "700" if BOLD_RE.search(font) else "400"
+    italic = "italic " if ITALIC_RE.search(font) else ""
+    css = f"font:{italic}{weight} {size:g}pt/1.25 '{family}',{generic}"
+    if color:
+        css += f";color:#{color:06x}"
+    return css
+
+
+class Line:
+    """One visual line: its box, dominant style and rendered runs"""
+
+    def __init__(self, top: float, bottom: float, x1: float, size: float, style: int, bold: bool,
+                 text: str, inner_html: str, bullet: bool, segments: int, wraps: bool):
+        self.top = top
+        self.bottom = bottom
+        self.x1 = x1
+        self.size = size
+        self.style = style
+        self.bold = bold
+        self.text = text
+        self.inner_html = inner_html
+        self.bullet = bullet
+        self.segments = segments
+        self.wraps = wraps
+        self.new_block = False
+        self.kind = "text"
+
+
+class _Page:
+    """Span arrays of one page and the geometry on them"""
+
+    def __init__(self, page: Dict[str, Any], styles: Dict[tuple, int]):
+        elements = [e for e in page.get("elements", []) if e.get("text", "").strip()]
+        self.width = float(page.get("width") or 612)
+        self.texts = [e["text"] for e in elements]
+        self.x0 = np.array([e.get("x0", 0) for e in elements], dtype=float)
+        self.y0 = np.array([e.get("y0", 0) for e in elements], dtype=float)
+        self.x1 = np.array([e.get("x1", 0) for e in elements], dtype=float)
+        self.y1 = np.array([e.get("y1", 0) for e in elements], dtype=float)
+        self.size = np.array([round(float(e.get("size") or 0) * 2) / 2 for e in elements], dtype=float)
+        self.chars = np.array([len(t.strip()) for t in self.texts], dtype=float)
+        keys = [(FONT_SUBSET_RE.sub("", e.get("fontname") or ""), s, e.get("color") or 0)
+                for e, s in zip(elements, self.size)]
+        self.style = np.array([styles.setdefault(k, len(styles)) for k in keys], dtype=int)
+        self.bold = np.array([bool(BOLD_RE.search(k[0])) for k in keys], dtype=bool)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def columns(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Split points between columns, and the column of each span (-1 for spans crossing a gutter)"""
+        n = len(self)
+        left, right = int(self.x0.min()), int(np.ceil(self.x1.max()))
+        bins = right + 2
+        # Number of spans covering each point across the page
+        delta = np.zeros(bins, dtype=np.int32)
+        np.add.at(delta, np.floor(self.x0).astype(int).clip(0, bins - 1), 1)
+        np.add.at(delta, np.ceil(self.x1).astype(int).clip(0, bins - 1), -1)
+        coverage = np.cumsum(delta)
+
+        inner = (right - left) // 10
+        empty = coverage[left + inner:right - inner] <= max(2, GUTTER_CROSSING_SHARE * n)
+        edges = np.flatnonzero(np.diff(np.concatenate([[0], empty.astype(np.int8), [0]])))
+        starts, ends = edges[::2], edges[1::2]
+        wide = (ends - starts) >= GUTTER_MIN_WIDTH
+        splits = list((starts[wide] + ends[wide]) / 2 + left + inner)
+
+        centres = (self.x0 + self.x1) / 2
+        # Drop splits next to columns too small to be one (a column of dates)
+        while splits:
+            counts = np.bincount(np.searchsorted(splits, centres), minlength=len(splits) + 1)
+            smallest = int(counts.argmin())
+            if counts[smallest] >= COLUMN_MIN_SHARE * n:
+                break
+            splits.pop(min(smallest, len(splits) - 1))
+
+        splits = np.array(splits, dtype=float)
+        column = np.searchsorted(splits, centres)
+        if len(splits):
+            crossing = ((self.x0[:, None] < splits - 1) & (self.x1[:, None] > splits + 1)).any(axis=1)
+            column[crossing] = -1
+        return splits, column
+
+    def lines(self, idx: np.ndarray) -> List[Line]:
+        """Group spans into lines, top to bottom, each read left to right"""
+        if not len(idx):
+            return []
+        centre = (self.y0[idx] + self.y1[idx]) / 2
+        height = np.maximum(self.y1[idx] - self.y0[idx], 1.0)
+        order = np.argsort(centre, kind="stable")
+        breaks = np.diff(centre[order]) > LINE_TOLERANCE * np.minimum(height[order][:-1], height[order][1:])
+        line_of = np.concatenate([[0], np.cumsum(breaks)])
+        members = idx[order][np.lexsort((self.x0[idx[order]], line_of))]
+        bounds = np.flatnonzero(np.diff(line_of)) + 1
+        right = float(self.x1[idx].max())
+        lines = [self._line(group, right) for group in np.split(members, bounds)]
+
+        # Blocks: extra vertical space before a line
+        if len(lines) > 1:
+            tops = np.array([l.top for l in lines])
+            bottoms = np.array([l.bottom for l in lines])
+            gaps = tops[1:] - bottoms[:-1]
+            positive = gaps[gaps > 0]
+            usual = float(np.median(positive)) if len(positive) else 0.0
+            for line, gap in zip(lines[1:], gaps):
+                line.new_block = bool(gap > BLOCK_GAP_RATIO * usual + 0.5)
+        return lines
+
+    def _line(self, members: np.ndarray, right: float) -> Line:
+        texts = {i: self.texts[i] for i in members}
+        bullet = False
+        first = members[0]
+        if _is_bullet_glyph(texts[first].strip()) and len(members) > 1:
+            members = members[1:]
+            bullet = True
+        else:
+            for pattern in (BULLET_START_RE, BULLET_RE):
+                if pattern.match(texts[first]):
+                    texts[first] = pattern.sub("", texts[first])
+                    bullet = True
+                    break
+
+        line_style = int(np.bincount(self.style[members], weights=self.chars[members]).argmax())
+        segments = [[members[0]]]
+        for a, b in zip(members[:-1], members[1:]):
+            if self.x0[b] - self.x1[a] > SEGMENT_GAP * max(self.size[a], self.size[b]):
+                segments.append([b])
+            else:
+                segments[-1].append(b)
+
+        parts, plain = [], []
+        for n, segment in enumerate(segments):
+            body, text = self._runs(segment, texts, line_style)
+            plain.append(text)
+            if n == 0:
+                parts.append(body)
+            elif n == len(segments) - 1 and self.x1[segment[-1]] >= right - self.size[segment[-1]]:
+                parts.append(f'<span class="r">{body}</span>')
+            else:
+                parts.append(f'<span class="t">{body}</span>')
+
+        return Line(
+            top=float(self.y0[members].min()),
+            bottom=float(self.y1[members].max()),
+            x1=float(self.x1[members].max()),
+            size=float(self.size[members].max()),
+            style=line_style,
+            bold=bool(self.bold[members][self.style[members] == line_style].all()),
+            text=" ".join(plain).strip(),
+            inner_html="".join(parts),
+            bullet=bullet,
+            segments=len(segments),
+            wraps=bool(self.x1[members].max() >= right - WRAP_MARGIN * self.size[members].max()),
+        )
+
+    def _runs(self, segment: List[int], texts: Dict[int, str], line_style: int) -> Tuple[str, str]:
+        """Segment HTML (same-style spans merged into one run) and its plain text"""
+        runs: List[Tuple[int, List[str]]] = []
+        previous = None
+        for i in segment:
+            text = texts[i]
+            if (previous is not None and self.x0[i] - self.x1[previous] > WORD_GAP * self.size[i]
+                    and not text.startswith(" ") and not texts[previous].endswith(" ")):
+                text = " " + text
+            if runs and runs[-1][0] == self.style[i]:
+                runs[-1][1].append(text)
+            else:
+                runs.append((int(self.style[i]), [text]))
+            previous = i
+
+        parts, plain = [], []
+        for style, pieces in runs:
+            text = "".join(pieces)
+            plain.append(text)
+            body = _linkify(html.escape(text, quote=False))
+            parts.append(body if style == line_style else f'<span class="s{style}">{body}</span>')
+        return "".join(parts).strip(), "".join(plain).strip()
+
+
+def _heading_key(text: str) -> str:
+    return re.sub(r"\s+", " ", re.sub(r"[^a-z ]", " ", text.lower().replace("&", " and "))).strip()
+
+
+def _classify(lines: List[Line], body_size: float):
+    """Set each line's kind: name, section, entry, bullet, text or continuation"""
+    name_size = max(line.size for line in lines)
+    named = seen_section = in_bullet = False
+    previous = None
+    for line in lines:
+        words = line.text.split()
+        short = len(words) <= HEADING_MAX_WORDS and line.segments == 1 and not any(c.isdigit() for c in line.text)
+        known = _heading_key(line.text) in HEADING_TO_SECTION
+        if not named and not seen_section and line.size >= name_size and line.size >= body_size * NAME_SIZE_RATIO:
+            line.kind, named = "name", True
+        elif line.bullet:
+            line.kind = "bullet"
+        elif short and (known or (line.text.isupper() and (line.bold or line.size > body_size))
+                        or (seen_section and line.size >= body_size * HEADING_SIZE_RATIO)):
+            # Larger unknown lines above the first section are a headline under the name
+            line.kind, seen_section = "section", True
+        elif (previous is not None and not line.new_block and not line.bold and line.segments == 1
+              and (previous.wraps and previous.kind in ("text", "continuation") or in_bullet)):
+            # The rest of a bullet or paragraph that wrapped; under a bullet
+            # any plain line without a gap before it belongs to the bullet,
+            # however short the line above broke
+            line.kind = "continuation"
+        elif line.bold or line.segments > 1:
+            line.kind = "entry"
+        else:
+            line.kind = "text"
+        if line.kind == "bullet":
+            in_bullet = True
+        elif line.kind != "continuation":
+            in_bullet = False
+        previous = line
+
+
+LEVELS = ("list", "entry", "section", "header")
+
+
+class _Flow:
+    """Writes classified lines as header / section / entry / list markup"""
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.header_done = False
+        self.section_title: Optional[str] = None
+        self.open = {"header": False, "section": False, "entry": False, "list": False}
+        self.gaps = {"section": [], "entry": []}
+
+    def _close(self, level: str):
+        """Close the open elements up to and including level"""
+        for name in LEVELS[: LEVELS.index(level) + 1]:
+            if self.open[name]:
+                self.parts.append("</ul>" if name == "list" else "</div>")
+                self.open[name] = False
+
+    def close(self):
+        """End of a page or column; a section continuing after it is reopened"""
+        if self.open["header"]:
+            self.header_done = True
+        self._close("header")
+
+    def _open_section(self, title_html: str, css_class: str = ""):
+        self._close("section")
+        self.parts.append(f'<div class="resume-section"><h2{css_class}>{title_html}</h2>')
+        self.open["section"] = True
+
+    def _open_entry(self):
+        self._close("entry")
+        self.parts.append('<div class="entry">')
+        self.open["entry"] = True
+
+    def add(self, line: Line, gap: Optional[float]):
+        tagged = lambda tag: f'<{tag} class="s{line.style}">{line.inner_html}</{tag}>'
+        if line.kind == "continuation":
+            closing = re.search(r"</(?:p|li)>$", self.parts[-1]) if self.parts else None
+            if closing is not None:
+                last = self.parts[-1]
+                self.parts[-1] = f"{last[:closing.start()]} {line.inner_html}{closing.group(0)}"
+                return
+            line.kind = "text"
+        if line.kind == "section":
+            self._close("header")
+            self.header_done = True
+            self._open_section(line.inner_html, f' class="s{line.style}"')
+            self.section_title = line.text
+            if gap is not None:
+                self.gaps["section"].append(gap)
+            return
+
+        if not self.header_done:
+            if not self.open["header"]:
+                self.parts.append('<div class="resume-header">')
+                self.open["header"] = True
+            self.parts.append(tagged("h1" if line.kind == "name" else "p"))
+            return
+
+        if not self.open["section"]:
+            # Continues the previous column's or page's section
+            self._open_section(html.escape(self.section_title or "", quote=False), ' class="continued"')
+
+        if line.kind == "entry" or not self.open["entry"] or (line.new_block and line.kind == "text"):
+            self._open_entry()
+            if line.kind == "entry":
+                self.parts.append(tagged("h3"))
+                if gap is not None:
+                    self.gaps["entry"].append(gap)
+                return
+        if line.kind == "bullet":
+            if not self.open["list"]:
+                self.parts.append("<ul>")
+                self.open["list"] = True
+            self.parts.append(tagged("li"))
+        else:
+            self._close("list")
+            self.parts.append(tagged("p"))
+
+
+def _body_size(pages: List[_Page]) -> float:
+    sizes = np.concatenate([p.size for p in pages])
+    chars = np.concatenate([p.chars for p in pages])
+    buckets = np.bincount((sizes * 2).astype(int), weights=chars)
+    return float(buckets.argmax()) / 2
+
+
+def layout_to_html(layout_info: Dict[str, Any]) -> str:
+    """
+    HTML template for a PDF from its layout_info, without the LLM.
+
+    Raises GeometricExtractionError when the PDF has no text positions or
+    no recognisable section headings.
+    """
+    started = time.perf_counter()
+    styles: Dict[tuple, int] = {}
+    pages = [_Page(page, styles) for page in layout_info.get("pages", [])]
+    pages = [page for page in pages if len(page)]
+    if not pages:
+        raise GeometricExtractionError("No positioned text in the PDF")
+
+    # Regions in reading order: spans crossing the columns above them, the
+    # columns left to right, spans crossing them below
+    layout = []
+    for page in pages:
+        splits, column = page.columns()
+        if not len(splits):
+            layout.append((page, [page.lines(np.arange(len(page)))], None))
+            continue
+        # The head band ends below the last crossing span in the upper half
+        # of the columns (a contact line under a name short enough to sit
+        # in the first column); everything above that belongs to it
+        crossing = column == -1
+        middle = np.median(page.y0[~crossing])
+        upper = crossing & (page.y0 < middle)
+        cutoff = page.y1[upper].max() if upper.any() else -np.inf
+        in_head = page.y0 < cutoff
+        head = np.flatnonzero(in_head)
+        tail = np.flatnonzero(crossing & ~in_head)
+        column[in_head] = -1
+        bounds = np.concatenate([[page.x0.min()], splits, [page.x1.max()]])
+        widths = np.diff(bounds) / (bounds[-1] - bounds[0]) * 100
+        regions = [page.lines(head)] + [page.lines(np.flatnonzero(column == c)) for c in range(len(splits) + 1)]
+        layout.append((page, regions + [page.lines(tail)], widths))
+
+    all_lines = [line for _, regions, _ in layout for region in regions for line in region]
+    _classify(all_lines, _body_size(pages))
+    if not any(line.kind == "section" for line in all_lines):
+        raise GeometricExtractionError("No section headings found")
+
+    flow = _Flow()
+    for page, regions, widths in layout:
+        flow.parts.append('<div class="page">')
+        for n, region in enumerate(regions):
+            in_columns = widths is not None and 0 < n <= len(widths)
+            if in_columns and n == 1:
+                flow.close()
+                flow.parts.append('<div class="columns">')
+            if in_columns:
+                flow.parts.append(f'<div class="column" style="width:{widths[n - 1]:.1f}%">')
+            previous = None
+            for line in region:
+                flow.add(line, None if previous is None else line.top - previous.bottom)
+                previous = line
+            if in_columns:
+                flow.close()
+                flow.parts.append("</div>")
+                if n == len(widths):
+                    flow.parts.append("</div>")
+        flow.close()
+        flow.parts.append("</div>")
+
+    first = pages[0]
+    margin_left = float(first.x0.min())
+    margin_top = float(first.y0.min())
+    # Ragged text rarely reaches the right margin; assume it mirrors the left
+    margin_right = max(min(margin_left, first.width - float(first.x1.max())), 0.0)
+    # Line boxes from PyMuPDF include leading, so gaps can come out negative
+    section_gap = max(float(np.median(flow.gaps["section"])), 0.0) if flow.gaps["section"] else 12.0
+    entry_gap = max(float(np.median(flow.gaps["entry"])), 0.0) if flow.gaps["entry"] else 6.0
+    css = [
+        f".resume-container{{width:{first.width:g}pt;margin:0 auto;background:#fff}}",
+        f".page{{padding:{margin_top:.0f}pt {margin_right:.0f}pt {margin_top:.0f}pt {margin_left:.0f}pt}}",
+        ".page+.page{break-before:page}",
+        "h1,h2,h3,p,ul{margin:0}",
+        "ul{padding-left:1.2em}",
+        f".resume-section{{margin-top:{section_gap:.1f}pt}}",
+        f".entry{{margin-top:{entry_gap:.1f}pt}}",
+        f".columns{{display:flex;gap:{GUTTER_MIN_WIDTH}pt}}",
+        ".r{float:right}",
+        ".t{margin-left:2em}",
+        "a{color:inherit}",
+        "@media print{.resume-container{width:auto}}",
+    ]
+    css += [f".s{n}{{{_style_css(style)}}}" for style, n in styles.items()]
+
+    output = (
+        '<!DOCTYPE html>\n<html><head><meta charset="UTF-8"><style>\n' + "\n".join(css)
+        + '\n</style></head>\n<body><div class="resume-container">' + "\n".join(flow.parts)
+        + "</div></body></html>"
+    )
+    print(f"⚡ Geometric template extraction: {len(pages)} page(s), {len(all_lines)} lines "
+          f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return output
+
+
+def pdf_to_template_html(pdf_path) -> str:
+    """layout_to_html for a PDF path or file object, read with pdfplumber"""
+    _, layout_info = extract_detailed_from_pdf(pdf_path)
+    return layout_to_html(layout_info)
@@ -1,4 +1,5 @@
 # template_extractor_smart.py - Extract HTML preserving EXACT formatting
+import asyncio
 import os
 import pdfplumber
 from docx import Document
@@ -7,30 +8,51 @@ import json
 import base64
 from io import BytesIO
 
-def extract_html_from_resume(file_path: str) -> str:
+async def extract_html_from_resume(file_path, filename: str = None) -> str:
     """
     Extract HTML representation from resume using LLM to preserve exact formatting
     
     Args:
-        file_path: Path to PDF or DOCX file
+        file_path: Path to PDF or DOCX file, or the file's bytes
+        filename: Original file name; required when passing bytes
         
     Returns:
         HTML string preserving original design exactly
     """
-    print(f"🎨 Extracting HTML template from: {file_path}")
+    name = filename or file_path
+    print(f"🎨 Extracting HTML template from: {name}")
+    
+    # pdfplumber and python-docx both read from file objects, so uploads
+    # are handled in memory
+    source = BytesIO(file_path) if isinstance(file_path, (bytes, bytearray)) else file_path
     
     # Extract text with detailed formatting info
-    if file_path.lower().endswith('.pdf'):
-        text_content, layout_info = extract_detailed_from_pdf(file_path)
+    if name.lower().endswith('.pdf'):
+        text_content, layout_info = await asyncio.to_thread(extract_detailed_from_pdf, source)
     else:
-        text_content, layout_info = extract_detailed_from_docx(file_path)
+        text_content, layout_info = await asyncio.to_thread(extract_detailed_from_docx, source)
     
     # Use LLM to convert to HTML preserving EXACT structure
-    html_content = convert_to_html_with_llm(text_content, layout_info)
+    html_content = await convert_to_html_with_llm(text_content, layout_info)
     
     return html_content
 
-def extract_detailed_from_pdf(pdf_path: str) -> tuple:
+def pdf_color_to_int(color) -> int:
+    """pdfplumber fill colour (gray, RGB or CMYK components) as a 0xRRGGBB int like PyMuPDF's"""
+    if not isinstance(color, (tuple, list)) or not all(isinstance(c, (int, float)) for c in color):
+        return 0
+    if len(color) == 1:
+        r = g = b = color[0]
+    elif len(color) == 3:
+        r, g, b = color
+    elif len(color) == 4:
+        c, m, y, k = color
+        r, g, b = (1 - c) * (1 - k), (1 - m) * (1 - k), (1 - y) * (1 - k)
+    else:
+        return 0
+    return (round(r * 255) << 16) | (round(g * 255) << 8) | round(b * 255)
+
+def extract_detailed_from_pdf(pdf_path) -> tuple:
     """Extract text with detailed layout information from PDF"""
     print("📄 Extracting detailed layout from PDF...")
     
@@ -56,17 +78,19 @@ def extract_detailed_from_pdf(pdf_path: str) -> tuple:
             if text:
                 content_parts.append(f"[PAGE {page_num + 1}]\n{text}\n")
             
-            # Extract words with positioning and styling
-            words = page.extract_words(keep_blank_chars=True)
+            # Extract words with positioning and styling; y0/y1 are measured
+            # from the top of the page, as in extract_detailed_from_pdf_document
+            words = page.extract_words(keep_blank_chars=True, extra_attrs=['fontname', 'size', 'non_stroking_color'])
             for word in words:
                 element = {
                     "text": word.get('text', ''),
                     "x0": word.get('x0', 0),
-                    "y0": word.get('y0', 0),
+                    "y0": word.get('top', 0),
                     "x1": word.get('x1', 0),
-                    "y1": word.get('y1', 0),
+                    "y1": word.get('bottom', 0),
                     "fontname": word.get('fontname', ''),
-                    "size": word.get('size', 0)
+                    "size": word.get('size', 0),
+                    "color": pdf_color_to_int(word.get('non_stroking_color'))
                 }
                 page_info["elements"].append(element)
                 
@@ -79,7 +103,62 @@ def extract_detailed_from_pdf(pdf_path: str) -> tuple:
     
     return '\n'.join(content_parts), layout_info
 
-def extract_detailed_from_docx(docx_path: str) -> tuple:
+def extract_detailed_from_pdf_document(doc) -> tuple:
+    """
+    Same output as extract_detailed_from_pdf, read from an already open
+    PyMuPDF document so the upload pipeline parses the PDF only once
+    """
+    print("📄 Extracting detailed layout from PDF...")
+    
+    content_parts = []
+    layout_info = {
+        "pages": [],
+        "fonts": set(),
+        "colors": set(),
+        "alignments": []
+    }
+    
+    for page_num, page in enumerate(doc):
+        page_info = {
+            "page_num": page_num + 1,
+            "width": page.rect.width,
+            "height": page.rect.height,
+            "elements": []
+        }
+        
+        text = page.get_text()
+        if text.strip():
+            content_parts.append(f"[PAGE {page_num + 1}]\n{text}\n")
+        
+        for block in page.get_text("dict")["blocks"]:
+            for line in block.get("lines", []):
+                for span in line["spans"]:
+                    if not span["text"].strip():
+                        continue
+                    x0, y0, x1, y1 = span["bbox"]
+                    page_info["elements"].append({
+                        "text": span["text"],
+                        "x0": x0,
+                        "y0": y0,
+                        "x1": x1,
+                        "y1": y1,
+                        "fontname": span["font"],
+                        "size": span["size"],
+                        "color": span.get("color", 0)
+                    })
+                    layout_info["fonts"].add(span["font"])
+                    color = span.get("color", 0)
+                    if color:
+                        layout_info["colors"].add(f"rgb({(color >> 16) & 255},{(color >> 8) & 255},{color & 255})")
+        
+        layout_info["pages"].append(page_info)
+    
+    layout_info["fonts"] = list(layout_info["fonts"])
+    layout_info["colors"] = list(layout_info["colors"])
+    
+    return '\n'.join(content_parts), layout_info
+
+def extract_detailed_from_docx(docx_path) -> tuple:
     """Extract text with detailed formatting from DOCX"""
     print("📝 Extracting detailed layout from DOCX...")
     
@@ -131,10 +210,14 @@ def extract_detailed_from_docx(docx_path: str) -> tuple:
     
     return '\n'.join(content_parts), layout_info
 
-def convert_to_html_with_llm(text_content: str, layout_info: dict) -> str:
+async def convert_to_html_with_llm(text_content: str, layout_info: dict, fallback: bool = True) -> str:
     # print(f"Text Content {text_content}")
     # print(f"Text Content {len(text_content)} chars, Layout Info: {layout_info}")
-    """Use LLM to convert resume text to HTML preserving EXACT structure"""
+    """
+    Use LLM to convert resume text to HTML preserving EXACT structure.
+    If the LLM call fails, the basic fallback layout is returned, or the
+    error raised when fallback is False.
+    """
     # print("🤖 Converting to HTML using LLM with layout preservation...")
     
     # Create detailed layout description
@@ -166,6 +249,13 @@ STRUCTURE:
 - Include all CSS inline in <style> tag
 - Use placeholders like {{{{NAME}}}}, {{{{EMAIL}}}}, {{{{PHONE}}}} ONLY for contact info that will be dynamically filled
 
+SLOT MARKUP (the template is filled later by a program, so mark where content goes):
+- data-slot="name" on the element holding the name
+- data-slot="contact" on the element holding the contact line
+- data-slot="section" on each section wrapper and data-slot="section-title" on its heading
+- data-slot="entry" on each job/degree/project block inside a section, data-slot="entry-title" on its heading
+- data-slot="items" on the list (or block) holding an entry's lines and data-slot="item" on each line
+
 CSS REQUIREMENTS:
 - Set exact font families, sizes, and weights
 - Define precise margins and padding
@@ -176,7 +266,7 @@ CSS REQUIREMENTS:
 Return ONLY the complete HTML document starting with <!DOCTYPE html>. No explanations or markdown formatting."""
 
     try:
-        html_response = call_ollama(prompt)
+        html_response = await call_ollama(prompt, call_site="template_extraction")
         
         # Clean up response
         html_response = html_response.strip()
@@ -199,6 +289,8 @@ Return ONLY the complete HTML document starting with <!DOCTYPE html>. No explana
         
     except Exception as e:
         print(f"❌ LLM conversion failed: {e}")
+        if not fallback:
+            raise
         import traceback
         traceback.print_exc()
         # Fallback to enhanced basic HTML
@@ -364,7 +456,7 @@ def create_enhanced_html_fallback(text_content: str, layout_info: dict) -> str:
     # test_file = "/Users/kohli1/thunder/project-thunder/backend/Anvi_Kohli_Resume.pdf"  # Replace with actual file path
     # import time 
     # start_time = time.time()
-    # html_output = extract_html_from_resume(test_file)
+    # html_output = asyncio.run(extract_html_from_resume(test_file))
     # end_time = time.time()
     # print(f"⏱️ Extraction completed in {end_time - start_time:.2f} seconds")
     # print(html_output)
\ No newline at end of file
@@ -1,9 +1,59 @@
 # template_filler.py - FIXED VERSION
 from bs4 import BeautifulSoup
+import copy
 import re
-from typing import Dict, Any, List
-
-def fill_html_template(html_template: str, css_template: str, profile_data: Dict[str, Any]) -> str:
+from typing import Dict, Any, List, Optional
+from template_cache import template_cache
+
+def _prepare_shell(html_template: str, css_template: str) -> BeautifulSoup:
+    """The template page with its body emptied and the head ready (meta tags, enhanced CSS)"""
+    soup = BeautifulSoup(html_template, 'html.parser')
+
+    # Find body or create one
+    body = soup.find('body')
+    if not body:
+        body = soup.new_tag('body')
+        if soup.html:
+            soup.html.append(body)
+        else:
+            html_tag = soup.new_tag('html')
+            soup.append(html_tag)
+            html_tag.append(body)
+
+    # Clear body content while preserving structure
+    body.clear()
+
+    # Ensure head exists
+    head = soup.find('head')
+    if not head:
+        head = soup.new_tag('head')
+        if soup.html:
+            soup.html.insert(0, head)
+        else:
+            html_tag = soup.find('html')
+            if html_tag:
+                html_tag.insert(0, head)
+
+    # Add meta charset if not present
+    if not head.find('meta', {'charset': True}):
+        meta = soup.new_tag('meta')
+        meta.attrs['charset'] = 'UTF-8'
+        head.insert(0, meta)
+
+    # Add viewport meta
+    if not head.find('meta', {'name': 'viewport'}):
+        viewport = soup.new_tag('meta')
+        viewport.attrs['name'] = 'viewport'
+        viewport.attrs['content'] = 'width=device-width, initial-scale=1.0'
+        head.append(viewport)
+
+    # Add CSS (preserving original styles)
+    style_tag = soup.new_tag('style')
+    style_tag.string = enhance_css(css_template)
+    head.append(style_tag)
+    return soup
+
+def fill_html_template(html_template: str, css_template: str, profile_data: Dict[str, Any], template_id: Optional[str] = None) -> str:
     """
     Fill HTML template with profile data - PRESERVING ORIGINAL DESIGN
     
@@ -11,6 +61,7 @@ def fill_html_template(html_template: str, css_template: str, profile_data: Dict
         html_template: HTML template string from uploaded resume
         css_template: CSS template string from uploaded resume
         profile_data: Dictionary containing resume sections
+        template_id: resume_templates _id, for caching the prepared template
         
     Returns:
         Complete HTML document with filled data
@@ -18,66 +69,28 @@ def fill_html_template(html_template: str, css_template: str, profile_data: Dict
     print("🎨 Filling template with profile data...")
     
     try:
-        # Parse HTML
-        soup = BeautifulSoup(html_template, 'html.parser')
+        # Parsed and prepared once per template; each fill works on a copy
+        # (a tree copy, not a reparse, since beautifulsoup4 4.12)
+        shell = template_cache.get_or_build(
+            "shell", template_id, f"{html_template}\0{css_template}",
+            lambda: _prepare_shell(html_template, css_template),
+        )
+        soup = copy.copy(shell)
+        body = soup.find('body')
         
         # Extract contact information
         contact_info = extract_contact_info(profile_data)
         print(f"📧 Extracted contact: {contact_info}")
         
-        # Find body or create one
-        body = soup.find('body')
-        if not body:
-            body = soup.new_tag('body')
-            if soup.html:
-                soup.html.append(body)
-            else:
-                html_tag = soup.new_tag('html')
-                soup.append(html_tag)
-                html_tag.append(body)
-        
-        # Clear body content while preserving structure
-        body.clear()
-        
         # Build new content preserving original structure
         sections_html = create_sections_html(profile_data, contact_info)
         
         # Parse and append sections
         sections_soup = BeautifulSoup(sections_html, 'html.parser')
-        for element in sections_soup.children:
+        for element in list(sections_soup.children):
             if element.name:  # Skip text nodes
                 body.append(element)
         
-        # Ensure head exists
-        head = soup.find('head')
-        if not head:
-            head = soup.new_tag('head')
-            if soup.html:
-                soup.html.insert(0, head)
-            else:
-                html_tag = soup.find('html')
-                if html_tag:
-                    html_tag.insert(0, head)
-        
-        # Add meta charset if not present
-        if not head.find('meta', {'charset': True}):
-            meta = soup.new_tag('meta')
-            meta.attrs['charset'] = 'UTF-8'
-            head.insert(0, meta)
-        
-        # Add viewport meta
-        if not head.find('meta', {'name': 'viewport'}):
-            viewport = soup.new_tag('meta')
-            viewport.attrs['name'] = 'viewport'
-            viewport.attrs['content'] = 'width=device-width, initial-scale=1.0'
-            head.append(viewport)
-        
-        # Add CSS (preserving original styles)
-        enhanced_css = enhance_css(css_template)
-        style_tag = soup.new_tag('style')
-        style_tag.string = enhanced_css
-        head.append(style_tag)
-        
         final_html = str(soup.prettify())
         print(f"✅ Template filled successfully ({len(final_html)} chars)")
         
@@ -306,9 +319,8 @@ def create_subsection_html(subsection: Dict[str, Any], section_name: str) -> str
     
     return '\n'.join(html_parts)
 
-def enhance_css(original_css: str) -> str:
-    """Enhance original CSS while preserving design"""
-    enhanced = original_css + '''
+# Appended to every template's own CSS; built once at import
+ENHANCED_CSS = '''
 
 /* Enhanced Professional Styles */
 * {
@@ -513,8 +525,10 @@ a:hover {
     }
 }
 '''
-    
-    return enhanced
+
+def enhance_css(original_css: str) -> str:
+    """Enhance original CSS while preserving design"""
+    return original_css + ENHANCED_CSS
 
 def create_fallback_html(profile_data: Dict[str, Any], css_template: str) -> str:
     """Create fallback HTML if main template fails"""
@@ -1,11 +1,87 @@
 # template_filler_smart.py - Fill template preserving exact design
-from typing import Dict, Any
+import asyncio
+from typing import Any, Dict, List, Union
+from parser.deadline import DeadlineExceeded
 from parser.llm_client import call_ollama
-import json
+import os
+import time
 from bs4 import BeautifulSoup
 import re
+from pydantic import RootModel, ValidationError
+from parser.llm_residency import model_residency
+from parser.utils import extract_json
+from template_cache import template_cache
+from template_compiler import COMPILED_TEMPLATE_VERSION, compile_template, render_template
 
-def fill_template_preserving_design(html_template: str, profile_data: Dict[str, Any]) -> str:
+# compiled: render the slot-annotated template locally, using the LLM only
+# when the template cannot be compiled; llm: always fill with the LLM
+TEMPLATE_FILL_MODE = os.getenv("TEMPLATE_FILL_MODE", "compiled").lower()
+# Whether a template that cannot be compiled is filled by the LLM (slow)
+# or by the basic placeholder fill
+TEMPLATE_LLM_FALLBACK = os.getenv("TEMPLATE_LLM_FALLBACK", "true").lower() in ("1", "true", "yes")
+# How the LLM fill answers: patch returns {element id: new text} applied
+# locally; html regenerates the whole document
+TEMPLATE_LLM_FILL_MODE = os.getenv("TEMPLATE_LLM_FILL_MODE", "patch").lower()
+
+FILL_ID = "data-fill-id"
+# Elements that start a new block; a text element holds none of these
+BLOCK_TAGS = ["address", "article", "aside", "div", "dl", "footer", "h1", "h2", "h3", "h4", "h5", "h6",
+              "header", "li", "main", "nav", "ol", "p", "section", "table", "tr", "td", "ul"]
+
+FILL_PATCH_INSTRUCTIONS = """You are filling a resume template with a new person's profile.
+
+The template's text elements are listed one per line as: <id> <tag>: <current text>
+The current text belongs to the template's original owner and must be replaced.
+
+Return ONLY a JSON object mapping element ids to new text:
+- Give every listed id exactly once.
+- Keep headings such as "Experience" or "Skills" when the profile has that section; use the profile's wording otherwise.
+- For an <li> element, give a list of strings to repeat that line once per item of the matching profile content.
+- Use "" for elements that have no counterpart in the profile.
+- Use only information from the profile. Do NOT invent anything.
+- Do NOT return HTML, only plain text values.
+
+"""
+
+model_residency.register_prefix("template_fill_patch", FILL_PATCH_INSTRUCTIONS)
+
+
+class FillPatch(RootModel[Dict[str, Union[str, List[str]]]]):
+    """LLM answer in patch mode: element id -> new text (or lines for a list item)"""
+
+
+async def fill_template(template: Dict[str, Any], profile_data: Dict[str, Any]) -> str:
+    """
+    Fill a resume_templates document with profile data.
+
+    Uses the stored compiled template (or compiles the HTML on the spot)
+    and renders it deterministically; the LLM fill is only the fallback
+    for templates without usable structure.
+    """
+    html_template = template['html_template']
+    template_id = str(template['_id']) if template.get('_id') is not None else None
+
+    if TEMPLATE_FILL_MODE == "compiled":
+        compiled = None
+        if template.get('compiled_version') == COMPILED_TEMPLATE_VERSION:
+            compiled = template.get('compiled_template')
+        try:
+            if compiled is None:
+                compiled = template_cache.get_or_build(
+                    "compiled", template_id, html_template, lambda: compile_template(html_template)
+                )
+            started = time.perf_counter()
+            filled_html = render_template(compiled, profile_data, template_id=template_id)
+            print(f"⚡ Rendered compiled template in {(time.perf_counter() - started) * 1000:.1f} ms")
+            return filled_html
+        except Exception as e:
+            print(f"⚠️ Compiled render failed, falling back: {e}")
+
+    if TEMPLATE_FILL_MODE == "llm" or TEMPLATE_LLM_FALLBACK:
+        return await fill_template_preserving_design(html_template, profile_data)
+    return fill_template_smart_basic(html_template, profile_data)
+
+async def fill_template_preserving_design(html_template: str, profile_data: Dict[str, Any]) -> str:
     """
     Fill HTML template with profile data using LLM to preserve exact design
     
@@ -23,7 +99,7 @@ def fill_template_preserving_design(html_template: str, profile_data: Dict[str,
         profile_text = format_profile_data_detailed(profile_data)
         
         # Use LLM to intelligently fill the template
-        filled_html = fill_with_intelligent_llm(html_template, profile_text, profile_data)
+        filled_html = await fill_with_intelligent_llm(html_template, profile_text, profile_data)
         
         return filled_html
         
@@ -60,8 +136,111 @@ def format_profile_data_detailed(profile_data: Dict[str, Any]) -> str:
     
     return '\n'.join(lines)
 
-def fill_with_intelligent_llm(html_template: str, profile_text: str, profile_data: Dict[str, Any]) -> str:
+def index_text_elements(soup: BeautifulSoup) -> Dict[str, Any]:
+    """Tag each text element of the template with a fill id and return them by id"""
+    elements = {}
+    root = soup.body or soup
+    for element in root.find_all(True):
+        if element.name in ("script", "style", "head", "title"):
+            continue
+        if element.find(BLOCK_TAGS) is not None or not element.get_text(strip=True):
+            continue
+        if element.find_parent(attrs={FILL_ID: True}) is not None:
+            continue  # inline markup inside an element already listed
+        fill_id = f"t{len(elements)}"
+        element[FILL_ID] = fill_id
+        elements[fill_id] = element
+    return elements
+
+
+def build_fill_patch_prompt(elements: Dict[str, Any], profile_text: str) -> str:
+    listing = "\n".join(
+        f"{fill_id} <{element.name}>: {' '.join(element.get_text(' ', strip=True).split())}"
+        for fill_id, element in elements.items()
+    )
+    return f"""{FILL_PATCH_INSTRUCTIONS}TEMPLATE TEXT ELEMENTS:
+{listing}
+
+NEW PROFILE DATA:
+{profile_text}
+
+Return ONLY the JSON object."""
+
+
+def apply_fill_patch(soup: BeautifulSoup, elements: Dict[str, Any], patch: Dict[str, Union[str, List[str]]]) -> int:
+    """Write the patch into the template; returns how many listed elements it left untouched"""
+    unknown = [fill_id for fill_id in patch if fill_id not in elements]
+    if unknown:
+        print(f"⚠️ Ignoring {len(unknown)} unknown element id(s) in fill patch: {', '.join(unknown[:10])}")
+
+    for fill_id, value in patch.items():
+        element = elements.get(fill_id)
+        if element is None:
+            continue
+        lines = value if isinstance(value, list) else [value]
+        lines = [line.strip() for line in lines if line and line.strip()]
+        if not lines:
+            if element.name == "li":
+                element.decompose()
+            else:
+                element.clear()
+            continue
+        element.string = lines[0]
+        # Extra lines repeat the element (list items, typically)
+        anchor = element
+        for line in lines[1:]:
+            clone = soup.new_tag(element.name, attrs=dict(element.attrs))
+            clone.string = line
+            anchor.insert_after(clone)
+            anchor = clone
+
+    for element in soup.find_all(attrs={FILL_ID: True}):
+        del element[FILL_ID]
+    return sum(1 for fill_id in elements if fill_id not in patch)
+
+
+async def fill_with_slot_patch(html_template: str, profile_text: str) -> str:
+    """
+    LLM fill that returns only {element id: new text}.
+
+    The model reads the template's text (not its markup or CSS) and writes a
+    small JSON patch, which is validated and applied to the parsed template
+    here; output is a few hundred tokens instead of the whole document.
+    """
+    soup = BeautifulSoup(html_template, 'html.parser')
+    elements = index_text_elements(soup)
+    if not elements:
+        raise ValueError("Template has no text elements to fill")
+
+    started = time.perf_counter()
+    response = await call_ollama(build_fill_patch_prompt(elements, profile_text), format_model=FillPatch,
+                                 call_site="template_fill_patch")
+    try:
+        patch = FillPatch.model_validate(extract_json(response)).root
+    except ValidationError as e:
+        raise ValueError(f"Fill patch did not match the expected shape: {e}")
+
+    untouched = apply_fill_patch(soup, elements, patch)
+    print(f"✅ Applied fill patch of {len(patch)} element(s) ({len(response)} chars of output) "
+          f"in {time.perf_counter() - started:.2f} seconds"
+          + (f", {untouched} element(s) left as they were" if untouched else ""))
+    return str(soup)
+
+
+async def fill_with_intelligent_llm(html_template: str, profile_text: str, profile_data: Dict[str, Any]) -> str:
     """Use LLM to fill template with intelligent content matching"""
+    if TEMPLATE_LLM_FILL_MODE == "patch":
+        print("🤖 Using LLM slot patch to fill template...")
+        try:
+            return await fill_with_slot_patch(html_template, profile_text)
+        except (DeadlineExceeded, asyncio.CancelledError):
+            raise  # out of time: a fallback fill would only run past the budget
+        except Exception as e:
+            print(f"❌ LLM patch filling failed: {e}")
+            import traceback
+            traceback.print_exc()
+            return fill_template_smart_basic(html_template, profile_data)
+
     print("🤖 Using advanced LLM to fill template with exact matching...")
     
     prompt = f"""You are an expert at filling HTML resume templates with new data while preserving the EXACT original design, layout, and formatting.
@@ -103,7 +282,7 @@ OUTPUT REQUIREMENTS:
 Return the filled HTML now:"""
 
     try:
-        filled_html = call_ollama(prompt)
+        filled_html = await call_ollama(prompt, call_site="template_fill")
         
         # Clean up response
         filled_html = filled_html.strip()
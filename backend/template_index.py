@@ -0,0 +1,139 @@
+# template_index.py - Reuse compiled templates across uploads with the same layout
+import asyncio
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from template_compiler import COMPILED_TEMPLATE_VERSION, compiled_template_fields
+
+# Look up a PDF's layout before asking the LLM to extract its template
+TEMPLATE_INDEX_ENABLED = os.getenv("TEMPLATE_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+# Bump when the fingerprint features change so older entries stop matching
+FINGERPRINT_VERSION = 1
+# Fewer text spans than this is too little layout to tell templates apart
+FINGERPRINT_MIN_ELEMENTS = 20
+# A text style used by fewer spans than this comes from the content (an
+# italic word, a link), not from the template; section headings and entry
+# titles repeat
+STYLE_MIN_SPANS = 3
+# Left edges are compared on a grid of this many points
+EDGE_GRID = 4.0
+EDGE_MIN_SHARE = 0.05
+
+# Embedded font subsets are named like "ABCDEF+Calibri-Bold"; the prefix
+# differs per file
+FONT_SUBSET_RE = re.compile(r"^[A-Z]{6}\+")
+
+
+def layout_features(layout_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    The parts of a PDF's layout that come from its template rather than
+    its text: page size, the font/size/colour combinations that repeat
+    (plus the largest, usually the name), and the left edges
+    text lines up on (margins, indents, columns). None when the layout is
+    too sparse or too plain to identify a template (DOCX layout_info has
+    no positions at all).
+    """
+    pages = layout_info.get("pages") or []
+    elements = [e for page in pages for e in page.get("elements", []) if e.get("text", "").strip()]
+    if len(elements) < FINGERPRINT_MIN_ELEMENTS:
+        return None
+
+    spans = Counter(
+        (FONT_SUBSET_RE.sub("", e.get("fontname") or ""), round(e.get("size", 0) * 2) / 2, e.get("color"))
+        for e in elements
+    )
+    styles = {style for style, count in spans.items() if count >= STYLE_MIN_SPANS}
+    styles.add(max(spans, key=lambda style: style[1]))
+    if len(styles) < 2:
+        return None
+
+    edges = Counter(round(e.get("x0", 0) / EDGE_GRID) for e in elements)
+    threshold = max(3, EDGE_MIN_SHARE * len(elements))
+
+    return {
+        "version": FINGERPRINT_VERSION,
+        "page": [round(pages[0].get("width", 0)), round(pages[0].get("height", 0))],
+        "styles": sorted([font, size, color or ""] for font, size, color in styles),
+        "edges": sorted(edge * EDGE_GRID for edge, count in edges.items() if count >= threshold),
+    }
+
+
+def layout_fingerprint(layout_info: Dict[str, Any]) -> Optional[str]:
+    features = layout_features(layout_info)
+    if features is None:
+        return None
+    return hashlib.sha256(json.dumps(features, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class TemplateIndex:
+    """
+    Compiled templates stored per layout fingerprint.
+
+    Many resumes are made from the same few Overleaf/Word/Canva templates;
+    the first upload of a layout pays for the LLM extraction, later uploads
+    with the same fingerprint reuse its compiled template. Only the
+    compiled form is stored, and compile_template leaves nothing of the
+    source resume but markup and styling, so no uploader's text is shared
+    with another user.
+    """
+
+    def __init__(self, collection, enabled: bool = TEMPLATE_INDEX_ENABLED):
+        self.collection = collection
+        self.enabled = enabled
+        self.stats = {"hits": 0, "misses": 0, "stores": 0}
+
+    async def lookup(self, fingerprint: Optional[str]) -> Optional[str]:
+        """The compiled template indexed for this layout, if any"""
+        if not self.enabled or not fingerprint:
+            return None
+        try:
+            entry = await self.collection.find_one_and_update(
+                {"_id": fingerprint, "compiled_version": COMPILED_TEMPLATE_VERSION},
+                {"$set": {"last_used_at": datetime.utcnow()}, "$inc": {"uses": 1}},
+            )
+        except Exception as e:
+            print(f"⚠️ Template index lookup failed: {e}")
+            return None
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return entry["compiled_template"]
+
+    async def add(self, fingerprint: Optional[str], html_template: str):
+        """
+        Index a freshly extracted template. The first one stored for a
+        layout is kept; one compiled by an older compiler is replaced.
+        """
+        if not self.enabled or not fingerprint:
+            return
+        compiled = await asyncio.to_thread(compiled_template_fields, html_template)
+        if compiled["compiled_template"] is None:
+            return  # nothing reusable without an LLM fill
+        now = datetime.utcnow()
+        try:
+            await self.collection.replace_one(
+                {"_id": fingerprint, "compiled_version": {"$ne": COMPILED_TEMPLATE_VERSION}},
+                {"_id": fingerprint, **compiled, "uses": 0, "created_at": now, "last_used_at": now},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return  # a concurrent upload of the same layout stored it first
+        except Exception as e:
+            print(f"⚠️ Template index store failed: {e}")
+            return
+        self.stats["stores"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["enabled"] = self.enabled
+        return stats
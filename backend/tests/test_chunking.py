@@ -0,0 +1,51 @@
+from parser.chunking import merge_resume_parts
+from parser.schemas import ResumeJSON
+
+
+def part(*sections):
+    return ResumeJSON.model_validate({
+        "sections": [
+            {"section_name": name, "subsections": [{"title": title, "data": data} for title, data in subsections]}
+            for name, subsections in sections
+        ]
+    })
+
+
+def test_section_split_across_a_chunk_boundary_is_joined():
+    merged = merge_resume_parts([
+        part(("Summary", [("Summary", ["Engineer"])]), ("Experience", [("Acme", ["Built it"])])),
+        part(("experience", [("Globex", ["Ran it"])]), ("Skills", [("Skills", ["Go"])])),
+    ])
+
+    assert [(s.section_name, [sub.title for sub in s.subsections]) for s in merged.sections] == [
+        ("Summary", ["Summary"]),
+        ("Experience", ["Acme", "Globex"]),
+        ("Skills", ["Skills"]),
+    ]
+
+
+def test_same_titles_and_repeated_items_are_kept():
+    merged = merge_resume_parts([
+        part(("Experience", [
+            ("Software Engineer", ["On-call", "Code review"]),
+            ("Software Engineer", ["On-call", "Hiring"]),
+        ])),
+        part(("Experience", [("Software Engineer", ["Code review"])])),
+    ])
+
+    experience = merged.sections[0]
+    assert len(merged.sections) == 1
+    assert [(s.title, s.data) for s in experience.subsections] == [
+        ("Software Engineer", ["On-call", "Code review"]),
+        ("Software Engineer", ["On-call", "Hiring"]),
+        ("Software Engineer", ["Code review"]),
+    ]
+
+
+def test_sections_sharing_a_name_away_from_a_boundary_stay_separate():
+    merged = merge_resume_parts([
+        part(("Projects", [("Compiler", ["Wrote it"])]), ("Experience", [("Acme", ["Built it"])])),
+        part(("Skills", [("Skills", ["Go"])]), ("Projects", [("Scheduler", ["Built it"])])),
+    ])
+
+    assert [s.section_name for s in merged.sections] == ["Projects", "Experience", "Skills", "Projects"]
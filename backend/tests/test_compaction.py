@@ -0,0 +1,36 @@
+from parser.compaction import compact_markdown
+
+PAGE_ONE = """Page 1 of 2
+# Alice Smith
+## Skills
+Typing speed (wpm)
+98
+Certifications held
+12
+**Python** ****
+Signature: __________
+1"""
+
+PAGE_TWO = """2
+## Experience
+**Acme Corp**
+- Built the ingestion pipeline
+Page 2 of 2"""
+
+
+def test_page_numbers_only_removed_at_page_edges():
+    text, report = compact_markdown(PAGE_ONE + "\n\n-----\n\n" + PAGE_TWO)
+    lines = text.split("\n")
+
+    assert "98" in lines and "12" in lines
+    assert "1" not in lines and "2" not in lines
+    assert "Page 1 of 2" not in text and "Page 2 of 2" not in text
+    assert report["page_numbers_removed"] == 4
+
+
+def test_only_empty_bold_pairs_are_removed():
+    text, report = compact_markdown(PAGE_ONE)
+
+    assert "**Python**" in text and "****" not in text
+    assert "Signature: __________" in text
+    assert report["empty_emphasis_removed"] == 1
@@ -0,0 +1,86 @@
+import os
+import time
+
+import pytest
+
+from parser import llm_cache as llm_cache_module
+from parser.llm_cache import LLMCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(llm_cache_module.time, "time", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = LLMCache(str(tmp_path), memory_entries=8, ttl_seconds=60)
+    cache.set("aa11", "fresh")
+    path = cache._path("aa11")
+
+    clock[0] += 59
+    assert cache.get("aa11") == "fresh"
+
+    # Past the TTL both tiers miss and the disk file is removed
+    clock[0] += 2
+    assert cache.get("aa11") is None
+    assert not path.exists()
+    assert cache.snapshot()["misses"] == 1
+
+
+def test_a_disk_hit_is_promoted_to_the_memory_lru(tmp_path, clock):
+    cache = LLMCache(str(tmp_path), memory_entries=2, ttl_seconds=60)
+    for key in ("aa01", "aa02", "aa03"):
+        cache.set(key, f"value {key}")
+    assert list(cache._memory) == ["aa02", "aa03"]
+
+    assert cache.get("aa01") == "value aa01"
+    assert cache.snapshot()["disk_hits"] == 1
+    assert list(cache._memory) == ["aa03", "aa01"]
+
+    # Now served from memory, even with the file gone
+    os.remove(cache._path("aa01"))
+    assert cache.get("aa01") == "value aa01"
+    assert cache.snapshot()["memory_hits"] == 1
+
+
+def test_a_fresh_process_reads_the_disk_tier(tmp_path, clock):
+    LLMCache(str(tmp_path)).set("bb01", "from before the restart")
+
+    cache = LLMCache(str(tmp_path))
+    assert cache.get("bb01") == "from before the restart"
+    assert cache.snapshot()["disk_hits"] == 1
+
+
+def test_prune_drops_the_oldest_entries_over_the_size_budget(tmp_path, clock):
+    cache = LLMCache(str(tmp_path), memory_entries=0, ttl_seconds=0)
+    cache.set("cc01", "x" * 100)
+    entry_size = cache._path("cc01").stat().st_size
+    cache.disk_max_bytes = entry_size * 2
+
+    cache.set("cc02", "x" * 100)
+    # Give the first two distinct modification times, older than the third
+    old = clock[0] - 100
+    os.utime(cache._path("cc01"), (old, old))
+    os.utime(cache._path("cc02"), (old + 1, old + 1))
+
+    cache.set("cc03", "x" * 100)
+
+    assert not cache._path("cc01").exists()
+    assert cache._path("cc02").exists() and cache._path("cc03").exists()
+    assert cache.snapshot()["disk_bytes"] == entry_size * 2
+    assert cache.snapshot()["evictions"] == 1
+
+
+def test_prune_drops_expired_files(tmp_path):
+    cache = LLMCache(str(tmp_path), ttl_seconds=60)
+    cache.set("dd01", "stale")
+    cache.set("dd02", "recent")
+    old = time.time() - 120
+    os.utime(cache._path("dd01"), (old, old))
+
+    cache.prune()
+
+    assert not cache._path("dd01").exists()
+    assert cache._path("dd02").exists()
@@ -0,0 +1,191 @@
+import asyncio
+
+import httpx
+import pytest
+
+from parser import llm_router
+from parser.llm_router import NoBackendAvailable, OllamaRouter
+
+A, B = "http://ollama-a:11434", "http://ollama-b:11434"
+
+
+class StubOllama:
+    """In-process Ollama servers behind one httpx transport, keyed by URL"""
+
+    def __init__(self, *urls):
+        self.up = {url: True for url in urls}
+        self.status = {url: 200 for url in urls}
+        self.hold = {url: None for url in urls}
+        self.generations = {url: 0 for url in urls}
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        url = f"{request.url.scheme}://{request.url.host}:{request.url.port}"
+        if not self.up[url]:
+            raise httpx.ConnectError("connection refused", request=request)
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": []})
+        self.generations[url] += 1
+        if self.hold[url] is not None:
+            await self.hold[url].wait()
+        if self.status[url] != 200:
+            return httpx.Response(self.status[url], text="model crashed")
+        return httpx.Response(200, json={"response": url, "done": True})
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
+
+
+async def generate(router: OllamaRouter, client: httpx.AsyncClient) -> str:
+    resp = await router.post(client, "/api/generate", json={"prompt": "hi"})
+    return resp.json()["response"]
+
+
+@pytest.fixture
+def fast_ejection(monkeypatch):
+    monkeypatch.setattr(llm_router, "OLLAMA_EJECT_AFTER_FAILURES", 2)
+    monkeypatch.setattr(llm_router, "OLLAMA_EJECT_SECONDS", 0.2)
+
+
+def test_fails_over_to_the_next_backend():
+    stub = StubOllama(A, B)
+    stub.up[A] = False
+    router = OllamaRouter([A, B])
+
+    async def run():
+        async with stub.client() as client:
+            return await generate(router, client)
+
+    assert asyncio.run(run()) == B
+    assert router.backends[0].failures == 1
+    assert router.backends[1].requests == 1
+
+
+def test_server_errors_fail_over_and_all_failing_raises():
+    stub = StubOllama(A, B)
+    stub.status[A] = 500
+    router = OllamaRouter([A, B])
+
+    async def run():
+        async with stub.client() as client:
+            first = await generate(router, client)
+            stub.status[B] = 503
+            with pytest.raises(NoBackendAvailable):
+                await generate(router, client)
+            return first
+
+    assert asyncio.run(run()) == B
+
+
+def test_repeated_failures_eject_until_the_cooldown_ends(fast_ejection):
+    stub = StubOllama(A, B)
+    stub.status[A] = 500
+    router = OllamaRouter([A, B])
+    backend_a = router.backends[0]
+
+    async def run():
+        async with stub.client() as client:
+            # A is tried first each time (no latency recorded yet) and fails over to B
+            for _ in range(2):
+                assert await generate(router, client) == B
+            assert stub.generations[A] == 2
+            assert not backend_a.available
+            tried_before = stub.generations[A]
+            assert await generate(router, client) == B
+            assert stub.generations[A] == tried_before  # skipped while ejected
+
+            stub.status[A] = 200
+            await asyncio.sleep(0.25)
+            assert backend_a.available
+            router.backends[1].in_flight += 1  # make A the least loaded again
+            try:
+                return await generate(router, client)
+            finally:
+                router.backends[1].in_flight -= 1
+
+    assert asyncio.run(run()) == A
+    assert backend_a.consecutive_failures == 0
+
+
+def test_health_loop_takes_a_backend_out_and_puts_it_back():
+    stub = StubOllama(A, B)
+    router = OllamaRouter([A, B])
+    backend_a = router.backends[0]
+
+    async def run():
+        async with stub.client() as client:
+            router.start_health_checks(lambda: client, interval=0.01)
+            try:
+                stub.up[A] = False
+                await asyncio.sleep(0.05)
+                assert not backend_a.healthy
+                assert [await generate(router, client) for _ in range(3)] == [B, B, B]
+                assert stub.generations[A] == 0
+
+                stub.up[A] = True
+                await asyncio.sleep(0.05)
+                assert backend_a.healthy
+                router.backends[1].in_flight += 1
+                try:
+                    return await generate(router, client)
+                finally:
+                    router.backends[1].in_flight -= 1
+            finally:
+                await router.stop_health_checks()
+
+    assert asyncio.run(run()) == A
+
+
+def test_picks_the_least_loaded_backend():
+    stub = StubOllama(A, B)
+    router = OllamaRouter([A, B])
+
+    async def run():
+        async with stub.client() as client:
+            stub.hold[A] = asyncio.Event()
+            stub.hold[B] = asyncio.Event()
+            # Four concurrent requests spread two and two
+            tasks = [asyncio.create_task(generate(router, client)) for _ in range(4)]
+            await asyncio.sleep(0.01)
+            in_flight = [b.in_flight for b in router.backends]
+            stub.hold[A].set()
+            stub.hold[B].set()
+            served = await asyncio.gather(*tasks)
+
+            # Idle again: ties go to the backend with the lower recent latency
+            router.backends[0].latency_ewma, router.backends[1].latency_ewma = 0.5, 0.1
+            stub.hold[A] = stub.hold[B] = None
+            return in_flight, served, await generate(router, client)
+
+    in_flight, served, after = asyncio.run(run())
+
+    assert in_flight == [2, 2]
+    assert sorted(served) == [A, A, B, B]
+    assert after == B
+
+
+def test_client_errors_on_a_stream_do_not_count_against_the_backend(fast_ejection):
+    stub = StubOllama(A, B)
+    stub.status[A] = stub.status[B] = 404
+    router = OllamaRouter([A, B])
+
+    async def stream_once(client):
+        async with router.stream(client, "/api/generate", json={"prompt": "hi"}) as resp:
+            resp.raise_for_status()
+
+    async def run():
+        async with stub.client() as client:
+            for _ in range(3):
+                with pytest.raises(httpx.HTTPStatusError):
+                    await stream_once(client)
+            # Each 404 went to the caller: no failover, no failures, no ejection
+            assert sum(stub.generations.values()) == 3
+            assert [b.failures for b in router.backends] == [0, 0]
+            assert all(b.available for b in router.backends)
+
+            stub.status[A] = stub.status[B] = 500
+            with pytest.raises(NoBackendAvailable):
+                await stream_once(client)
+
+    asyncio.run(run())
+
+    assert [b.failures for b in router.backends] == [1, 1]
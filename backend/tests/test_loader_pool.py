@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+from parser.loader_pool import LoaderPool, LoaderTimeout
+
+
+def convert_slowly(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def test_queued_documents_do_not_time_out():
+    # Each conversion fits its timeout, but the batch is three times the
+    # pool's size; waiting for a worker must not count against it
+    async def run():
+        pool = LoaderPool(workers=2, timeout=1.0)
+        await pool.start()
+        try:
+            return await asyncio.gather(*(pool.run(convert_slowly, 0.6) for _ in range(6))), pool.snapshot()
+        finally:
+            await pool.stop()
+
+    results, stats = asyncio.run(run())
+
+    assert results == [0.6] * 6
+    assert stats["timeouts"] == 0 and stats["restarts"] == 0
+
+
+def test_slow_document_only_replaces_its_worker():
+    async def run():
+        pool = LoaderPool(workers=2, timeout=1.0)
+        await pool.start()
+        try:
+            slow = pool.run(convert_slowly, 5.0, label="slow.pdf")
+            others = [pool.run(convert_slowly, 0.3) for _ in range(4)]
+            return await asyncio.gather(slow, *others, return_exceptions=True), pool.snapshot()
+        finally:
+            await pool.stop()
+
+    results, stats = asyncio.run(run())
+
+    assert isinstance(results[0], LoaderTimeout)
+    assert results[1:] == [0.3] * 4
+    assert stats["timeouts"] == 1 and stats["restarts"] == 1
@@ -0,0 +1,57 @@
+from parser.resume_parser_llm import FAST_PARSE_MIN_CONFIDENCE
+from resume_parser import fast_parse_resume
+
+
+def experience(markdown: str):
+    segment = next(s for s in fast_parse_resume(markdown) if s.name == "Experience")
+    return segment.confidence, [(sub.title, sub.data) for sub in segment.sections[0].subsections]
+
+
+def test_wrapped_bullet_lines_join_their_bullet():
+    confidence, entries = experience("""## Experience
+**Senior Engineer - Acme Corp (Jan 2021 - Present)**
+- Built the ingestion pipeline that feeds the warehouse and
+cut nightly load time by half
+- Led the migration to an event-driven scheduler, reducing
+  failed runs by 80%
+**Engineer - Globex (2018 - 2020)**
+- Maintained billing pipelines
+""")
+
+    assert entries == [
+        ("Senior Engineer - Acme Corp (Jan 2021 - Present)", [
+            "Built the ingestion pipeline that feeds the warehouse and cut nightly load time by half",
+            "Led the migration to an event-driven scheduler, reducing failed runs by 80%",
+        ]),
+        ("Engineer - Globex (2018 - 2020)", ["Maintained billing pipelines"]),
+    ]
+    assert confidence >= FAST_PARSE_MIN_CONFIDENCE
+
+
+def test_unmarked_line_before_a_marked_title_joins_the_last_bullet():
+    _, entries = experience("""## Experience
+**Engineer - Globex (2018 - 2020)**
+- Ran the on-call rotation for payments
+Wrote the runbook later adopted company wide
+**Intern - Initech (2017 - 2018)**
+- Fixed the printer
+""")
+
+    assert entries == [
+        ("Engineer - Globex (2018 - 2020)", ["Ran the on-call rotation for payments Wrote the runbook later adopted company wide"]),
+        ("Intern - Initech (2017 - 2018)", ["Fixed the printer"]),
+    ]
+
+
+def test_ambiguous_line_after_bullets_sends_the_section_to_the_llm():
+    confidence, _ = experience("""## Experience
+Senior Engineer - Acme Corp (Jan 2021 - Present)
+- Built the ingestion pipeline
+Engineer - Globex (2018 - 2020)
+- Ran billing
+Wrote the runbook later adopted company wide
+Intern - Initech (2017 - 2018)
+- Fixed the printer
+""")
+
+    assert confidence < FAST_PARSE_MIN_CONFIDENCE
@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from pydantic import ValidationError
+
+from parser import section_repair
+from parser.deadline import DeadlineExceeded
+from parser.schemas import ResumeJSON
+
+RAW = {
+    "sections": [
+        {"section_name": "Skills", "subsections": [{"title": "", "data": ["Python", "Go"]}]},
+        {
+            "section_name": "Experience",
+            "subsections": [
+                {"title": "Acme", "data": ["Built the pipeline"]},
+                {"title": "Globex", "data": "Ran the platform team"},
+                {"title": "Initech", "data": [{"text": "Fixed the printer"}]},
+            ],
+        },
+        {"section_name": "Education", "subsections": {"title": "State University", "data": []}},
+        {"section_name": "Projects", "items": ["Compiler"]},
+    ]
+}
+
+ANSWERS = {
+    # Fixed by its re-ask
+    "Globex": {"title": "Globex", "data": ["Ran the platform team"]},
+    "State University": {"section_name": "Education", "subsections": [{"title": "State University", "data": []}]},
+    # Still invalid after its re-ask
+    "Compiler": {"section_name": "Projects", "items": ["Compiler"]},
+}
+
+
+def validation_error() -> ValidationError:
+    try:
+        ResumeJSON.model_validate(RAW)
+    except ValidationError as e:
+        return e
+    raise AssertionError("RAW should not validate")
+
+
+def fake_llm(fail_with=None):
+    async def call_ollama(prompt, format_model=None, call_site="unknown", **kwargs):
+        fragment = prompt.split("Fragment:\n", 1)[1]
+        if "Initech" in fragment:
+            raise fail_with or httpx.ConnectError("backend unreachable")
+        for marker, answer in ANSWERS.items():
+            if marker in fragment:
+                return json.dumps(answer)
+        raise AssertionError(f"unexpected re-ask: {fragment}")
+
+    return call_ollama
+
+
+def test_repair_keeps_valid_fixes_broken_and_drops_the_rest(monkeypatch):
+    monkeypatch.setattr(section_repair, "RESUME_PARTIAL_REASK", True)
+    monkeypatch.setattr(section_repair, "call_ollama", fake_llm())
+
+    repaired = asyncio.run(section_repair.repair_resume(RAW, validation_error()))
+
+    assert repaired.model_dump() == {
+        "sections": [
+            {"section_name": "Skills", "subsections": [{"title": "", "data": ["Python", "Go"]}]},
+            {
+                "section_name": "Experience",
+                "subsections": [
+                    {"title": "Acme", "data": ["Built the pipeline"]},
+                    {"title": "Globex", "data": ["Ran the platform team"]},
+                ],
+            },
+            {"section_name": "Education", "subsections": [{"title": "State University", "data": []}]},
+        ]
+    }
+
+
+def test_deadline_still_fails_the_repair(monkeypatch):
+    monkeypatch.setattr(section_repair, "RESUME_PARTIAL_REASK", True)
+    monkeypatch.setattr(section_repair, "call_ollama", fake_llm(DeadlineExceeded("out of time")))
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(section_repair.repair_resume(RAW, validation_error()))
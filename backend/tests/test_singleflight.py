@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+
+from parser import llm_client
+from parser.singleflight import SingleFlight
+
+
+class Work:
+    """A shared call that runs until released, counting how often it starts"""
+
+    def __init__(self, result="done", error=None):
+        self.result = result
+        self.error = error
+        self.started = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.started += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+
+    async def run():
+        work = Work()
+        tasks = [asyncio.create_task(flight.do("k", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert flight.is_inflight("k")
+        work.release.set()
+        results = await asyncio.gather(*tasks)
+        return work, results
+
+    work, results = asyncio.run(run())
+
+    assert results == ["done"] * 3
+    assert work.started == 1
+    assert not flight.is_inflight("k")
+    assert flight.snapshot()["leaders"] == 1 and flight.snapshot()["coalesced"] == 2
+
+
+def test_an_exception_reaches_every_waiter():
+    flight = SingleFlight()
+
+    async def run():
+        work = Work(error=RuntimeError("backend down"))
+        tasks = [asyncio.create_task(flight.do("k", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        work.release.set()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert [str(r) for r in results] == ["backend down"] * 3
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_one_caller_cancelling_does_not_cancel_the_shared_call():
+    flight = SingleFlight()
+
+    async def run():
+        work = Work()
+        leaving = asyncio.create_task(flight.do("k", work))
+        staying = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        leaving.cancel()
+        await asyncio.sleep(0)
+        assert not work.cancelled
+        work.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        return work, await staying
+
+    work, result = asyncio.run(run())
+
+    assert result == "done"
+    assert work.started == 1 and not work.cancelled
+    assert flight.snapshot()["abandoned"] == 0
+
+
+def test_the_call_is_cancelled_when_every_caller_has_gone():
+    flight = SingleFlight()
+
+    async def run():
+        work = Work()
+        tasks = [asyncio.create_task(flight.do("k", work)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert not flight.is_inflight("k")
+
+        # The next caller starts fresh instead of joining the cancelled call
+        again = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        work.release.set()
+        return work, await again
+
+    work, result = asyncio.run(run())
+
+    assert work.cancelled and work.started == 2
+    assert result == "done"
+    assert flight.snapshot()["abandoned"] == 1
+
+
+def test_uncached_llm_calls_are_not_coalesced(monkeypatch):
+    monkeypatch.setattr(llm_client, "inflight", SingleFlight())
+    monkeypatch.setattr(llm_client, "LLM_CACHE_ENABLED", False)
+    generations = []
+
+    async def fake_generate(payload, cache_key, call_site):
+        generations.append(call_site)
+        reply = f"reply {len(generations)}"
+        await asyncio.sleep(0.01)
+        return reply
+
+    monkeypatch.setattr(llm_client, "_generate", fake_generate)
+
+    async def run():
+        return await asyncio.gather(
+            llm_client.call_ollama("same prompt", call_site="shared"),
+            llm_client.call_ollama("same prompt", call_site="shared"),
+            llm_client.call_ollama("same prompt", use_cache=False, call_site="fresh"),
+        )
+
+    results = asyncio.run(run())
+
+    # The two default calls share one generation; the uncached one runs its own
+    assert sorted(generations) == ["fresh", "shared"]
+    assert results[0] == results[1] != results[2]
@@ -0,0 +1,25 @@
+import re
+from pathlib import Path
+
+from template_compiler import compile_template
+from template_extractor_fast import pdf_to_template_html
+
+SAMPLE_PDF = Path(__file__).resolve().parent.parent / "output" / "resume_biswajeet092003_20260112_232451.pdf"
+
+
+def test_cid_bullets_become_list_items_with_their_wrapped_lines():
+    html = pdf_to_template_html(SAMPLE_PDF)
+
+    items = re.findall(r"<li[^>]*>(.*?)</li>", html, re.DOTALL)
+    assert len(items) == 5
+    assert "(cid:" not in html
+    # The bullet's short broken lines are folded into it
+    assert items[0].startswith("Built a SQL agent")
+    assert "natural-language-to-SQL translation" in items[0]
+    assert "fetching effort." in items[0]
+
+
+def test_compiled_sample_has_a_bullet_list_slot():
+    compiled = compile_template(pdf_to_template_html(SAMPLE_PDF))
+
+    assert re.search(r'<ul[^>]*data-slot="items"[^>]*><li[^>]*data-slot="item"', compiled)
@@ -0,0 +1,147 @@
+import asyncio
+
+from template_compiler import COMPILED_TEMPLATE_VERSION, render_template
+from template_index import TemplateIndex
+
+SOURCE_STRINGS = [
+    "Alice Smith",
+    "alice.smith@example.com",
+    "+1 415 555 0199",
+    "linkedin.com/in/alicesmith",
+    "Staff engineer who ships reliable data platforms",
+    "Acme Corp",
+    "Jan 2019 - Present",
+    "Built the ingestion pipeline",
+    "Cut query latency by 40%",
+    "State University",
+    "B.S. Computer Science",
+    "Python, Go, Kubernetes",
+    "Alice's resume",
+    "References available on request",
+]
+
+SOURCE_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<meta name="author" content="Alice Smith">
+<meta name="description" content="Alice's resume">
+<title>Resume - Alice Smith</title>
+<style>body { font-family: Georgia; } .resume-section h2 { color: #224488; }</style>
+</head>
+<body>
+<!-- Alice Smith, alice.smith@example.com -->
+<div class="resume-container">
+  <div class="resume-header">
+    <h1>Alice Smith</h1>
+    <p class="headline">Staff engineer who ships reliable data platforms</p>
+    <p class="contact">alice.smith@example.com | +1 415 555 0199 | linkedin.com/in/alicesmith</p>
+    <a class="icon" href="https://linkedin.com/in/alicesmith" title="Alice Smith on LinkedIn"><i class="fa-linkedin"></i></a>
+  </div>
+  <p class="summary">Staff engineer who ships reliable data platforms</p>
+  <div class="resume-section">
+    <h2>Experience</h2>
+    <div class="entry">
+      <h3>Acme Corp</h3>
+      <span class="dates">Jan 2019 - Present</span>
+      <ul><li>Built the ingestion pipeline</li><li>Cut query latency by 40%</li></ul>
+    </div>
+  </div>
+  <div class="resume-section">
+    <h2>Education</h2>
+    <div class="entry">
+      <h3>State University</h3>
+      <p>B.S. Computer Science</p>
+    </div>
+  </div>
+  <div class="resume-section">
+    <h2>Skills</h2>
+    <p>Python, Go, Kubernetes</p>
+  </div>
+  <footer>alice.smith@example.com <img src="data:image/png;base64,AAAA" alt="Alice Smith"> References available on request</footer>
+</div>
+</body>
+</html>"""
+
+PROFILE = {
+    "sections": [
+        {"section_name": "Name", "subsections": [{"title": "", "data": ["Bob Jones"]}]},
+        {"section_name": "Contact Information", "subsections": [{"title": "", "data": ["bob@example.org"]}]},
+        {"section_name": "Experience", "subsections": [{"title": "Globex", "data": ["Ran the platform team"]}]},
+    ]
+}
+
+
+class FakeCollection:
+    """The two motor calls TemplateIndex makes, over a dict"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def replace_one(self, query, document, upsert=False):
+        current = self.docs.get(query["_id"])
+        if current is None or current.get("compiled_version") != COMPILED_TEMPLATE_VERSION:
+            self.docs[query["_id"]] = document
+
+    async def find_one_and_update(self, query, update):
+        current = self.docs.get(query["_id"])
+        if current is None or current.get("compiled_version") != query["compiled_version"]:
+            return None
+        current["uses"] += update["$inc"]["uses"]
+        return current
+
+
+def index_and_lookup(html):
+    collection = FakeCollection()
+    index = TemplateIndex(collection, enabled=True)
+
+    async def run():
+        await index.add("layout-1", html)
+        return await index.lookup("layout-1")
+
+    return asyncio.run(run())
+
+
+def test_indexed_template_holds_no_source_text():
+    indexed = index_and_lookup(SOURCE_HTML)
+
+    assert indexed is not None
+    for text in SOURCE_STRINGS:
+        assert text not in indexed
+    # Styling is what the next user of the layout gets
+    assert "font-family: Georgia" in indexed
+    assert "#224488" in indexed
+
+
+def test_indexed_template_renders_another_profile():
+    indexed = index_and_lookup(SOURCE_HTML)
+
+    rendered = render_template(indexed, PROFILE)
+
+    assert "Bob Jones" in rendered
+    assert "bob@example.org" in rendered
+    assert "Globex" in rendered and "Ran the platform team" in rendered
+    for text in SOURCE_STRINGS:
+        assert text not in rendered
+
+
+def test_failed_llm_extraction_is_not_indexed(monkeypatch):
+    import resume_upload
+
+    async def failing_llm(text_content, layout_info, fallback=True):
+        assert fallback is False
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(resume_upload, "TEMPLATE_EXTRACTOR", "llm")
+    monkeypatch.setattr(resume_upload, "convert_to_html_with_llm", failing_llm)
+    loaded = resume_upload.LoadedResume("alice.pdf", "", "Alice Smith\nExperience", {"pages": []})
+    loaded.fingerprint = "layout-1"
+    collection = FakeCollection()
+    index = TemplateIndex(collection, enabled=True)
+
+    template = asyncio.run(resume_upload.extract_template(loaded, template_index=index))
+
+    assert template.extracted is False
+    assert template.html  # the user still gets the basic layout
+    assert collection.docs == {}
@@ -0,0 +1,223 @@
+import asyncio
+import copy
+from datetime import datetime, timedelta
+
+from upload_jobs import UploadJobQueue
+
+MISSING = object()
+
+
+def matches(doc: dict, query: dict) -> bool:
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+            continue
+        value = doc.get(key, MISSING)
+        if not isinstance(condition, dict):
+            if value != condition:
+                return False
+            continue
+        for op, arg in condition.items():
+            if op == "$in" and value not in arg:
+                return False
+            if op == "$exists" and (value is not MISSING) != arg:
+                return False
+            if op == "$lt" and (value is MISSING or not value < arg):
+                return False
+    return True
+
+
+def apply(doc: dict, update: dict):
+    for key, value in update.get("$set", {}).items():
+        *parents, leaf = key.split(".")
+        target = doc
+        for part in parents:
+            target = target.setdefault(part, {})
+        target[leaf] = value
+    for key in update.get("$unset", {}):
+        doc.pop(key, None)
+
+
+class FakeCollection:
+    """The motor collection calls UploadJobQueue makes, over a dict"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def create_index(self, *args, **kwargs):
+        pass
+
+    async def insert_one(self, doc):
+        self.docs[doc["_id"]] = copy.deepcopy(doc)
+
+    async def find_one(self, query, projection=None):
+        return next((copy.deepcopy(d) for d in self.docs.values() if matches(d, query)), None)
+
+    async def update_one(self, query, update):
+        doc = next((d for d in self.docs.values() if matches(d, query)), None)
+        if doc is not None:
+            apply(doc, update)
+
+    async def update_many(self, query, update):
+        for doc in self.docs.values():
+            if matches(doc, query):
+                apply(doc, update)
+
+    async def find_one_and_update(self, query, update, projection=None, sort=None):
+        for doc in sorted(self.docs.values(), key=lambda d: d["created_at"]):
+            if matches(doc, query):
+                before = copy.deepcopy(doc)
+                apply(doc, update)
+                return before
+        return None
+
+
+class Processor:
+    def __init__(self):
+        self.runs = []
+
+    async def __call__(self, job, on_stage):
+        self.runs.append(job["_id"])
+        for stage in ("extract", "parse", "template", "save"):
+            await on_stage(stage, "running")
+            await on_stage(stage, "succeeded")
+        return {"profileId": "p1"}
+
+
+def add_job(collection, job_id, status="queued", worker_id="other", heartbeat_age=None, content=b"%PDF"):
+    now = datetime.utcnow()
+    doc = {"_id": job_id, "status": status, "stage": status, "worker_id": worker_id,
+           "created_at": now, "stages": {}}
+    if content is not None:
+        doc["content"] = content
+    if heartbeat_age is not None:
+        doc["heartbeat_at"] = now - timedelta(seconds=heartbeat_age)
+    collection.docs[job_id] = doc
+
+
+def test_a_submitted_job_is_claimed_run_and_completed():
+    collection = FakeCollection()
+    processor = Processor()
+    jobs = UploadJobQueue(collection, processor, workers=1)
+
+    async def run():
+        job = await jobs.submit("a@example.com", "cv.pdf", b"%PDF")
+        assert collection.docs[job["_id"]]["worker_id"] == jobs.worker_id
+        await jobs._run(job["_id"])
+        return job["_id"]
+
+    job_id = asyncio.run(run())
+    doc = collection.docs[job_id]
+
+    assert processor.runs == [job_id]
+    assert doc["status"] == "succeeded" and doc["progress"] == 100
+    assert doc["result"] == {"profileId": "p1"}
+    assert "content" not in doc
+    assert all(doc["stages"][stage]["state"] == "succeeded" for stage in ("extract", "parse", "template", "save"))
+
+
+def test_a_job_leased_to_another_process_is_not_run():
+    collection = FakeCollection()
+    processor = Processor()
+    jobs = UploadJobQueue(collection, processor)
+    add_job(collection, "theirs", heartbeat_age=0)
+
+    asyncio.run(jobs._run("theirs"))
+
+    assert processor.runs == []
+    assert collection.docs["theirs"]["status"] == "queued"
+
+
+def test_heartbeat_extends_only_this_process_unfinished_leases():
+    collection = FakeCollection()
+    jobs = UploadJobQueue(collection, Processor())
+    add_job(collection, "mine-queued", worker_id=jobs.worker_id, heartbeat_age=30)
+    add_job(collection, "mine-running", status="running", worker_id=jobs.worker_id, heartbeat_age=30)
+    add_job(collection, "mine-done", status="succeeded", worker_id=jobs.worker_id, heartbeat_age=30, content=None)
+    add_job(collection, "theirs", worker_id="other", heartbeat_age=30)
+    before = {job_id: doc["heartbeat_at"] for job_id, doc in collection.docs.items()}
+
+    asyncio.run(jobs._renew())
+
+    renewed = {job_id for job_id, doc in collection.docs.items() if doc["heartbeat_at"] > before[job_id]}
+    assert renewed == {"mine-queued", "mine-running"}
+
+
+def test_only_lapsed_leases_are_recovered():
+    collection = FakeCollection()
+    jobs = UploadJobQueue(collection, Processor(), lease_seconds=60)
+    add_job(collection, "alive", status="running", heartbeat_age=10)
+    add_job(collection, "dead-running", status="running", heartbeat_age=120)
+    add_job(collection, "dead-queued", heartbeat_age=120)
+    add_job(collection, "released", status="running")
+    add_job(collection, "dead-finished", status="failed", heartbeat_age=120, content=None)
+
+    async def run():
+        await jobs._recover()
+        return [jobs.queue.get_nowait() for _ in range(jobs.queue.qsize())]
+
+    recovered = asyncio.run(run())
+
+    assert recovered == ["dead-running", "dead-queued", "released"]
+    for job_id in recovered:
+        assert collection.docs[job_id]["status"] == "queued"
+        assert collection.docs[job_id]["worker_id"] == jobs.worker_id
+    assert collection.docs["alive"]["worker_id"] == "other"
+    assert collection.docs["dead-finished"]["status"] == "failed"
+    assert jobs.stats["recovered"] == 3
+
+
+def test_recovery_stops_when_the_queue_is_full():
+    collection = FakeCollection()
+    jobs = UploadJobQueue(collection, Processor(), max_queue=2, lease_seconds=60)
+    for n in range(3):
+        add_job(collection, f"dead-{n}", heartbeat_age=120)
+
+    asyncio.run(jobs._recover())
+
+    assert jobs.queue.qsize() == 2
+    assert collection.docs["dead-2"]["worker_id"] == "other"
+
+
+def test_a_cancelled_job_releases_its_lease():
+    collection = FakeCollection()
+
+    async def slow(job, on_stage):
+        await asyncio.sleep(10)
+
+    jobs = UploadJobQueue(collection, slow)
+
+    async def run():
+        job = await jobs.submit("a@example.com", "cv.pdf", b"%PDF")
+        task = asyncio.create_task(jobs._run(job["_id"]))
+        await asyncio.sleep(0.01)
+        assert collection.docs[job["_id"]]["status"] == "running"
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return job["_id"]
+
+    doc = collection.docs[asyncio.run(run())]
+
+    assert doc["status"] == "queued"
+    assert "heartbeat_at" not in doc and "content" in doc
+
+
+def test_subscribers_wake_on_changes_and_leave_no_events_behind():
+    collection = FakeCollection()
+    jobs = UploadJobQueue(collection, Processor())
+
+    async def run():
+        job = await jobs.submit("a@example.com", "cv.pdf", b"%PDF")
+        waiters = [asyncio.create_task(jobs.wait_for_update(job["_id"], timeout=5)) for _ in range(2)]
+        await asyncio.sleep(0)
+        started = asyncio.get_running_loop().time()
+        await jobs._run(job["_id"])
+        await asyncio.gather(*waiters)
+        woke_after = asyncio.get_running_loop().time() - started
+
+        await jobs.wait_for_update("unknown-job", timeout=0.01)
+        return woke_after
+
+    assert asyncio.run(run()) < 1
+    assert jobs._events == {} and jobs._waiters == {}
@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+from parser.utils import IncrementalSectionParser, _cut_points, recover_json
+
+
+@pytest.mark.parametrize("text, value, repairs", [
+    (
+        'Here is the JSON:\n{"a": 1}\nHope that helps!',
+        {"a": 1},
+        ["dropped 17 characters of leading text", "dropped 16 characters of trailing text"],
+    ),
+    ('```json\n{"a": [1, 2]}\n```', {"a": [1, 2]}, ["stripped code fence"]),
+    ('```json\n{"a": [1, 2]}', {"a": [1, 2]}, ["stripped unterminated code fence"]),
+    ('{"a": [1, 2,], "b": {"c": 3,},}', {"a": [1, 2], "b": {"c": 3}}, ["removed 3 trailing commas"]),
+    # Truncated inside a string: the half-written value and its key go
+    (
+        '{"sections": [{"name": "A"}, {"name": "B", "note": "unfinis',
+        {"sections": [{"name": "A"}, {"name": "B"}]},
+        ["dropped 18 characters of incomplete trailing value", "closed 3 unclosed brackets"],
+    ),
+    # Truncated inside an array: the last number may itself be cut short
+    (
+        '{"a": [1, 2, 3',
+        {"a": [1, 2]},
+        ["dropped 3 characters of incomplete trailing value", "closed 2 unclosed brackets"],
+    ),
+    # Truncated inside an object, after a dangling key
+    (
+        '{"a": {"b": 1, "c": {"d": 2}, "e"',
+        {"a": {"b": 1, "c": {"d": 2}}},
+        ["dropped 5 characters of incomplete trailing value", "closed 2 unclosed brackets"],
+    ),
+    # An array just opened inside an array is dropped, not closed empty
+    (
+        '{"a": [[1, 2], [3',
+        {"a": [[1, 2]]},
+        ["dropped 4 characters of incomplete trailing value", "closed 2 unclosed brackets"],
+    ),
+    # Closers inside strings, and escaped quotes, are not structure
+    (
+        '{"a": "x}]", "b": [{"c": "y\\"}"}, {"d',
+        {"a": "x}]", "b": [{"c": 'y"}'}]},
+        ["dropped 5 characters of incomplete trailing value", "closed 2 unclosed brackets"],
+    ),
+])
+def test_recover_json(text, value, repairs):
+    assert recover_json(text) == (value, repairs)
+
+
+def test_recover_json_without_a_value_raises():
+    with pytest.raises(ValueError):
+        recover_json("Sorry, I cannot help with that.")
+
+
+def test_cut_points_close_every_open_container():
+    text = '{"a": [1, {"b": 2}], "c": "x,y"}'
+    points = _cut_points(text)
+
+    # Each cut, once closed, is valid JSON
+    for end, closers in points:
+        json.loads(text[:end] + closers)
+    # Commas and brackets inside strings are not cut points
+    assert all(end < text.index('"x,y"') for end, _ in points)
+    # No cut just after the object opened inside the array
+    assert (text.index("{", 1) + 1, "}]}") not in points
+
+
+SECTIONS = [
+    {"section_name": "Summary", "subsections": [{"title": "About {me}", "data": ["Likes [brackets] and \"quotes\""]}]},
+    {"section_name": "Skills", "subsections": [{"title": "Paths", "data": ["C:\\\\tools\\\\", "ends with \\\\"]}]},
+    {"section_name": "Empty", "subsections": []},
+]
+DOCUMENT = json.dumps({"sections": SECTIONS, "extra": [{"not": "a section"}]}, indent=1)
+
+
+def feed_in_chunks(chunks):
+    parser = IncrementalSectionParser()
+    seen = []
+    for chunk in chunks:
+        seen.extend(parser.feed(chunk))
+    return parser, seen
+
+
+def test_incremental_parser_whole_document():
+    parser, seen = feed_in_chunks([DOCUMENT])
+
+    assert seen == SECTIONS
+    assert parser.buffer == DOCUMENT
+
+
+@pytest.mark.parametrize("split", range(1, len(DOCUMENT)))
+def test_incremental_parser_any_chunk_boundary(split):
+    # Splits land inside strings, between a backslash and what it escapes,
+    # and between a section's closing brace and the next one
+    _, seen = feed_in_chunks([DOCUMENT[:split], DOCUMENT[split:]])
+
+    assert seen == SECTIONS
+
+
+def test_incremental_parser_character_by_character_yields_sections_as_they_close():
+    parser = IncrementalSectionParser()
+    closed_at = [i for i, ch in enumerate(DOCUMENT) if parser.feed(ch)]
+
+    assert len(closed_at) == len(SECTIONS)
+    assert DOCUMENT[closed_at[0]] == "}"
+    assert closed_at[-1] < DOCUMENT.index('"extra"')
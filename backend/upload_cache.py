@@ -0,0 +1,99 @@
+# upload_cache.py - Reuse parse results for byte-identical resume uploads
+import hashlib
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from pymongo.errors import OperationFailure
+
+from parser.llm_client import OLLAMA_MODEL
+
+# How long an entry survives without being reused; 0 turns the cache off
+UPLOAD_CACHE_RETENTION_SECONDS = int(os.getenv("UPLOAD_CACHE_RETENTION_SECONDS", str(30 * 24 * 3600)))
+# Bump when the parse prompt or template extraction changes so older results are not reused
+UPLOAD_CACHE_VERSION = 1
+# Mongo's error code for an index that exists with different options
+INDEX_OPTIONS_CONFLICT = 85
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class UploadCache:
+    """
+    Parsed extractedData and extracted html_template stored per upload hash.
+
+    Re-uploading the same file (common during onboarding) is answered from
+    Mongo without any Ollama call. Entries are tied to the model and
+    UPLOAD_CACHE_VERSION, and a TTL index on last_used_at removes entries
+    not reused within UPLOAD_CACHE_RETENTION_SECONDS.
+    """
+
+    def __init__(self, collection, retention_seconds: int = UPLOAD_CACHE_RETENTION_SECONDS):
+        self.collection = collection
+        self.retention_seconds = retention_seconds
+        self.stats = {"hits": 0, "misses": 0, "stores": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.retention_seconds > 0
+
+    async def ensure_indexes(self):
+        if not self.enabled:
+            return
+        try:
+            await self.collection.create_index("last_used_at", expireAfterSeconds=self.retention_seconds)
+        except OperationFailure as e:
+            if e.code != INDEX_OPTIONS_CONFLICT:
+                raise
+            # The retention changed since the index was created; TTL indexes
+            # cannot be redefined in place
+            await self.collection.drop_index("last_used_at_1")
+            await self.collection.create_index("last_used_at", expireAfterSeconds=self.retention_seconds)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        entry = await self.collection.find_one_and_update(
+            {"_id": key, "model": OLLAMA_MODEL, "version": UPLOAD_CACHE_VERSION},
+            {"$set": {"last_used_at": datetime.utcnow()}, "$inc": {"hits": 1}},
+        )
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return entry
+
+    async def put(self, key: str, filename: str, extracted_data: dict, html_template: Optional[str]):
+        if not self.enabled:
+            return
+        now = datetime.utcnow()
+        await self.collection.replace_one(
+            {"_id": key},
+            {
+                "_id": key,
+                "model": OLLAMA_MODEL,
+                "version": UPLOAD_CACHE_VERSION,
+                "filename": filename,
+                "extractedData": extracted_data,
+                "html_template": html_template,
+                "hits": 0,
+                "created_at": now,
+                "last_used_at": now,
+            },
+            upsert=True,
+        )
+        self.stats["stores"] += 1
+
+    async def clear(self) -> int:
+        result = await self.collection.delete_many({})
+        return result.deleted_count
+
+    def snapshot(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["enabled"] = self.enabled
+        stats["retention_seconds"] = self.retention_seconds
+        return stats
@@ -0,0 +1,309 @@
+# upload_jobs.py - Background processing of resume uploads
+import asyncio
+import os
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from parser.deadline import DeadlineExceeded, deadline_scope
+
+UPLOAD_JOB_WORKERS = int(os.getenv("UPLOAD_JOB_WORKERS", "2"))
+UPLOAD_JOB_QUEUE_SIZE = int(os.getenv("UPLOAD_JOB_QUEUE_SIZE", "100"))
+# Finished jobs (and their results) are removed by a TTL index after this long
+UPLOAD_JOB_RETENTION_SECONDS = int(os.getenv("UPLOAD_JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+# A process renews the lease on its queued and running jobs every third of
+# this; jobs whose lease lapsed (their process died) are taken over by
+# another process
+UPLOAD_JOB_LEASE_SECONDS = float(os.getenv("UPLOAD_JOB_LEASE_SECONDS", "60"))
+
+JOB_STAGES = ["extract", "parse", "template", "save"]
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+# Runs one job: receives the job document (with the upload bytes in
+# "content") and a stage callback, returns the result stored on the job
+JobProcessor = Callable[[dict, Callable[[str, str], Awaitable[None]]], Awaitable[Dict[str, Any]]]
+
+
+class UploadQueueFull(Exception):
+    """Raised when the upload queue is at UPLOAD_JOB_QUEUE_SIZE"""
+
+
+def job_to_public(job: dict) -> dict:
+    """API view of a job document (without the uploaded bytes)"""
+    return {
+        "jobId": job["_id"],
+        "status": job.get("status"),
+        "stage": job.get("stage"),
+        "progress": job.get("progress", 0),
+        "stages": job.get("stages", {}),
+        "filename": job.get("filename"),
+        "userId": job.get("user_email"),
+        "error": job.get("error"),
+        "result": job.get("result"),
+        "created_at": job.get("created_at"),
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+    }
+
+
+class UploadJobQueue:
+    """
+    Bounded worker pool for resume uploads, with job state kept in Mongo.
+
+    Creating a job stores the upload in the job document and queues its id;
+    UPLOAD_JOB_WORKERS workers take jobs off the queue and run the processor,
+    recording each stage (extract, parse, template, save) as it starts and
+    finishes. The bytes are dropped from the document once the job ends.
+
+    Every job is leased to the process that queued it (worker_id), which
+    renews heartbeat_at on all its unfinished jobs while it runs. Several
+    API processes share the collection, so only jobs whose lease lapsed
+    (their process stopped or died) are taken over, by whichever process
+    claims them first; a job another process is still working on is never
+    run twice.
+
+    Status changes also wake in-process waiters, so SSE subscribers see them
+    immediately instead of on their next poll.
+    """
+
+    def __init__(
+        self,
+        collection,
+        processor: JobProcessor,
+        workers: int = UPLOAD_JOB_WORKERS,
+        max_queue: int = UPLOAD_JOB_QUEUE_SIZE,
+        deadline_seconds: Optional[float] = None,
+        lease_seconds: float = UPLOAD_JOB_LEASE_SECONDS,
+    ):
+        self.collection = collection
+        self.processor = processor
+        self.workers = workers
+        self.max_queue = max_queue
+        self.deadline_seconds = deadline_seconds
+        self.lease_seconds = lease_seconds
+        # Identifies this process in the jobs it holds the lease on
+        self.worker_id = uuid.uuid4().hex
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._events: Dict[str, asyncio.Event] = {}
+        self._waiters: Dict[str, int] = {}
+        self.stats = {"created": 0, "succeeded": 0, "failed": 0, "rejected": 0, "recovered": 0}
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        return self._queue
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("user_email")
+        await self.collection.create_index("status")
+        await self.collection.create_index("worker_id")
+        await self.collection.create_index("created_at", expireAfterSeconds=UPLOAD_JOB_RETENTION_SECONDS)
+
+    async def start(self):
+        try:
+            await self.ensure_indexes()
+        except Exception as e:
+            print(f"⚠️ Upload job indexes not created: {e}")
+        for n in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(n)))
+        self._tasks.append(asyncio.create_task(self._lease_loop()))
+        print(f"✅ Upload job queue started with {self.workers} worker(s)")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        try:
+            # Jobs still queued here would otherwise wait for the lease to lapse
+            await self.collection.update_many(
+                {"worker_id": self.worker_id, "status": {"$in": ["queued", "running"]}},
+                {"$unset": {"heartbeat_at": ""}},
+            )
+        except Exception as e:
+            print(f"⚠️ Upload job leases not released: {e}")
+
+    async def _lease_loop(self):
+        """Renew this process's leases and take over jobs whose lease lapsed"""
+        while True:
+            try:
+                await self._renew()
+                await self._recover()
+            except Exception as e:
+                print(f"⚠️ Upload job lease check failed: {e}")
+            await asyncio.sleep(self.lease_seconds / 3)
+
+    async def _renew(self):
+        await self.collection.update_many(
+            {"worker_id": self.worker_id, "status": {"$in": ["queued", "running"]}},
+            {"$set": {"heartbeat_at": datetime.utcnow()}},
+        )
+
+    async def _recover(self):
+        stale = datetime.utcnow() - timedelta(seconds=self.lease_seconds)
+        recovered = 0
+        # Claimed one at a time, so concurrent processes split the jobs, and
+        # only as many as this queue has room for; the rest wait for a
+        # later check here or in another process
+        while not self.queue.full():
+            job = await self.collection.find_one_and_update(
+                {
+                    "status": {"$in": ["queued", "running"]},
+                    "content": {"$exists": True},
+                    "$or": [{"heartbeat_at": {"$lt": stale}}, {"heartbeat_at": {"$exists": False}}],
+                },
+                {"$set": {
+                    "status": "queued",
+                    "stage": "queued",
+                    "worker_id": self.worker_id,
+                    "heartbeat_at": datetime.utcnow(),
+                    "updated_at": datetime.utcnow(),
+                }},
+                projection={"_id": 1},
+                sort=[("created_at", 1)],
+            )
+            if job is None:
+                break
+            self.queue.put_nowait(job["_id"])
+            self.stats["recovered"] += 1
+            recovered += 1
+        if recovered:
+            print(f"♻️ Took over {recovered} unfinished upload job(s)")
+
+    async def submit(self, user_email: str, filename: str, content: bytes) -> dict:
+        """Persist a new job and queue it; raises UploadQueueFull when at capacity"""
+        if self.queue.full():
+            self.stats["rejected"] += 1
+            raise UploadQueueFull(f"{self.queue.qsize()} uploads already waiting")
+
+        now = datetime.utcnow()
+        job = {
+            "_id": uuid.uuid4().hex,
+            "user_email": user_email,
+            "filename": filename,
+            "content": content,
+            "size": len(content),
+            "status": "queued",
+            "stage": "queued",
+            "worker_id": self.worker_id,
+            "heartbeat_at": now,
+            "progress": 0,
+            "stages": {stage: {"state": "pending"} for stage in JOB_STAGES},
+            "created_at": now,
+            "updated_at": now,
+        }
+        await self.collection.insert_one(job)
+        self.queue.put_nowait(job["_id"])
+        self.stats["created"] += 1
+        print(f"📥 Queued upload job {job['_id']} ({filename}, {self.queue.qsize()} waiting)")
+        return job
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"_id": job_id}, {"content": 0})
+
+    async def wait_for_update(self, job_id: str, timeout: float):
+        """Return when the job changes in this process, or after `timeout` seconds"""
+        event = self._events.setdefault(job_id, asyncio.Event())
+        self._waiters[job_id] = self._waiters.get(job_id, 0) + 1
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._waiters[job_id] -= 1
+            if not self._waiters[job_id]:
+                del self._waiters[job_id]
+                # The last subscriber is gone (or the job changed); nobody needs the event
+                if self._events.get(job_id) is event:
+                    del self._events[job_id]
+
+    def _notify(self, job_id: str):
+        event = self._events.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    async def _update(self, job_id: str, fields: dict, unset: Optional[dict] = None):
+        fields["updated_at"] = datetime.utcnow()
+        update = {"$set": fields}
+        if unset:
+            update["$unset"] = unset
+        await self.collection.update_one({"_id": job_id}, update)
+        self._notify(job_id)
+
+    async def _finish(self, job_id: str, status: str, result: Optional[dict] = None, error: Optional[str] = None):
+        fields = {"status": status, "finished_at": datetime.utcnow()}
+        if status == "succeeded":
+            fields.update({"stage": "done", "progress": 100, "result": result})
+        else:
+            fields["error"] = error
+        await self._update(job_id, fields, unset={"content": ""})
+        self.stats[status] += 1
+
+    async def _worker(self, n: int):
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                print(f"❌ Upload worker {n} crashed on job {job_id}: {e}")
+                traceback.print_exc()
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job_id: str):
+        # Only run a job this process still holds the lease on
+        job = await self.collection.find_one_and_update(
+            {"_id": job_id, "worker_id": self.worker_id, "status": "queued"},
+            {"$set": {"status": "running", "started_at": datetime.utcnow(), "updated_at": datetime.utcnow()}},
+        )
+        if job is None:
+            return
+        self._notify(job_id)
+
+        started = time.perf_counter()
+        finished_stages = set()
+
+        async def on_stage(stage: str, state: str):
+            fields = {f"stages.{stage}.state": state, f"stages.{stage}.{state}_at": datetime.utcnow()}
+            if state == "running":
+                fields["stage"] = stage
+            else:
+                finished_stages.add(stage)
+                fields["progress"] = int(100 * len(finished_stages) / len(JOB_STAGES))
+            await self._update(job_id, fields)
+
+        try:
+            with deadline_scope(self.deadline_seconds):
+                result = await self.processor(job, on_stage)
+        except asyncio.CancelledError:
+            # Shutting down: release the job so another process (or this one
+            # after a restart) takes it over straight away
+            await asyncio.shield(
+                self._update(job_id, {"status": "queued", "stage": "queued"}, unset={"heartbeat_at": ""})
+            )
+            raise
+        except DeadlineExceeded as e:
+            print(f"⏰ Upload job {job_id} ran out of time: {e}")
+            await self._finish(job_id, "failed", error="Resume parsing timed out, please try again")
+        except Exception as e:
+            print(f"❌ Upload job {job_id} failed: {e}")
+            traceback.print_exc()
+            await self._finish(job_id, "failed", error=f"Resume parsing failed: {str(e)}")
+        else:
+            await self._finish(job_id, "succeeded", result=result)
+            print(f"✅ Upload job {job_id} finished in {time.perf_counter() - started:.2f} seconds")
+
+    def snapshot(self) -> dict:
+        stats = dict(self.stats)
+        stats["queued"] = self.queue.qsize()
+        stats["workers"] = self.workers
+        stats["max_queue"] = self.max_queue
+        return stats